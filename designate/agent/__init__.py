@@ -30,6 +30,26 @@ OPTS = [
                help='The Agent TCP Backlog'),
     cfg.FloatOpt('tcp-recv-timeout', default=0.5,
                  help='Agent TCP Receive Timeout'),
+    cfg.FloatOpt('tcp-idle-timeout', default=10.0,
+                 help='Seconds a TCP connection may be idle between queries '
+                      'before it is closed'),
+    cfg.IntOpt('tcp-max-connections', default=500,
+               help='Maximum number of open TCP connections, beyond which the '
+                    'longest idle connection is closed, or new connections '
+                    'refused when none are idle'),
+    cfg.IntOpt('udp-recv-size', default=8192,
+               help='Maximum size of the UDP packets received'),
+    cfg.IntOpt('query-workers', default=50,
+               help='Number of threads handling queries for each of TCP and '
+                    'UDP'),
+    cfg.IntOpt('query-queue-size', default=1000,
+               help='Maximum number of queries waiting for a worker for each '
+                    'of TCP and UDP, further UDP queries are dropped and TCP '
+                    'queries are REFUSED'),
+    cfg.IntOpt('query-stats-interval', default=60,
+               help='Seconds between logging the depth of the TCP and UDP '
+                    'query queues of each listening interface, and the '
+                    'queries they handled and dropped, 0 to disable'),
     cfg.ListOpt('allow-notify', default=[],
                 help='List of IP addresses allowed to NOTIFY The Agent'),
     cfg.ListOpt('masters', default=[],
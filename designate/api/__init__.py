@@ -36,4 +36,12 @@ cfg.CONF.register_opts([
     cfg.BoolOpt('enable-api-v1', default=True),
     cfg.BoolOpt('enable-api-v2', default=False),
     cfg.BoolOpt('enable-api-admin', default=False),
+    cfg.IntOpt('zone-export-page-size', default=1000,
+               help='The number of recordsets fetched from central at once '
+                    'while exporting a zone file'),
+    cfg.BoolOpt('stale-reads', default=True,
+                help='Whether GET requests may be served by the read '
+                     'replicas of the database, when central has any. A '
+                     'read may then miss writes made up to the storage '
+                     'replica-max-lag seconds before it.'),
 ], group='service:api')
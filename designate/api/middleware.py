@@ -83,6 +83,11 @@ class ContextMiddleware(base.Middleware):
         else:
             ctxt.all_tenants = False
 
+        # Only reads may be served by a replica, writes, and the reads
+        # central makes for them, always use the primary
+        if request.method in ('GET', 'HEAD'):
+            ctxt.stale_reads = cfg.CONF['service:api'].stale_reads
+
         request.environ['context'] = ctxt
 
         return ctxt
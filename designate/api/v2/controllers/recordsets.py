@@ -63,6 +63,7 @@ class RecordSetsController(rest.RestController):
                          if k in params)
 
         criterion['domain_id'] = zone_id
+        criterion = self._apply_total_count_param(params, criterion)
 
         # Data must be filtered separately, through the Records table
         recordsets_with_data = set()
@@ -99,14 +100,10 @@ class RecordSetsController(rest.RestController):
 
         body = request.body_dict
 
-        recordset = DesignateAdapter.parse('API_v2', body, RecordSet())
+        if isinstance(body, list):
+            return self._post_many(context, zone_id, body)
 
-        recordset.validate()
-
-        # SOA recordsets cannot be created manually
-        if recordset.type == 'SOA':
-            raise exceptions.BadRequest(
-                "Creating a SOA recordset is not allowed")
+        recordset = self._parse_recordset(body)
 
         # Create the recordset
         recordset = self.central_api.create_recordset(
@@ -126,6 +123,54 @@ class RecordSetsController(rest.RestController):
         # Prepare and return the response body
         return recordset
 
+    def _parse_recordset(self, body):
+        recordset = DesignateAdapter.parse('API_v2', body, RecordSet())
+
+        recordset.validate()
+
+        self._check_creatable(recordset)
+
+        return recordset
+
+    def _check_creatable(self, recordset):
+        # SOA recordsets cannot be created manually
+        if recordset.type == 'SOA':
+            raise exceptions.BadRequest(
+                "Creating a SOA recordset is not allowed")
+
+    def _post_many(self, context, zone_id, body):
+        """Create RecordSets, all in a single change to the zone"""
+        request = pecan.request
+        response = pecan.response
+
+        if not body:
+            raise exceptions.BadRequest('No recordsets to create')
+
+        if not all(isinstance(item, dict) for item in body):
+            raise exceptions.BadRequest('Each recordset must be an object')
+
+        recordsets = RecordSetList(objects=[
+            DesignateAdapter.parse('API_v2', item, RecordSet())
+            for item in body])
+
+        # Report the errors of every invalid recordset at once
+        recordsets.validate()
+
+        for recordset in recordsets:
+            self._check_creatable(recordset)
+
+        # Create the recordsets
+        recordsets = self.central_api.create_recordsets(
+            context, zone_id, recordsets)
+
+        # Prepare the response status
+        if any(recordset.status == 'PENDING' for recordset in recordsets):
+            response.status_int = 202
+        else:
+            response.status_int = 201
+
+        return DesignateAdapter.render('API_v2', recordsets, request=request)
+
     @pecan.expose(template='json:', content_type='application/json')
     @utils.validate_uuid('zone_id', 'recordset_id')
     def put_one(self, zone_id, recordset_id):
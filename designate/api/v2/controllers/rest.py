@@ -93,6 +93,30 @@ class RestController(pecan.rest.RestController):
 
         return marker, limit, sort_key, sort_dir
 
+    def _apply_total_count_param(self, params, criterion):
+        """
+        Extract the total_count parameter, which is either "true" (the
+        default), "false" to leave out the total count or "estimate" for a
+        count which stops at a bounded number of matches.
+        """
+        total_count = params.pop('total_count', 'true')
+
+        try:
+            total_count = {
+                'true': 'exact',
+                'false': 'none',
+                'estimate': 'estimate',
+            }[total_count]
+        except KeyError:
+            raise exceptions.BadRequest(
+                _("total_count must be one of 'true', 'false' or "
+                  "'estimate'"))
+
+        if total_count != 'exact':
+            criterion['total_count'] = total_count
+
+        return criterion
+
     def _apply_filter_params(self, params, accepted_filters, criterion):
 
         for k in accepted_filters:
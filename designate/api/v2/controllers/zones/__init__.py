@@ -17,10 +17,13 @@ import pecan
 from dns import zone as dnszone
 from dns import exception as dnsexception
 from oslo.config import cfg
+from oslo_log import log as logging
+from oslo_utils import excutils
 
 from designate import exceptions
 from designate import utils
 from designate import dnsutils
+from designate.i18n import _LE
 from designate.api.v2.controllers import rest
 from designate.api.v2.controllers import recordsets
 from designate.api.v2.controllers.zones import tasks
@@ -29,6 +32,7 @@ from designate.objects.adapters import DesignateAdapter
 
 
 CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
 
 
 class ZonesController(rest.RestController):
@@ -68,35 +72,78 @@ class ZonesController(rest.RestController):
             request=request)
 
     def _get_zonefile(self, request, context, zone_id):
-        """Export zonefile"""
+        """
+        Export zonefile, streaming it as it's rendered
+
+        The first page of recordsets is fetched before the response starts,
+        so failing to read the zone is answered with the usual error status.
+        Once the status is sent, a failure can only abort the response.
+        """
         servers = self.central_api.get_domain_servers(context, zone_id)
         domain = self.central_api.get_domain(context, zone_id)
+        recordsets = self._find_zonefile_recordsets(context, zone_id)
 
-        criterion = {'domain_id': zone_id}
-        recordsets = self.central_api.find_recordsets(context, criterion)
-
-        records = []
-
-        for recordset in recordsets:
-            criterion = {
-                'domain_id': domain['id'],
-                'recordset_id': recordset['id']
-            }
-
-            raw_records = self.central_api.find_records(context, criterion)
-
-            for record in raw_records:
-                records.append({
-                    'name': recordset['name'],
-                    'type': recordset['type'],
-                    'ttl': recordset['ttl'],
-                    'data': record['data'],
-                })
-
-        return utils.render_template('bind9-zone.jinja2',
-                                     servers=servers,
-                                     domain=domain,
-                                     records=records)
+        response = pecan.response
+        response.content_type = 'text/dns'
+        response.app_iter = self._iter_zonefile_chunks(
+            zone_id, utils.render_template_chunks(
+                'bind9-zone.jinja2',
+                servers=servers,
+                domain=domain,
+                records=self._iter_zonefile_records(
+                    context, zone_id, recordsets)))
+
+        return response
+
+    def _iter_zonefile_chunks(self, zone_id, chunks):
+        try:
+            for chunk in chunks:
+                yield chunk
+        except Exception:
+            # NOTE: Ending the body here would pass a truncated zone file
+            #       off as complete. Raising instead leaves the WSGI server
+            #       to drop the connection before the end of the body.
+            with excutils.save_and_reraise_exception():
+                LOG.exception(_LE('Failed to export zone %s, aborting the '
+                                  'response'), zone_id)
+
+    def _find_zonefile_recordsets(self, context, zone_id, marker=None):
+        # Paging on to the end, so there's no need for a total count
+        criterion = {'domain_id': zone_id, 'total_count': 'none'}
+
+        # Page on by id, so recordsets deleted meanwhile can't end the
+        # export early
+        if marker is not None:
+            criterion['id'] = '>%s' % marker
+
+        return self.central_api.find_recordsets(
+            context, criterion,
+            limit=CONF['service:api'].zone_export_page_size, sort_key='id',
+            sort_dir='asc')
+
+    def _iter_zonefile_records(self, context, zone_id, recordsets):
+        """
+        Yields the records of the zone, starting from the first page of
+        recordsets, which include their records, and fetching the rest a
+        page at a time
+        """
+        page_size = CONF['service:api'].zone_export_page_size
+
+        while True:
+            for recordset in recordsets:
+                for record in recordset.records:
+                    yield {
+                        'name': recordset.name,
+                        'type': recordset.type,
+                        'ttl': recordset.ttl,
+                        'data': record.data,
+                    }
+
+            if len(recordsets) < page_size:
+                return
+
+            recordsets = self._find_zonefile_recordsets(
+                context, zone_id, recordsets[-1].id)
 
     @pecan.expose(template='json:', content_type='application/json')
     def get_all(self, **params):
@@ -111,6 +158,7 @@ class ZonesController(rest.RestController):
 
         criterion = self._apply_filter_params(
             params, accepted_filters, {})
+        criterion = self._apply_total_count_param(params, criterion)
 
         return DesignateAdapter.render(
             'API_v2',
@@ -41,4 +41,23 @@ cfg.CONF.register_opts([
     cfg.StrOpt('default_pool_id',
                default='794ccc2c-d751-44fe-b57f-8894c9f5c842',
                help="The name of the default pool"),
+    cfg.IntOpt('zone-journal-size', default=100,
+               help="Number of serials of record changes to keep per zone "
+                    "for incremental zone transfers, 0 disables the journal"),
+    cfg.IntOpt('domain-index-refresh-interval', default=60,
+               help="Seconds between reloads of the in-memory index of "
+                    "domain names from storage, picking up changes made by "
+                    "other central instances. 0 disables the reloads"),
+    cfg.StrOpt('lock-driver', default='local',
+               help="Driver used to serialize the operations on a domain. "
+                    "'local' serializes within a process, 'file' across the "
+                    "processes of a host and 'storage' across every host "
+                    "sharing the database"),
+    cfg.IntOpt('lock-lease-time', default=60,
+               help="Seconds after which a storage lock may be taken over "
+                    "from a holder which stopped renewing its lease, the "
+                    "lease is renewed every third of it"),
+    cfg.FloatOpt('lock-poll-interval', default=0.05,
+                 help="Seconds between attempts to take a file or storage "
+                      "lock held by another process"),
 ], group='service:central')
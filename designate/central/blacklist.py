@@ -0,0 +1,118 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import re
+
+from oslo_log import log as logging
+
+from designate.i18n import _LE
+
+LOG = logging.getLogger(__name__)
+
+# Patterns using these can't be combined with others into one regex, as
+# group numbers and names would clash, conditional groups refer to groups by
+# number, and inline flags apply to the whole regex.
+_UNCOMBINABLE = re.compile(r'\\[1-9]|\(\?P|\(\?\(|\(\?[iLmsux]')
+
+# Python 2 limits a regex to 100 groups.
+_MAX_GROUPS = 90
+
+
+class BlacklistMatcher(object):
+    """
+    Matches names against the blacklist patterns, compiled once.
+
+    Patterns are combined into alternations of up to chunk_size patterns,
+    which are each searched in a single pass. The patterns of a matching
+    alternation are then tried one at a time to tell which one matched.
+    """
+    def __init__(self, chunk_size=50):
+        self.chunk_size = chunk_size
+
+        # The version of the blacklists loaded, see
+        # Storage.get_blacklists_version
+        self.version = None
+        self._chunks = []
+
+    def __len__(self):
+        return sum(len(patterns) for combined, patterns in self._chunks)
+
+    def load(self, blacklists, version=None):
+        """Compiles the patterns of the given blacklists"""
+        compiled = []
+
+        for blacklist in blacklists:
+            try:
+                compiled.append((blacklist.pattern,
+                                 re.compile(blacklist.pattern)))
+            except re.error as e:
+                LOG.error(_LE("Ignoring invalid pattern %(pattern)s of "
+                              "blacklist %(id)s: %(error)s") %
+                          {'pattern': blacklist.pattern, 'id': blacklist.id,
+                           'error': e})
+
+        self._chunks = self._build_chunks(compiled)
+        self.version = version
+
+        LOG.debug("Compiled %d blacklist patterns into %d regexes",
+                  len(compiled), len(self._chunks))
+
+    def _build_chunks(self, compiled):
+        chunks = []
+        chunk = []
+        groups = 0
+
+        def _close(chunk):
+            if len(chunk) == 1:
+                chunks.append((None, chunk))
+                return
+
+            try:
+                combined = re.compile(
+                    '|'.join('(?:%s)' % pattern for pattern, regex in chunk))
+            except (re.error, AssertionError):
+                # Fall back to searching the patterns one by one
+                chunks.extend((None, [member]) for member in chunk)
+            else:
+                chunks.append((combined, chunk))
+
+        for pattern, regex in compiled:
+            if _UNCOMBINABLE.search(pattern):
+                chunks.append((None, [(pattern, regex)]))
+                continue
+
+            if chunk and (len(chunk) >= self.chunk_size or
+                          groups + regex.groups > _MAX_GROUPS):
+                _close(chunk)
+                chunk = []
+                groups = 0
+
+            chunk.append((pattern, regex))
+            groups += regex.groups
+
+        if chunk:
+            _close(chunk)
+
+        return chunks
+
+    def match(self, name):
+        """Returns the first pattern matching name, or None"""
+        for combined, patterns in self._chunks:
+            if combined is not None and not combined.search(name):
+                continue
+
+            for pattern, regex in patterns:
+                if regex.search(name):
+                    return pattern
+
+        return None
@@ -0,0 +1,162 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+
+class _Node(object):
+    __slots__ = ['children', 'domain_id', 'name']
+
+    def __init__(self):
+        self.children = {}
+        self.domain_id = None
+        self.name = None
+
+
+class DomainNameIndex(object):
+    """
+    In-memory tree of the domain names of each pool, keyed by label from the
+    root down, so that the domains above or below a name are found by
+    walking its labels rather than by querying storage.
+
+    Only the ids of the domains are held, callers fetch the domains they
+    need from storage.
+    """
+    def __init__(self):
+        self._roots = {}
+        self._domains = {}
+
+    def __len__(self):
+        return len(self._domains)
+
+    def __contains__(self, domain_id):
+        return domain_id in self._domains
+
+    @staticmethod
+    def _labels(name):
+        labels = name.lower().rstrip('.').split('.')
+        labels.reverse()
+        return labels
+
+    def _walk(self, pool_id, name):
+        """Yields the nodes on the path from the root to a name"""
+        node = self._roots.get(pool_id)
+
+        if node is None:
+            return
+
+        for label in self._labels(name):
+            node = node.children.get(label)
+
+            if node is None:
+                return
+
+            yield node
+
+    def load(self, domains):
+        """Replaces the contents of the index with the given domains"""
+        self._roots = {}
+        self._domains = {}
+
+        for domain in domains:
+            self.add(domain)
+
+    def add(self, domain):
+        if domain.id in self._domains:
+            self.remove(domain.id)
+
+        node = self._roots.setdefault(domain.pool_id, _Node())
+
+        for label in self._labels(domain.name):
+            node = node.children.setdefault(label, _Node())
+
+        node.domain_id = domain.id
+        node.name = domain.name
+        self._domains[domain.id] = (domain.pool_id, domain.name)
+
+    def remove(self, domain_id):
+        if domain_id not in self._domains:
+            return
+
+        pool_id, name = self._domains.pop(domain_id)
+        path = list(self._walk(pool_id, name))
+
+        if not path or path[-1].domain_id != domain_id:
+            return
+
+        path[-1].domain_id = None
+        path[-1].name = None
+
+        # Prune the branches which no longer lead to any domain
+        labels = self._labels(name)
+        parents = [self._roots[pool_id]] + path[:-1]
+
+        for i in reversed(range(len(path))):
+            if path[i].domain_id is not None or path[i].children:
+                break
+
+            del parents[i].children[labels[i]]
+
+    def find_parent(self, pool_id, name):
+        """
+        Returns the id of the closest domain above a name, excluding any
+        domain of the name itself, or None.
+        """
+        parent_id = None
+        path = list(self._walk(pool_id, name))
+
+        if len(path) == len(self._labels(name)):
+            # Skip the node of the name itself
+            path.pop()
+
+        for node in path:
+            if node.domain_id is not None:
+                parent_id = node.domain_id
+
+        return parent_id
+
+    def find_subdomains(self, pool_id, name):
+        """Returns the ids of all the domains below a name"""
+        path = list(self._walk(pool_id, name))
+
+        if len(path) != len(self._labels(name)):
+            return []
+
+        domain_ids = []
+        nodes = list(path[-1].children.values())
+
+        while nodes:
+            node = nodes.pop()
+
+            if node.domain_id is not None:
+                domain_ids.append(node.domain_id)
+
+            nodes.extend(node.children.values())
+
+        return domain_ids
+
+    def find_child(self, pool_id, domain_name, name):
+        """
+        Returns the name of the highest domain below domain_name which holds
+        name, either as its apex or below it, or None.
+        """
+        labels = self._labels(name)
+        depth = len(self._labels(domain_name))
+
+        if labels[:depth] != self._labels(domain_name):
+            return None
+
+        for node in list(self._walk(pool_id, name))[depth:]:
+            if node.domain_id is not None:
+                return node.name
+
+        return None
@@ -48,14 +48,17 @@ class CentralAPI(object):
         4.3 - Added Zone Transfer Methods
         5.0 - Remove dead server code
         5.1 - Add xfr_domain
+        5.2 - Add batch recordset methods
+        5.3 - Add get_lock_stats
+        5.4 - Add get_retry_stats
     """
-    RPC_API_VERSION = '5.1'
+    RPC_API_VERSION = '5.4'
 
     def __init__(self, topic=None):
         topic = topic if topic else cfg.CONF.central_topic
 
         target = messaging.Target(topic=topic, version=self.RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='5.1')
+        self.client = rpc.get_client(target, version_cap='5.4')
 
     @classmethod
     def get_instance(cls):
@@ -78,6 +81,16 @@ class CentralAPI(object):
 
         return self.client.call(context, 'get_absolute_limits')
 
+    def get_lock_stats(self, context):
+        LOG.info(_LI("get_lock_stats: Calling central's get_lock_stats."))
+        cctxt = self.client.prepare(version='5.3')
+        return cctxt.call(context, 'get_lock_stats')
+
+    def get_retry_stats(self, context):
+        LOG.info(_LI("get_retry_stats: Calling central's get_retry_stats."))
+        cctxt = self.client.prepare(version='5.4')
+        return cctxt.call(context, 'get_retry_stats')
+
     # Quota Methods
     def get_quotas(self, context, tenant_id):
         LOG.info(_LI("get_quotas: Calling central's get_quotas."))
@@ -243,6 +256,33 @@ class CentralAPI(object):
                                 recordset_id=recordset_id,
                                 increment_serial=increment_serial)
 
+    def create_recordsets(self, context, domain_id, recordsets,
+                          increment_serial=True):
+        LOG.info(_LI("create_recordsets: Calling central's "
+                     "create_recordsets."))
+        cctxt = self.client.prepare(version='5.2')
+        return cctxt.call(context, 'create_recordsets', domain_id=domain_id,
+                          recordsets=recordsets,
+                          increment_serial=increment_serial)
+
+    def update_recordsets(self, context, domain_id, recordsets,
+                          increment_serial=True):
+        LOG.info(_LI("update_recordsets: Calling central's "
+                     "update_recordsets."))
+        cctxt = self.client.prepare(version='5.2')
+        return cctxt.call(context, 'update_recordsets', domain_id=domain_id,
+                          recordsets=recordsets,
+                          increment_serial=increment_serial)
+
+    def delete_recordsets(self, context, domain_id, recordset_ids,
+                          increment_serial=True):
+        LOG.info(_LI("delete_recordsets: Calling central's "
+                     "delete_recordsets."))
+        cctxt = self.client.prepare(version='5.2')
+        return cctxt.call(context, 'delete_recordsets', domain_id=domain_id,
+                          recordset_ids=recordset_ids,
+                          increment_serial=increment_serial)
+
     def count_recordsets(self, context, criterion=None):
         LOG.info(_LI("count_recordsets: Calling central's count_recordsets."))
         return self.client.call(context, 'count_recordsets',
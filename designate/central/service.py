@@ -14,7 +14,6 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-import re
 import collections
 import copy
 import functools
@@ -28,14 +27,15 @@ from oslo.config import cfg
 from oslo import messaging
 from oslo_log import log as logging
 from oslo_utils import excutils
-from oslo_concurrency import lockutils
 from oslo_db import exception as db_exception
 
+from designate.i18n import _LE
 from designate.i18n import _LI
 from designate.i18n import _LC
 from designate.i18n import _LW
 from designate import context as dcontext
 from designate import exceptions
+from designate import lock
 from designate import network_api
 from designate import objects
 from designate import policy
@@ -43,6 +43,8 @@ from designate import quota
 from designate import service
 from designate import utils
 from designate import storage
+from designate.central import blacklist as blacklist_matcher
+from designate.central import domain_index
 from designate.mdns import rpcapi as mdns_rpcapi
 from designate.pool_manager import rpcapi as pool_manager_rpcapi
 
@@ -51,6 +53,7 @@ LOG = logging.getLogger(__name__)
 DOMAIN_LOCKS = threading.local()
 NOTIFICATION_BUFFER = threading.local()
 RETRY_STATE = threading.local()
+RETRY_STATS = {}
 
 
 def _retry_on_deadlock(exc):
@@ -63,8 +66,30 @@ def _retry_on_deadlock(exc):
     return False
 
 
+def _record_retry(name, retries, retry_time, failed):
+    stats = RETRY_STATS.setdefault(name, {
+        'retried': 0,
+        'retries': 0,
+        'failed': 0,
+        'retry_time': 0.0,
+    })
+
+    stats['retried'] += 1
+    stats['retries'] += retries
+    stats['retry_time'] += retry_time
+
+    if failed:
+        stats['failed'] += 1
+
+
 def retry(cb=None, retries=50, delay=150):
-    """A retry decorator that ignores attempts at creating nested retries"""
+    """
+    A retry decorator that ignores attempts at creating nested retries
+
+    The arguments are passed to the decorated function as they are, not
+    copied. Changes it makes to them remain once it returns, but are undone
+    when it raises, as far as objects.base.Snapshot can capture them.
+    """
     def outer(f):
         @functools.wraps(f)
         def wrapper(self, *args, **kwargs):
@@ -77,13 +102,22 @@ def retry(cb=None, retries=50, delay=150):
                 # We're the outermost retry decorator
                 RETRY_STATE.held = True
 
+                # NOTE: Rather than deepcopying the arguments for every
+                #       attempt, they're passed as is, and put back the way
+                #       they were should an attempt fail.
+                snapshot = objects.base.Snapshot(args, kwargs)
+                start_time = attempt_time = time.time()
+                failed = True
+
                 try:
                     while True:
                         try:
-                            result = f(self, *copy.deepcopy(args),
-                                       **copy.deepcopy(kwargs))
+                            result = f(self, *args, **kwargs)
+                            failed = False
                             break
                         except Exception as exc:
+                            snapshot.restore()
+
                             RETRY_STATE.retries += 1
                             if RETRY_STATE.retries >= retries:
                                 # Exceeded retry attempts, raise.
@@ -94,20 +128,47 @@ def retry(cb=None, retries=50, delay=150):
                             else:
                                 # Retry, with a delay.
                                 time.sleep(delay / float(1000))
+                                attempt_time = time.time()
 
                 finally:
+                    if attempt_time != start_time:
+                        # Record the attempts and delays the retries cost
+                        _record_retry(f.__name__, RETRY_STATE.retries,
+                                      attempt_time - start_time, failed)
+
                     RETRY_STATE.held = False
                     RETRY_STATE.retries = 0
 
             else:
-                # We're an inner retry decorator, just pass on through.
-                result = f(self, *copy.deepcopy(args), **copy.deepcopy(kwargs))
+                # We're an inner retry decorator, which never retries. The
+                # arguments are still put back should the call fail, so a
+                # caller handling the failure sees them as they were passed.
+                snapshot = objects.base.Snapshot(args, kwargs)
+
+                try:
+                    result = f(self, *args, **kwargs)
+                except Exception:
+                    with excutils.save_and_reraise_exception():
+                        snapshot.restore()
 
             return result
         return wrapper
     return outer
 
 
+def _check_domain_locks(service):
+    """Raises LockLost should a domain lock held by the caller be lost"""
+    locks = getattr(service, 'locks', None)
+
+    # Services other than central, like the storage quota driver, take no
+    # domain locks
+    if locks is None:
+        return
+
+    for domain_id in getattr(DOMAIN_LOCKS, 'held', ()):
+        locks.check('domain-%s' % domain_id)
+
+
 # TODO(kiall): Get this a better home :)
 def transaction(f):
     @retry(cb=_retry_on_deadlock)
@@ -116,12 +177,44 @@ def transaction(f):
         self.storage.begin()
         try:
             result = f(self, *args, **kwargs)
+
+            # Only commit what was changed while the domains were locked
+            _check_domain_locks(self)
+
             self.storage.commit()
-            return result
         except Exception:
             with excutils.save_and_reraise_exception():
                 self.storage.rollback()
 
+        return result
+
+    return wrapper
+
+
+def read_only(f):
+    """
+    Marks a method which only reads, allowing its reads to be served by a
+    replica of the storage when the context allows stale reads.
+
+    A replica may lag behind the writes just made by any central, so only
+    callers which set stale_reads on their context are served by one. Reads
+    made on behalf of a write, with a domain locked or a transaction open,
+    always use the primary.
+    """
+    @functools.wraps(f)
+    def wrapper(self, *args, **kwargs):
+        if getattr(DOMAIN_LOCKS, 'held', None):
+            return f(self, *args, **kwargs)
+
+        context = dcontext.DesignateContext.\
+            get_context_from_function_and_args(f, args, kwargs)
+
+        if context is None or not getattr(context, 'stale_reads', False):
+            return f(self, *args, **kwargs)
+
+        with self.storage.replica_reads(context):
+            return f(self, *args, **kwargs)
+
     return wrapper
 
 
@@ -187,14 +280,14 @@ def synchronized_domain(domain_arg=1, new_domain=False):
                 # Call the wrapped function
                 return f(self, *args, **kwargs)
             else:
-                with lockutils.lock('domain-%s' % domain_id):
+                with self.locks.lock('domain-%s' % domain_id):
                     DOMAIN_LOCKS.held.add(domain_id)
 
-                    # Call the wrapped function
-                    result = f(self, *args, **kwargs)
-
-                    DOMAIN_LOCKS.held.remove(domain_id)
-                    return result
+                    try:
+                        # Call the wrapped function
+                        return f(self, *args, **kwargs)
+                    finally:
+                        DOMAIN_LOCKS.held.remove(domain_id)
 
         return wrapper
     return outer
@@ -219,11 +312,18 @@ def notification(notification_type):
                 # Call the wrapped function
                 result = f(self, *args, **kwargs)
 
-                # Enqueue the notification
+                # Enqueue the notification, one per object for batch
+                # operations so consumers see the same payloads either way
                 LOG.debug('Queueing notification for %(type)s ',
                           {'type': notification_type})
-                NOTIFICATION_BUFFER.queue.appendleft(
-                    (context, notification_type, result,))
+
+                if isinstance(result, objects.base.ListObjectMixin):
+                    for item in reversed(list(result)):
+                        NOTIFICATION_BUFFER.queue.appendleft(
+                            (context, notification_type, item,))
+                else:
+                    NOTIFICATION_BUFFER.queue.appendleft(
+                        (context, notification_type, result,))
 
                 return result
 
@@ -247,7 +347,7 @@ def notification(notification_type):
 
 
 class Service(service.RPCService, service.Service):
-    RPC_API_VERSION = '5.1'
+    RPC_API_VERSION = '5.4'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -261,8 +361,18 @@ class Service(service.RPCService, service.Service):
         # Get a quota manager instance
         self.quota = quota.get_quota()
 
+        # Get the lock serializing the operations on each domain
+        self.locks = lock.get_lock()
+
         self.network_api = network_api.get_network_api(cfg.CONF.network_api)
 
+        # Index of the domain names of each pool, for the subdomain and
+        # superdomain checks
+        self.domain_index = domain_index.DomainNameIndex()
+
+        # The compiled blacklist patterns
+        self.blacklist_matcher = blacklist_matcher.BlacklistMatcher()
+
     @property
     def service_name(self):
         return 'central'
@@ -282,8 +392,30 @@ class Service(service.RPCService, service.Service):
             msg = _LW("Managed Resource Tenant ID is not properly configured")
             LOG.warn(msg)
 
+        self._load_domain_index()
+
         super(Service, self).start()
 
+        interval = cfg.CONF['service:central'].domain_index_refresh_interval
+        if interval > 0:
+            self.tg.add_timer(interval, self._load_domain_index, interval)
+
+    def _load_domain_index(self):
+        """
+        (Re)loads the domain name index from storage, picking up domains
+        created or deleted by other central instances.
+        """
+        context = dcontext.DesignateContext.get_admin_context(
+            all_tenants=True)
+
+        try:
+            self.domain_index.load(self.storage.find_domain_names(context))
+        except Exception:
+            LOG.exception(_LE('Failed to load the domain name index'))
+        else:
+            LOG.debug('Loaded %d domains into the domain name index',
+                      len(self.domain_index))
+
     def stop(self):
         super(Service, self).stop()
 
@@ -385,39 +517,63 @@ class Service(service.RPCService, service.Service):
         LOG.debug("Checking if %s belongs in any of %s subdomains" %
                   (recordset_name, domain.name))
 
-        criterion = criterion or {}
-
-        context = context.elevated()
-        context.all_tenants = True
-
         if domain.name == recordset_name:
             return
 
-        child_domains = self.storage.find_domains(
-            context, {"parent_domain_id": domain.id})
-        for child_domain in child_domains:
-            try:
-                self._is_valid_recordset_name(
-                    context, child_domain, recordset_name)
-            except Exception:
-                continue
-            else:
-                msg = 'RecordSet belongs in a child zone: %s' % \
-                    child_domain['name']
-                raise exceptions.InvalidRecordSetLocation(msg)
+        child_domain_name = self.domain_index.find_child(
+            domain.pool_id, domain.name, recordset_name)
+
+        if child_domain_name is None:
+            # The index may be missing domains created by other central
+            # instances, so only storage can tell there is no child domain.
+            labels = recordset_name.rstrip('.').split('.')
+            depth = len(domain.name.rstrip('.').split('.'))
+            child_names = ['%s.' % '.'.join(labels[i:])
+                           for i in range(len(labels) - depth)]
+
+            if not child_names:
+                return
+
+            elevated_context = context.elevated()
+            elevated_context.all_tenants = True
+
+            child_domains = self.storage.find_domains(
+                elevated_context,
+                {'name': child_names, 'pool_id': domain.pool_id})
+
+            if not child_domains:
+                return
+
+            for child_domain in child_domains:
+                self.domain_index.add(child_domain)
+
+            # The highest child is the one with the shortest name
+            child_domain_name = min(
+                child_domains, key=lambda d: len(d.name)).name
+
+        msg = 'RecordSet belongs in a child zone: %s' % child_domain_name
+        raise exceptions.InvalidRecordSetLocation(msg)
 
     def _is_blacklisted_domain_name(self, context, domain_name):
         """
         Ensures the provided domain_name is not blacklisted.
         """
+        # The blacklists are only read and recompiled once they have changed
+        version = self.storage.get_blacklists_version(context)
 
-        blacklists = self.storage.find_blacklists(context)
+        if version != self.blacklist_matcher.version:
+            self.blacklist_matcher.load(
+                self.storage.find_blacklists(context), version)
 
-        for blacklist in blacklists:
-            if bool(re.search(blacklist.pattern, domain_name)):
-                return True
+        pattern = self.blacklist_matcher.match(domain_name)
 
-        return False
+        if pattern is None:
+            return False
+
+        LOG.info(_LI("Domain name %(name)s matches blacklist pattern "
+                     "%(pattern)s") % {'name': domain_name,
+                                       'pattern': pattern})
+        return True
 
     def _is_subdomain(self, context, domain_name, pool_id):
         """
@@ -427,25 +583,35 @@ class Service(service.RPCService, service.Service):
         context = context.elevated()
         context.all_tenants = True
 
-        # Break the name up into it's component labels
-        labels = domain_name.split(".")
-
-        criterion = {"pool_id": pool_id}
-
-        i = 1
+        parent_domain_id = self.domain_index.find_parent(pool_id, domain_name)
 
-        # Starting with label #2, search for matching domain's in the database
-        while (i < len(labels)):
-            name = '.'.join(labels[i:])
-            criterion["name"] = name
+        if parent_domain_id is not None:
             try:
-                domain = self.storage.find_domain(context, criterion)
+                return self.storage.get_domain(context, parent_domain_id)
             except exceptions.DomainNotFound:
-                i += 1
-            else:
-                return domain
+                # The index is stale, the domain was deleted elsewhere
+                self.domain_index.remove(parent_domain_id)
+
+        # The index may be missing domains created by other central
+        # instances, so only storage can tell there is no parent domain.
+        labels = domain_name.rstrip('.').split('.')
+        parent_names = ['%s.' % '.'.join(labels[i:])
+                        for i in range(1, len(labels))]
+
+        if not parent_names:
+            return False
+
+        parent_domains = self.storage.find_domains(
+            context, {'name': parent_names, 'pool_id': pool_id})
 
-        return False
+        for parent_domain in parent_domains:
+            self.domain_index.add(parent_domain)
+
+        if not parent_domains:
+            return False
+
+        # The closest parent is the one with the longest name
+        return max(parent_domains, key=lambda d: len(d.name))
 
     def _is_superdomain(self, context, domain_name, pool_id):
         """
@@ -455,11 +621,27 @@ class Service(service.RPCService, service.Service):
         context = context.elevated()
         context.all_tenants = True
 
-        # Create wildcard term to catch all subdomains
-        search_term = "%%.%(name)s" % {"name": domain_name}
+        # NOTE: The index may be missing subdomains created by other central
+        #       instances, and missing any one of them could let a tenant
+        #       take over the domain above another tenant's, so storage is
+        #       always asked. This only costs a query per domain created.
+        subdomains = self.storage.find_domains(
+            context, {'name': '%%.%s' % domain_name, 'pool_id': pool_id})
+
+        # The name is matched with LIKE, where '_' matches any character
+        subdomains = objects.DomainList(objects=[
+            d for d in subdomains if d.name.endswith('.%s' % domain_name)])
+
+        subdomain_ids = set(d.id for d in subdomains)
 
-        criterion = {'name': search_term, "pool_id": pool_id}
-        subdomains = self.storage.find_domains(context, criterion)
+        # Bring the index up to date with what storage found
+        for domain_id in self.domain_index.find_subdomains(
+                pool_id, domain_name):
+            if domain_id not in subdomain_ids:
+                self.domain_index.remove(domain_id)
+
+        for subdomain in subdomains:
+            self.domain_index.add(subdomain)
 
         return subdomains
 
@@ -481,6 +663,12 @@ class Service(service.RPCService, service.Service):
         # Update SOA record
         self._update_soa(context, domain)
 
+        # Expire the journalled changes that are too old to be asked for
+        if self._is_journalled_domain(domain):
+            self.storage.delete_zone_changes(
+                context, domain.id,
+                keep=cfg.CONF['service:central'].zone_journal_size)
+
         return domain
 
     # SOA Recordset Methods
@@ -582,6 +770,44 @@ class Service(service.RPCService, service.Service):
 
         self._update_recordset_in_storage(context, zone, ns_recordset)
 
+    # Zone Change Journal Methods
+    def _is_journalled_domain(self, domain):
+        # NOTE: The SOA, NS and initial recordsets of a new zone are not
+        #       journalled, no one can hold an older copy of it.
+        return (cfg.CONF['service:central'].zone_journal_size > 0 and
+                domain.type == 'PRIMARY' and domain.action != 'CREATE')
+
+    def _get_recordset_rrs(self, domain, recordset, records=None):
+        """
+        Returns the set of (name, type, ttl, data) tuples served by mdns for
+        the records of a recordset
+        """
+        if records is None:
+            records = recordset.records
+
+        ttl = recordset.ttl or domain.ttl
+
+        return set([(recordset.name, recordset.type, ttl, record.data)
+                    for record in records if record.action != 'DELETE'])
+
+    def _journal_zone_changes(self, context, domain, old_rrs, new_rrs):
+        """
+        Records the resource records removed and added to a zone at its
+        current serial, allowing mdns to answer IXFR requests
+        """
+        if not self._is_journalled_domain(domain):
+            return
+
+        changes = [('DELETE', rr) for rr in old_rrs - new_rrs]
+        changes += [('ADD', rr) for rr in new_rrs - old_rrs]
+
+        for action, (name, type_, ttl, data) in changes:
+            zone_change = objects.ZoneChange(
+                serial=domain.serial, action=action, name=name, type=type_,
+                ttl=ttl, data=data)
+
+            self.storage.create_zone_change(context, domain.id, zone_change)
+
     # Quota Enforcement Methods
     def _enforce_domain_quota(self, context, tenant_id):
         criterion = {'tenant_id': tenant_id}
@@ -608,6 +834,16 @@ class Service(service.RPCService, service.Service):
         # NOTE(Kiall): Currently, we only have quota based limits..
         return self.quota.get_quotas(context, context.tenant)
 
+    def get_lock_stats(self, context):
+        policy.check('get_lock_stats', context)
+
+        return self.locks.get_stats()
+
+    def get_retry_stats(self, context):
+        policy.check('get_retry_stats', context)
+
+        return copy.deepcopy(RETRY_STATS)
+
     # Quota Methods
     def get_quotas(self, context, tenant_id):
         target = {'tenant_id': tenant_id}
@@ -696,16 +932,22 @@ class Service(service.RPCService, service.Service):
 
     # TSIG Key Methods
     @notification('dns.tsigkey.create')
-    @transaction
     def create_tsigkey(self, context, tsigkey):
         policy.check('create_tsigkey', context)
 
-        created_tsigkey = self.storage.create_tsigkey(context, tsigkey)
+        created_tsigkey = self._create_tsigkey_in_storage(context, tsigkey)
 
-        # TODO(Ron): this method needs to do more than update storage.
+        # mdns may have cached the name as unknown. It's only told once the
+        # key is committed, so it can't cache the old state again.
+        self.mdns_api.invalidate_tsigkey(context, created_tsigkey)
 
         return created_tsigkey
 
+    @transaction
+    def _create_tsigkey_in_storage(self, context, tsigkey):
+        return self.storage.create_tsigkey(context, tsigkey)
+
+    @read_only
     def find_tsigkeys(self, context, criterion=None, marker=None, limit=None,
                       sort_key=None, sort_dir=None):
         policy.check('find_tsigkeys', context)
@@ -713,41 +955,50 @@ class Service(service.RPCService, service.Service):
         return self.storage.find_tsigkeys(context, criterion, marker,
                                           limit, sort_key, sort_dir)
 
+    @read_only
     def get_tsigkey(self, context, tsigkey_id):
         policy.check('get_tsigkey', context, {'tsigkey_id': tsigkey_id})
 
         return self.storage.get_tsigkey(context, tsigkey_id)
 
     @notification('dns.tsigkey.update')
-    @transaction
     def update_tsigkey(self, context, tsigkey):
         target = {
             'tsigkey_id': tsigkey.obj_get_original_value('id'),
         }
         policy.check('update_tsigkey', context, target)
 
-        tsigkey = self.storage.update_tsigkey(context, tsigkey)
+        tsigkey = self._update_tsigkey_in_storage(context, tsigkey)
 
-        # TODO(Ron): this method needs to do more than update storage.
+        self.mdns_api.invalidate_tsigkey(context, tsigkey)
 
         return tsigkey
 
-    @notification('dns.tsigkey.delete')
     @transaction
+    def _update_tsigkey_in_storage(self, context, tsigkey):
+        return self.storage.update_tsigkey(context, tsigkey)
+
+    @notification('dns.tsigkey.delete')
     def delete_tsigkey(self, context, tsigkey_id):
         policy.check('delete_tsigkey', context, {'tsigkey_id': tsigkey_id})
 
-        tsigkey = self.storage.delete_tsigkey(context, tsigkey_id)
+        tsigkey = self._delete_tsigkey_in_storage(context, tsigkey_id)
 
-        # TODO(Ron): this method needs to do more than update storage.
+        self.mdns_api.invalidate_tsigkey(context, tsigkey)
 
         return tsigkey
 
+    @transaction
+    def _delete_tsigkey_in_storage(self, context, tsigkey_id):
+        return self.storage.delete_tsigkey(context, tsigkey_id)
+
     # Tenant Methods
+    @read_only
     def find_tenants(self, context):
         policy.check('find_tenants', context)
         return self.storage.find_tenants(context)
 
+    @read_only
     def get_tenant(self, context, tenant_id):
         target = {
             'tenant_id': tenant_id
@@ -757,6 +1008,7 @@ class Service(service.RPCService, service.Service):
 
         return self.storage.get_tenant(context, tenant_id)
 
+    @read_only
     def count_tenants(self, context):
         policy.check('count_tenants', context)
         return self.storage.count_tenants(context)
@@ -833,6 +1085,8 @@ class Service(service.RPCService, service.Service):
 
         domain = self._create_domain_in_storage(context, domain)
 
+        self.domain_index.add(domain)
+
         self.pool_manager_api.create_domain(context, domain)
 
         if domain.type == 'SECONDARY':
@@ -870,6 +1124,7 @@ class Service(service.RPCService, service.Service):
 
         return domain
 
+    @read_only
     def get_domain(self, context, domain_id):
         domain = self.storage.get_domain(context, domain_id)
 
@@ -882,6 +1137,7 @@ class Service(service.RPCService, service.Service):
 
         return domain
 
+    @read_only
     def get_domain_servers(self, context, domain_id=None, criterion=None):
 
         if domain_id is None:
@@ -907,6 +1163,7 @@ class Service(service.RPCService, service.Service):
 
         return pool.ns_records
 
+    @read_only
     def find_domains(self, context, criterion=None, marker=None, limit=None,
                      sort_key=None, sort_dir=None):
         target = {'tenant_id': context.tenant}
@@ -915,6 +1172,7 @@ class Service(service.RPCService, service.Service):
         return self.storage.find_domains(context, criterion, marker, limit,
                                          sort_key, sort_dir)
 
+    @read_only
     def find_domain(self, context, criterion=None):
         target = {'tenant_id': context.tenant}
         policy.check('find_domain', context, target)
@@ -969,12 +1227,19 @@ class Service(service.RPCService, service.Service):
         domain.action = 'UPDATE'
         domain.status = 'PENDING'
 
+        ttl_changed = 'ttl' in domain.obj_what_changed()
+
         if increment_serial:
             # _increment_domain_serial increments and updates the domain
             domain = self._increment_domain_serial(context, domain)
         else:
             domain = self.storage.update_domain(context, domain)
 
+        # A new default TTL changes every recordset without a TTL of its own,
+        # so the journal can no longer be used to bring a zone up to date.
+        if ttl_changed:
+            self.storage.delete_zone_changes(context, domain.id)
+
         return domain
 
     @notification('dns.domain.delete')
@@ -1003,6 +1268,7 @@ class Service(service.RPCService, service.Service):
         if hasattr(context, 'abandon') and context.abandon:
             LOG.info(_LW("Abandoning zone '%(zone)s'") % {'zone': domain.name})
             domain = self.storage.delete_domain(context, domain.id)
+            self.domain_index.remove(domain.id)
         else:
             domain = self._delete_domain_in_storage(context, domain)
             self.pool_manager_api.delete_domain(context, domain)
@@ -1036,6 +1302,7 @@ class Service(service.RPCService, service.Service):
             msg = "Can't XFR a non Secondary zone."
             raise exceptions.BadRequest(msg)
 
+    @read_only
     def count_domains(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -1122,10 +1389,7 @@ class Service(service.RPCService, service.Service):
 
         return recordset
 
-    @transaction
-    def _create_recordset_in_storage(self, context, domain, recordset,
-                                     increment_serial=True):
-
+    def _check_recordset_create(self, context, domain, recordset):
         # Ensure the tenant has enough quota to continue
         self._enforce_recordset_quota(context, domain)
 
@@ -1141,6 +1405,11 @@ class Service(service.RPCService, service.Service):
         self._is_valid_recordset_placement_subdomain(
             context, domain, recordset.name)
 
+    @transaction
+    def _create_recordset_in_storage(self, context, domain, recordset,
+                                     increment_serial=True):
+        self._check_recordset_create(context, domain, recordset)
+
         if recordset.obj_attr_is_set('records') and len(recordset.records) > 0:
             if increment_serial:
                 # update the zone's status and increment the serial
@@ -1155,9 +1424,15 @@ class Service(service.RPCService, service.Service):
         recordset = self.storage.create_recordset(context, domain.id,
                                                   recordset)
 
+        if recordset.obj_attr_is_set('records'):
+            self._journal_zone_changes(
+                context, domain, set(),
+                self._get_recordset_rrs(domain, recordset))
+
         # Return the domain too in case it was updated
         return (recordset, domain)
 
+    @read_only
     def get_recordset(self, context, domain_id, recordset_id):
         domain = self.storage.get_domain(context, domain_id)
         recordset = self.storage.get_recordset(context, recordset_id)
@@ -1179,6 +1454,7 @@ class Service(service.RPCService, service.Service):
 
         return recordset
 
+    @read_only
     def find_recordsets(self, context, criterion=None, marker=None, limit=None,
                         sort_key=None, sort_dir=None):
         target = {'tenant_id': context.tenant}
@@ -1189,6 +1465,7 @@ class Service(service.RPCService, service.Service):
 
         return recordsets
 
+    @read_only
     def find_recordset(self, context, criterion=None):
         target = {'tenant_id': context.tenant}
         policy.check('find_recordset', context, target)
@@ -1262,6 +1539,10 @@ class Service(service.RPCService, service.Service):
             domain = self._update_domain_in_storage(
                 context, domain, increment_serial)
 
+        if self._is_journalled_domain(domain):
+            old_rrs = self._get_recordset_rrs(
+                domain, self.storage.get_recordset(context, recordset.id))
+
         if recordset.records:
             for record in recordset.records:
                 if record.action != 'DELETE':
@@ -1272,6 +1553,11 @@ class Service(service.RPCService, service.Service):
         # Update the recordset
         recordset = self.storage.update_recordset(context, recordset)
 
+        if self._is_journalled_domain(domain):
+            self._journal_zone_changes(
+                context, domain, old_rrs,
+                self._get_recordset_rrs(domain, recordset))
+
         return (recordset, domain)
 
     @notification('dns.recordset.delete')
@@ -1315,6 +1601,10 @@ class Service(service.RPCService, service.Service):
             domain = self._update_domain_in_storage(
                 context, domain, increment_serial)
 
+        self._journal_zone_changes(
+            context, domain, self._get_recordset_rrs(domain, recordset),
+            set())
+
         if recordset.records:
             for record in recordset.records:
                 record.action = 'DELETE'
@@ -1327,6 +1617,204 @@ class Service(service.RPCService, service.Service):
 
         return (recordset, domain)
 
+    # Batch RecordSet Methods
+    @notification('dns.recordset.create')
+    @synchronized_domain()
+    def create_recordsets(self, context, domain_id, recordsets,
+                          increment_serial=True):
+        domain = self.storage.get_domain(context, domain_id)
+
+        # Don't allow updates to zones that are being deleted
+        if domain.action == 'DELETE':
+            raise exceptions.BadRequest('Can not update a deleting zone')
+
+        for recordset in recordsets:
+            target = {
+                'domain_id': domain_id,
+                'domain_name': domain.name,
+                'domain_type': domain.type,
+                'recordset_name': recordset.name,
+                'tenant_id': domain.tenant_id,
+            }
+
+            policy.check('create_recordset', context, target)
+
+        recordsets, domain = self._create_recordsets_in_storage(
+            context, domain, recordsets, increment_serial=increment_serial)
+
+        self.pool_manager_api.update_domain(context, domain)
+
+        return recordsets
+
+    @transaction
+    def _create_recordsets_in_storage(self, context, domain, recordsets,
+                                      increment_serial=True):
+        has_records = any(
+            recordset.obj_attr_is_set('records') and
+            len(recordset.records) > 0 for recordset in recordsets)
+
+        if increment_serial and has_records:
+            # update the zone's status and increment the serial, once for
+            # the whole batch
+            domain = self._update_domain_in_storage(
+                context, domain, increment_serial)
+
+        types_by_name = collections.defaultdict(list)
+
+        for recordset in recordsets:
+            self._check_recordset_create(context, domain, recordset)
+
+            # Storage only knows about the recordsets created before this
+            # batch, so check the CNAMEs within the batch here
+            types_by_name[recordset.name].append(recordset.type)
+
+            if (len(types_by_name[recordset.name]) > 1 and
+                    'CNAME' in types_by_name[recordset.name]):
+                raise exceptions.InvalidRecordSetLocation(
+                    'CNAME recordsets may not share a name with any other '
+                    'records')
+
+            if recordset.obj_attr_is_set('records'):
+                for record in recordset.records:
+                    record.action = 'CREATE'
+                    record.status = 'PENDING'
+                    record.serial = domain.serial
+
+        created = self.storage.create_recordsets(
+            context, domain.id, recordsets)
+
+        new_rrs = set()
+
+        for recordset in created:
+            new_rrs |= self._get_recordset_rrs(domain, recordset)
+
+        if new_rrs:
+            self._journal_zone_changes(context, domain, set(), new_rrs)
+
+        return (created, domain)
+
+    @notification('dns.recordset.update')
+    @synchronized_domain()
+    def update_recordsets(self, context, domain_id, recordsets,
+                          increment_serial=True):
+        domain = self.storage.get_domain(context, domain_id)
+
+        # Don't allow updates to zones that are being deleted
+        if domain.action == 'DELETE':
+            raise exceptions.BadRequest('Can not update a deleting zone')
+
+        for recordset in recordsets:
+            # Ensure the domain_id matches the recordset's domain_id
+            if recordset.obj_get_original_value('domain_id') != domain.id:
+                raise exceptions.RecordSetNotFound()
+
+            changes = recordset.obj_get_changes()
+
+            # Ensure immutable fields are not changed
+            if 'tenant_id' in changes:
+                raise exceptions.BadRequest('Moving a recordset between '
+                                            'tenants is not allowed')
+
+            if 'domain_id' in changes:
+                raise exceptions.BadRequest('Moving a recordset between '
+                                            'domains is not allowed')
+
+            if 'type' in changes:
+                raise exceptions.BadRequest('Changing a recordsets type is '
+                                            'not allowed')
+
+            target = {
+                'domain_id': domain_id,
+                'domain_type': domain.type,
+                'recordset_id': recordset.obj_get_original_value('id'),
+                'domain_name': domain.name,
+                'tenant_id': domain.tenant_id
+            }
+
+            policy.check('update_recordset', context, target)
+
+        recordsets, domain = self._update_recordsets_in_storage(
+            context, domain, recordsets, increment_serial=increment_serial)
+
+        self.pool_manager_api.update_domain(context, domain)
+
+        return recordsets
+
+    @transaction
+    def _update_recordsets_in_storage(self, context, domain, recordsets,
+                                      increment_serial=True):
+        if increment_serial:
+            # update the zone's status and increment the serial, once for
+            # the whole batch
+            domain = self._update_domain_in_storage(
+                context, domain, increment_serial)
+
+        updated = objects.RecordSetList()
+
+        for recordset in recordsets:
+            recordset, domain = self._update_recordset_in_storage(
+                context, domain, recordset, increment_serial=False)
+            updated.append(recordset)
+
+        return (updated, domain)
+
+    @notification('dns.recordset.delete')
+    @synchronized_domain()
+    def delete_recordsets(self, context, domain_id, recordset_ids,
+                          increment_serial=True):
+        domain = self.storage.get_domain(context, domain_id)
+
+        # Don't allow updates to zones that are being deleted
+        if domain.action == 'DELETE':
+            raise exceptions.BadRequest('Can not update a deleting zone')
+
+        recordsets = objects.RecordSetList()
+
+        for recordset_id in recordset_ids:
+            recordset = self.storage.get_recordset(context, recordset_id)
+
+            # Ensure the domain_id matches the recordset's domain_id
+            if domain.id != recordset.domain_id:
+                raise exceptions.RecordSetNotFound()
+
+            target = {
+                'domain_id': domain_id,
+                'domain_name': domain.name,
+                'domain_type': domain.type,
+                'recordset_id': recordset.id,
+                'tenant_id': domain.tenant_id
+            }
+
+            policy.check('delete_recordset', context, target)
+
+            recordsets.append(recordset)
+
+        recordsets, domain = self._delete_recordsets_in_storage(
+            context, domain, recordsets, increment_serial=increment_serial)
+
+        self.pool_manager_api.update_domain(context, domain)
+
+        return recordsets
+
+    @transaction
+    def _delete_recordsets_in_storage(self, context, domain, recordsets,
+                                      increment_serial=True):
+        if increment_serial:
+            # update the zone's status and increment the serial, once for
+            # the whole batch
+            domain = self._update_domain_in_storage(
+                context, domain, increment_serial)
+
+        deleted = objects.RecordSetList()
+
+        for recordset in recordsets:
+            recordset, domain = self._delete_recordset_in_storage(
+                context, domain, recordset, increment_serial=False)
+            deleted.append(recordset)
+
+        return (deleted, domain)
+
+    @read_only
     def count_recordsets(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -1390,8 +1878,13 @@ class Service(service.RPCService, service.Service):
         record = self.storage.create_record(context, domain.id, recordset.id,
                                             record)
 
+        self._journal_zone_changes(
+            context, domain, set(),
+            self._get_recordset_rrs(domain, recordset, [record]))
+
         return (record, domain)
 
+    @read_only
     def get_record(self, context, domain_id, recordset_id, record_id):
         domain = self.storage.get_domain(context, domain_id)
         recordset = self.storage.get_recordset(context, recordset_id)
@@ -1418,6 +1911,7 @@ class Service(service.RPCService, service.Service):
 
         return record
 
+    @read_only
     def find_records(self, context, criterion=None, marker=None, limit=None,
                      sort_key=None, sort_dir=None):
         target = {'tenant_id': context.tenant}
@@ -1426,6 +1920,7 @@ class Service(service.RPCService, service.Service):
         return self.storage.find_records(context, criterion, marker, limit,
                                          sort_key, sort_dir)
 
+    @read_only
     def find_record(self, context, criterion=None):
         target = {'tenant_id': context.tenant}
         policy.check('find_record', context, target)
@@ -1488,6 +1983,13 @@ class Service(service.RPCService, service.Service):
             domain = self._update_domain_in_storage(
                 context, domain, increment_serial)
 
+        if self._is_journalled_domain(domain):
+            recordset = self.storage.get_recordset(
+                context, record.recordset_id)
+            old_rrs = self._get_recordset_rrs(
+                domain, recordset,
+                [self.storage.get_record(context, record.id)])
+
         record.action = 'UPDATE'
         record.status = 'PENDING'
         record.serial = domain.serial
@@ -1495,6 +1997,11 @@ class Service(service.RPCService, service.Service):
         # Update the record
         record = self.storage.update_record(context, record)
 
+        if self._is_journalled_domain(domain):
+            self._journal_zone_changes(
+                context, domain, old_rrs,
+                self._get_recordset_rrs(domain, recordset, [record]))
+
         return (record, domain)
 
     @notification('dns.record.delete')
@@ -1546,6 +2053,13 @@ class Service(service.RPCService, service.Service):
             domain = self._update_domain_in_storage(
                 context, domain, increment_serial)
 
+        if self._is_journalled_domain(domain):
+            recordset = self.storage.get_recordset(
+                context, record.recordset_id)
+            self._journal_zone_changes(
+                context, domain,
+                self._get_recordset_rrs(domain, recordset, [record]), set())
+
         record.action = 'DELETE'
         record.status = 'PENDING'
         record.serial = domain.serial
@@ -1554,6 +2068,7 @@ class Service(service.RPCService, service.Service):
 
         return (record, domain)
 
+    @read_only
     def count_records(self, context, criterion=None):
         if criterion is None:
             criterion = {}
@@ -2149,8 +2664,16 @@ class Service(service.RPCService, service.Service):
             # TODO(vinod): Pass a domain to delete_domain rather than id so
             # that the action, status and serial are updated correctly.
             self.storage.delete_domain(context, domain.id)
+            self.domain_index.remove(domain.id)
 
+    @transaction
     def _update_record_status(self, context, domain_id, status, serial):
+        """
+        Moves the records of the domain on to their next status, all at once.
+
+        The transitions match those _update_domain_or_record_status makes
+        for a single record.
+        """
         criterion = {
             'domain_id': domain_id
         }
@@ -2161,43 +2684,35 @@ class Service(service.RPCService, service.Service):
                 'serial': '<=%d' % serial,
             })
 
-        elif status == 'ERROR' and serial == 0:
-            criterion.update({
-                'status': 'PENDING',
-            })
+            criterion['action'] = ['CREATE', 'UPDATE']
+            count = self.storage.update_records_status(
+                context, criterion, {'action': 'NONE', 'status': 'ACTIVE'})
+
+            LOG.debug('Set %d records of domain %s, serial %s: action NONE, '
+                      'status ACTIVE' % (count, domain_id, serial))
+
+            # TODO(Ron): Including this to retain the current logic.
+            # We should NOT be deleting records.  The record status should
+            # be used to indicate the record has been deleted.
+            criterion['action'] = 'DELETE'
+            count = self.storage.purge_records(context, criterion)
+
+            LOG.debug('Deleted %d records of domain %s, serial %s'
+                      % (count, domain_id, serial))
 
         elif status == 'ERROR':
             criterion.update({
                 'status': 'PENDING',
-                'serial': '<=%d' % serial,
             })
 
-        records = self.storage.find_records(context, criterion=criterion)
-
-        for record in records:
-            record, deleted = self._update_domain_or_record_status(
-                record, status, serial)
-
-            if record.obj_what_changed():
-                LOG.debug('Setting record %s, serial %s: action %s, status %s'
-                          % (record.id, record.serial,
-                             record.action, record.status))
-                self.storage.update_record(context, record)
-
-            # TODO(Ron): Including this to retain the current logic.
-            # We should NOT be deleting records.  The record status should
-            # be used to indicate the record has been deleted.
-            if deleted:
-                LOG.debug('Deleting record %s, serial %s: action %s, status %s'
-                          % (record.id, record.serial,
-                             record.action, record.status))
+            if serial != 0:
+                criterion['serial'] = '<=%d' % serial
 
-                self.storage.delete_record(context, record.id)
+            count = self.storage.update_records_status(
+                context, criterion, {'status': 'ERROR'})
 
-                recordset = self.storage.get_recordset(
-                    context, record.recordset_id)
-                if len(recordset.records) == 0:
-                    self.storage.delete_recordset(context, recordset.id)
+            LOG.debug('Set %d records of domain %s, serial %s: status ERROR'
+                      % (count, domain_id, serial))
 
     @staticmethod
     def _update_domain_or_record_status(domain_or_record, status, serial):
@@ -35,7 +35,7 @@ class DesignateContext(context.RequestContext):
                  read_only=False, show_deleted=False, request_id=None,
                  resource_uuid=None, overwrite=True, roles=None,
                  service_catalog=None, all_tenants=False, abandon=None,
-                 tsigkey_id=None, user_identity=None):
+                 tsigkey_id=None, user_identity=None, stale_reads=False):
         # NOTE: user_identity may be passed in, but will be silently dropped as
         #       it is a generated field based on several others.
         super(DesignateContext, self).__init__(
@@ -56,6 +56,10 @@ class DesignateContext(context.RequestContext):
         self.service_catalog = service_catalog
         self.tsigkey_id = tsigkey_id
 
+        # Whether the caller tolerates reads lagging behind recent writes,
+        # which allows them to be served by a replica of the storage
+        self.stale_reads = stale_reads
+
         self.all_tenants = all_tenants
         self.abandon = abandon
 
@@ -89,7 +93,8 @@ class DesignateContext(context.RequestContext):
             'service_catalog': self.service_catalog,
             'all_tenants': self.all_tenants,
             'abandon': self.abandon,
-            'tsigkey_id': self.tsigkey_id
+            'tsigkey_id': self.tsigkey_id,
+            'stale_reads': self.stale_reads
         })
 
         return copy.deepcopy(d)
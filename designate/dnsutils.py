@@ -13,12 +13,22 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+import itertools
 import random
 import socket
-import base64
+import struct
+import time
 
 import dns
 import dns.exception
+import dns.flags
+import dns.message
+import dns.rdataclass
+import dns.rcode
+import dns.rdatatype
+import dns.renderer
+import dns.tsig
 import dns.zone
 import eventlet
 from dns import rdatatype
@@ -35,6 +45,10 @@ from designate.i18n import _LI
 LOG = logging.getLogger(__name__)
 
 
+# Room kept at the end of a streamed message for its TSIG record, which holds
+# the key name, the algorithm name and a MAC of up to 64 bytes.
+TSIG_RESERVED_SIZE = 1024
+
 util_opts = [
     cfg.IntOpt('xfr_timeout', help="Timeout in seconds for XFR's.", default=10)
 ]
@@ -99,6 +113,7 @@ class SerializationMiddleware(DNSMiddleware):
             message.environ = {
                 'context': ctxt,
                 'addr': request['addr'],
+                'protocol': request.get('protocol', 'udp'),
             }
 
         except dns.message.UnknownTSIGKey:
@@ -127,58 +142,234 @@ class SerializationMiddleware(DNSMiddleware):
             response = self.application(message)
 
         # Serialize and return the response if present
-        if response is not None:
+        if response is None:
+            return None
+        elif isinstance(response, dns.message.Message):
             return response.to_wire(max_size=65535)
+        else:
+            # A sequence of responses, which is serialized lazily so that the
+            # first messages can be sent before the last is built.
+            return serialize_stream(response)
+
+
+def build_error_wire(payload, rcode):
+    """
+    Builds an error response to a query from its header alone, without the
+    cost of parsing the rest of the query. Returns None if the payload is
+    too short to be a DNS message.
+    """
+    if not payload or len(payload) < 12:
+        return None
+
+    (query_id, flags) = struct.unpack('!HH', payload[:4])
+
+    # Keep the opcode and RD flag of the query
+    flags = (flags & (dns.flags.RD | 0x7800)) | dns.flags.QR
+    flags |= rcode
+
+    return struct.pack('!HHHHHH', query_id, flags, 0, 0, 0, 0)
+
+
+def build_refused_wire(payload):
+    return build_error_wire(payload, dns.rcode.REFUSED)
+
+
+def build_servfail_wire(payload):
+    return build_error_wire(payload, dns.rcode.SERVFAIL)
+
+
+def _sign_multi_tsig(wire, response, ctx):
+    """
+    Appends a TSIG record to a message of a multi message response, as
+    described in RFC 2845 section 4.4. ctx is None for the first message,
+    and the context returned for the previous message after that.
+    """
+    secret = response.keyring[response.keyname]
+
+    (tsig_rdata, mac, ctx) = dns.tsig.sign(
+        wire, response.keyname, secret, int(time.time()), response.fudge,
+        response.original_id, response.tsig_error, response.other_data,
+        response.request_mac, ctx=ctx, multi=True, first=ctx is None,
+        algorithm=response.keyalgorithm)
+
+    tsig_rr = (response.keyname.to_wire() +
+               struct.pack('!HHIH', dns.rdatatype.TSIG, dns.rdataclass.ANY,
+                           0, len(tsig_rdata)) +
+               tsig_rdata)
+
+    # Bump the ARCOUNT in the header to include the TSIG record
+    (arcount, ) = struct.unpack('!H', wire[10:12])
+    wire = wire[:10] + struct.pack('!H', arcount + 1) + wire[12:] + tsig_rr
+
+    return wire, ctx
+
+
+def serialize_stream(responses, max_size=65535):
+    """
+    Serializes a sequence of DNS responses to the same query, such as an AXFR
+    sent over TCP, yielding the wire format of each message sent.
+
+    The answers of all the responses are packed into as few messages as
+    possible. The header, question and TSIG key of the first response are
+    used for all the messages, with the question only sent in the first, and
+    TSIG signing continued from each message to the next.
+    """
+    responses = iter(responses)
+    first = next(responses, None)
+
+    if first is None:
+        return
+
+    if first.keyname is not None:
+        # Keep room for the TSIG record, which is added once rendered
+        max_size -= TSIG_RESERVED_SIZE
+
+    tsig_ctx = None
+
+    def _renderer(question):
+        renderer = dns.renderer.Renderer(first.id, first.flags, max_size)
+
+        if question:
+            for rrset in first.question:
+                renderer.add_question(rrset.name, rrset.rdtype, rrset.rdclass)
+
+        return renderer
+
+    def _finish(renderer):
+        renderer.write_header()
+        wire = renderer.get_wire()
+
+        if first.keyname is not None:
+            return _sign_multi_tsig(wire, first, tsig_ctx)
+
+        return wire, None
+
+    renderer = _renderer(question=True)
+    count = 0
+
+    for response in itertools.chain([first], responses):
+        for rrset in response.answer:
+            try:
+                renderer.add_rrset(dns.renderer.ANSWER, rrset)
+            except dns.exception.TooBig:
+                if count == 0:
+                    # A single RRset which doesn't fit in a message
+                    raise
+
+                wire, tsig_ctx = _finish(renderer)
+                yield wire
+
+                renderer = _renderer(question=False)
+                renderer.add_rrset(dns.renderer.ANSWER, rrset)
+                count = 0
+
+            count += 1
+
+    wire, tsig_ctx = _finish(renderer)
+    yield wire
+
+
+class TsigKeyCache(object):
+    """
+    In-memory cache of TsigKeys and their decoded secrets, keyed by name.
+
+    Entries, including misses, are kept for ttl seconds, and are dropped
+    early by invalidate() when a key is changed. A ttl of 0 disables caching.
+    """
+    def __init__(self, storage, ttl=60):
+        self.storage = storage
+        self.ttl = ttl
+
+        self._entries = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name):
+        """Returns a tuple of (tsigkey, secret), or (None, None)"""
+        entry = self._entries.get(name)
+
+        if entry is not None and entry[0] > time.time():
+            self.hits += 1
+            return entry[1], entry[2]
+
+        self.misses += 1
+
+        try:
+            tsigkey = self.storage.find_tsigkey(
+                context.get_current(), {'name': name})
+            secret = base64.decodestring(tsigkey.secret)
+
+        except exceptions.TsigKeyNotFound:
+            tsigkey, secret = None, None
+
+        if self.ttl > 0:
+            self._entries[name] = (time.time() + self.ttl, tsigkey, secret)
+
+        return tsigkey, secret
+
+    def invalidate(self, tsigkey=None):
+        """
+        Drops the entries of a TsigKey, both under its current name and any
+        previous name, or all entries if no TsigKey is given.
+        """
+        if tsigkey is None:
+            self._entries.clear()
+            return
+
+        self._entries.pop(tsigkey.name, None)
+
+        for name, entry in self._entries.items():
+            if entry[1] is not None and entry[1].id == tsigkey.id:
+                del self._entries[name]
 
 
 class TsigInfoMiddleware(DNSMiddleware):
     """Middleware which looks up the information available for a TsigKey"""
 
-    def __init__(self, application, storage):
+    def __init__(self, application, tsigkey_cache):
         super(TsigInfoMiddleware, self).__init__(application)
 
-        self.storage = storage
+        self.tsigkey_cache = tsigkey_cache
 
     def process_request(self, request):
         if not request.had_tsig:
             return None
 
-        try:
-            criterion = {'name': request.keyname.to_text(True)}
-            tsigkey = self.storage.find_tsigkey(
-                    context.get_current(), criterion)
-
-            request.environ['tsigkey'] = tsigkey
-            request.environ['context'].tsigkey_id = tsigkey.id
+        tsigkey, secret = self.tsigkey_cache.get(
+            request.keyname.to_text(True))
 
-        except exceptions.TsigKeyNotFound:
+        if tsigkey is None:
             # This should never happen, as we just validated the key.. Except
             # for race conditions..
             return self._build_error_response()
 
+        request.environ['tsigkey'] = tsigkey
+        request.environ['context'].tsigkey_id = tsigkey.id
+
         return None
 
 
 class TsigKeyring(object):
     """Implements the DNSPython KeyRing API, backed by the Designate DB"""
 
-    def __init__(self, storage):
-        self.storage = storage
+    def __init__(self, tsigkey_cache):
+        self.tsigkey_cache = tsigkey_cache
 
     def __getitem__(self, key):
         return self.get(key)
 
     def get(self, key, default=None):
-        try:
-            criterion = {'name': key.to_text(True)}
-            tsigkey = self.storage.find_tsigkey(
-                context.get_current(), criterion)
-
-            return base64.decodestring(tsigkey.secret)
+        tsigkey, secret = self.tsigkey_cache.get(key.to_text(True))
 
-        except exceptions.TsigKeyNotFound:
+        if secret is None:
             return default
 
+        return secret
+
 
 def from_dnspython_zone(dnspython_zone):
     # dnspython never builds a zone with more than one SOA, even if we give
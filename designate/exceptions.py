@@ -66,6 +66,11 @@ class UnknownFailure(Base):
     error_type = 'unknown_failure'
 
 
+class LockLost(Base):
+    error_code = 500
+    error_type = 'lock_lost'
+
+
 class CommunicationFailure(Base):
     error_code = 504
     error_type = 'communication_failure'
@@ -271,6 +276,10 @@ class DuplicateZoneTransferAccept(Duplicate):
     error_type = 'duplicate_zone_transfer_accept'
 
 
+class DuplicateZoneChange(Duplicate):
+    error_type = 'duplicate_zone_change'
+
+
 class NotFound(Base):
     expected = True
     error_code = 404
@@ -341,6 +350,10 @@ class ZoneTransferAcceptNotFound(NotFound):
     error_type = 'zone_transfer_accept_not_found'
 
 
+class ZoneChangeNotFound(NotFound):
+    error_type = 'zone_change_not_found'
+
+
 class LastServerDeleteNotAllowed(BadRequest):
     error_type = 'last_server_delete_not_allowed'
 
@@ -0,0 +1,33 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo.config import cfg
+from oslo_log import log as logging
+
+from designate.lock.base import Lock
+
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.import_opt('lock_driver', 'designate.central',
+                    group='service:central')
+
+
+def get_lock():
+    lock_driver = cfg.CONF['service:central'].lock_driver
+
+    LOG.debug("Loading lock driver: %s" % lock_driver)
+
+    cls = Lock.get_driver(lock_driver)
+
+    return cls()
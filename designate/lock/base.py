@@ -0,0 +1,178 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import abc
+import bisect
+import collections
+import contextlib
+import threading
+import time
+
+import six
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+
+from designate.i18n import _LW
+from designate.plugin import DriverPlugin
+
+
+LOG = logging.getLogger(__name__)
+
+
+# Upper bounds, in seconds, of the lock wait time histogram buckets. Waits
+# longer than the last bound are counted in a final, unbounded, bucket.
+WAIT_TIME_BUCKETS = (0.001, 0.01, 0.1, 1, 10)
+
+# The number of locks statistics are kept for, least recently used first out
+MAX_LOCK_STATS = 1000
+
+
+class LockStats(object):
+    """Per lock acquisition counts and wait time histograms"""
+
+    def __init__(self, max_locks=MAX_LOCK_STATS):
+        self.max_locks = max_locks
+
+        self._stats = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, name, wait_time, contended):
+        with self._lock:
+            stats = self._stats.pop(name, None)
+
+            if stats is None:
+                stats = {
+                    'acquired': 0,
+                    'contended': 0,
+                    'max_wait_time': 0.0,
+                    'wait_time': [0] * (len(WAIT_TIME_BUCKETS) + 1),
+                }
+
+                if len(self._stats) >= self.max_locks:
+                    self._stats.popitem(last=False)
+
+            self._stats[name] = stats
+
+            stats['acquired'] += 1
+            stats['max_wait_time'] = max(stats['max_wait_time'], wait_time)
+            stats['wait_time'][
+                bisect.bisect_left(WAIT_TIME_BUCKETS, wait_time)] += 1
+
+            if contended:
+                stats['contended'] += 1
+
+    def get(self):
+        with self._lock:
+            return dict((name, dict(stats, wait_time=list(stats['wait_time'])))
+                        for name, stats in self._stats.items())
+
+
+@six.add_metaclass(abc.ABCMeta)
+class Lock(DriverPlugin):
+    """
+    Base class for lock plugins
+
+    A lock is first taken within the process, so only a single greenthread
+    per process ever waits on the driver's own, shared, lock.
+    """
+    __plugin_ns__ = 'designate.lock'
+    __plugin_type__ = 'lock'
+
+    def __init__(self):
+        super(Lock, self).__init__()
+
+        self.stats = LockStats()
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        """Hold the named lock for the duration of the block"""
+        start_time = time.time()
+
+        # Try without waiting first, to tell contended acquisitions apart
+        handle = self._acquire(name, blocking=False)
+        contended = handle is None
+
+        if contended:
+            handle = self._acquire(name, blocking=True)
+
+        self.stats.record(name, time.time() - start_time, contended)
+
+        failed = True
+
+        try:
+            yield
+            failed = False
+        finally:
+            if not failed:
+                self._release(name, handle)
+            else:
+                # Don't let a failure to release hide the exception in flight
+                try:
+                    self._release(name, handle)
+                except Exception:
+                    LOG.warn(_LW('Failed to release lock %s'), name,
+                             exc_info=True)
+
+    def check(self, name):
+        """
+        Raise LockLost should the named lock, held by the caller, no longer
+        be held for certain. The changes made under a lock are checked
+        before being committed.
+        """
+
+    def get_stats(self):
+        """
+        Return the acquisition statistics of the most recently used locks
+
+        For each lock name, the number of times it was acquired, how many of
+        those had to wait, the longest wait, and a histogram of the wait
+        times with the buckets bounded by WAIT_TIME_BUCKETS.
+        """
+        return self.stats.get()
+
+    def _acquire(self, name, blocking):
+        semaphore = lockutils.internal_lock(name)
+
+        if not semaphore.acquire(blocking):
+            return None
+
+        try:
+            handle = self._acquire_shared(name, blocking)
+        except Exception:
+            semaphore.release()
+            raise
+
+        if handle is None:
+            semaphore.release()
+            return None
+
+        return semaphore, handle
+
+    def _release(self, name, handle):
+        semaphore, handle = handle
+
+        try:
+            self._release_shared(name, handle)
+        finally:
+            semaphore.release()
+
+    @abc.abstractmethod
+    def _acquire_shared(self, name, blocking):
+        """
+        Take the lock shared with other processes, returning a handle to
+        release it with, or None when not blocking and the lock is held.
+        """
+
+    @abc.abstractmethod
+    def _release_shared(self, name, handle):
+        """Release the lock shared with other processes"""
@@ -0,0 +1,66 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import errno
+import fcntl
+import os
+import time
+
+from oslo.config import cfg
+from oslo_concurrency import lockutils
+
+from designate import exceptions
+from designate.lock import base
+
+
+class FileLock(base.Lock):
+    """Serializes across the processes of a host, using lock files"""
+    __plugin_name__ = 'file'
+
+    def __init__(self):
+        super(FileLock, self).__init__()
+
+        self.lock_path = lockutils.get_lock_path(cfg.CONF)
+
+        if not self.lock_path:
+            raise exceptions.ConfigurationError(
+                'The file lock driver requires [oslo_concurrency] lock_path')
+
+    def _acquire_shared(self, name, blocking):
+        lock_file = open(
+            os.path.join(self.lock_path, 'designate-%s' % name), 'a')
+
+        try:
+            while True:
+                try:
+                    fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return lock_file
+                except IOError as e:
+                    if e.errno not in (errno.EACCES, errno.EAGAIN):
+                        raise
+
+                if not blocking:
+                    lock_file.close()
+                    return None
+
+                # NOTE: A blocking lockf() would stall every greenthread
+                time.sleep(cfg.CONF['service:central'].lock_poll_interval)
+        except Exception:
+            lock_file.close()
+            raise
+
+    def _release_shared(self, name, handle):
+        try:
+            fcntl.lockf(handle, fcntl.LOCK_UN)
+        finally:
+            handle.close()
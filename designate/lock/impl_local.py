@@ -0,0 +1,25 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from designate.lock import base
+
+
+class LocalLock(base.Lock):
+    """Serializes within the current process only"""
+    __plugin_name__ = 'local'
+
+    def _acquire_shared(self, name, blocking):
+        return True
+
+    def _release_shared(self, name, handle):
+        pass
@@ -0,0 +1,132 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import time
+
+import eventlet
+from oslo.config import cfg
+from oslo_log import log as logging
+
+from designate import context
+from designate import exceptions
+from designate import storage
+from designate import utils
+from designate.i18n import _LE
+from designate.i18n import _LW
+from designate.lock import base
+
+
+LOG = logging.getLogger(__name__)
+
+
+class StorageLock(base.Lock):
+    """
+    Serializes across every host sharing the storage, using leases
+
+    The lease is renewed every third of lock_lease_time for as long as the
+    lock is held, so a lease which isn't renewed, say as its holder died,
+    may be taken over once lock_lease_time seconds have passed. Lease times
+    are kept by the database's clock.
+
+    A lease found lost by its renewal, or not renewed for lock_lease_time,
+    makes check() raise LockLost, so the changes made under the lock can be
+    rolled back rather than committed.
+    """
+    __plugin_name__ = 'storage'
+
+    def __init__(self):
+        super(StorageLock, self).__init__()
+
+        # NOTE: A storage connection of our own keeps the leases out of any
+        #       transaction open on the caller's connection, so they're
+        #       visible to other hosts as soon as they're taken.
+        storage_driver = cfg.CONF['service:central'].storage_driver
+        self.storage = storage.get_storage(storage_driver)
+
+        self.context = context.DesignateContext.get_admin_context(
+            all_tenants=True)
+
+        # The lease of each lock held, by name: its holder, the thread
+        # renewing it, and when it was last renewed, or None once lost
+        self._leases = {}
+
+    def check(self, name):
+        lease = self._leases.get(name)
+
+        if lease is None:
+            return
+
+        # NOTE: The time is measured from before the lease was last taken or
+        #       renewed, by the local clock, so a lease is given up on no
+        #       later than the database would let it be taken over.
+        renewed_at = lease['renewed_at']
+        lease_time = cfg.CONF['service:central'].lock_lease_time
+
+        if renewed_at is None or time.time() - renewed_at >= lease_time:
+            raise exceptions.LockLost(
+                'The lease on lock %s was lost while it was held' % name)
+
+    def _acquire_shared(self, name, blocking):
+        holder = utils.generate_uuid()
+        lease_time = cfg.CONF['service:central'].lock_lease_time
+
+        while True:
+            acquired_at = time.time()
+
+            if self.storage.acquire_lock(
+                    self.context, name, holder, lease_time):
+                break
+
+            if not blocking:
+                return None
+
+            time.sleep(cfg.CONF['service:central'].lock_poll_interval)
+
+        lease = {'holder': holder, 'renewed_at': acquired_at}
+        lease['heartbeat'] = eventlet.spawn(
+            self._heartbeat, name, lease, lease_time)
+
+        self._leases[name] = lease
+
+        return holder
+
+    def _heartbeat(self, name, lease, lease_time):
+        while True:
+            eventlet.sleep(lease_time / 3.0)
+
+            renewed_at = time.time()
+
+            try:
+                renewed = self.storage.renew_lock(
+                    self.context, name, lease['holder'], lease_time)
+            except Exception:
+                LOG.warn(_LW('Failed to renew the lease on lock %s, '
+                             'retrying'), name, exc_info=True)
+                continue
+
+            if not renewed:
+                LOG.error(_LE('The lease on lock %s was lost while it was '
+                              'held'), name)
+                lease['renewed_at'] = None
+                return
+
+            lease['renewed_at'] = renewed_at
+
+    def _release_shared(self, name, handle):
+        self._leases.pop(name)['heartbeat'].kill()
+
+        if not self.storage.release_lock(self.context, name, handle):
+            # The changes made under the lock were checked to hold it before
+            # being committed, so all there's left to do is tell
+            LOG.error(_LE('The lease on lock %s was lost before it was '
+                          'released'), name)
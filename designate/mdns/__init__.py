@@ -33,6 +33,26 @@ OPTS = [
                help='mDNS TCP Backlog'),
     cfg.FloatOpt('tcp-recv-timeout', default=0.5,
                  help='mDNS TCP Receive Timeout'),
+    cfg.FloatOpt('tcp-idle-timeout', default=10.0,
+                 help='Seconds a TCP connection may be idle between queries '
+                      'before it is closed'),
+    cfg.IntOpt('tcp-max-connections', default=500,
+               help='Maximum number of open TCP connections, beyond which the '
+                    'longest idle connection is closed, or new connections '
+                    'refused when none are idle'),
+    cfg.IntOpt('udp-recv-size', default=8192,
+               help='Maximum size of the UDP packets received'),
+    cfg.IntOpt('query-workers', default=50,
+               help='Number of threads handling queries for each of TCP and '
+                    'UDP'),
+    cfg.IntOpt('query-queue-size', default=1000,
+               help='Maximum number of queries waiting for a worker for each '
+                    'of TCP and UDP, further UDP queries are dropped and TCP '
+                    'queries are REFUSED'),
+    cfg.IntOpt('query-stats-interval', default=60,
+               help='Seconds between logging the depth of the TCP and UDP '
+                    'query queues of each listening interface, and the '
+                    'queries they handled and dropped, 0 to disable'),
     cfg.BoolOpt('all-tcp', default=False,
                 help='Send all traffic over TCP'),
     cfg.BoolOpt('query-enforce-tsig', default=False,
@@ -40,6 +60,17 @@ OPTS = [
                      'signed'),
     cfg.StrOpt('storage-driver', default='sqlalchemy',
                help='The storage driver to use'),
+    cfg.IntOpt('zone-cache-size', default=100,
+               help='Maximum number of rendered zones to keep in memory for '
+                    'answering AXFRs and queries, 0 to disable the cache'),
+    cfg.IntOpt('zone-cache-max-rrsets', default=200000,
+               help='Maximum total number of RRsets held in the zone cache'),
+    cfg.IntOpt('axfr-page-size', default=1000,
+               help='Number of recordsets read from storage at a time when '
+                    'streaming an AXFR over TCP'),
+    cfg.IntOpt('tsig-key-cache-ttl', default=60,
+               help='Seconds TSIG keys are cached in memory for verifying '
+                    'signed queries, 0 to disable the cache'),
 ]
 
 cfg.CONF.register_opts(OPTS, group='service:mdns')
@@ -30,9 +30,10 @@ class BaseEndpoint(object):
     RPC_API_NAMESPACE = None
     RPC_API_VERSION = None
 
-    def __init__(self, tg):
+    def __init__(self, tg, zone_cache=None):
         LOG.info(_LI("Initialized mDNS %s endpoint"), self.RPC_API_NAMESPACE)
         self.tg = tg
+        self.zone_cache = zone_cache
         self.target = messaging.Target(
             namespace=self.RPC_API_NAMESPACE,
             version=self.RPC_API_VERSION)
@@ -0,0 +1,174 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+
+import dns.rdatatype
+from oslo.config import cfg
+from oslo_log import log as logging
+
+
+LOG = logging.getLogger(__name__)
+CONF = cfg.CONF
+
+
+class ZoneSnapshot(object):
+    """
+    A rendered, read-only copy of a zone at a given serial.
+
+    The dnspython RRsets held here are shared between all the responses built
+    from the snapshot, and must never be modified.
+    """
+    def __init__(self, domain_id, name, serial, soa_rrsets, rrsets):
+        self.domain_id = domain_id
+        self.name = name
+        self.serial = serial
+        self.soa_rrsets = soa_rrsets
+        self.rrsets = rrsets
+
+        self._index = {}
+        for rrset in soa_rrsets + rrsets:
+            key = (rrset.name.to_text().lower(), rrset.rdtype)
+            self._index[key] = rrset
+
+    def __len__(self):
+        return len(self.soa_rrsets) + len(self.rrsets)
+
+    def axfr_rrsets(self):
+        """Returns the RRsets of an AXFR, beginning and ending with the SOA"""
+        return self.soa_rrsets + self.rrsets + self.soa_rrsets
+
+    def find_rrset(self, name, rdtype):
+        """Returns the RRset with the given name and type, or None"""
+        if isinstance(rdtype, basestring):
+            rdtype = dns.rdatatype.from_text(rdtype)
+
+        return self._index.get((name.lower(), rdtype))
+
+
+class ZoneCache(object):
+    """
+    LRU cache of ZoneSnapshots, keyed by (domain_id, serial).
+
+    Only the latest serial of a zone is kept: storing a snapshot evicts any
+    older snapshot of the same zone, and a lookup with any other serial is a
+    miss. This makes serial bumps invalidate the cache without any help from
+    other services, while invalidate() allows stale snapshots to be dropped
+    early, e.g. when pool manager tells us about a new serial.
+
+    Memory use is bounded both by the number of zones and by the total number
+    of RRsets held.
+    """
+    def __init__(self, max_zones=None, max_rrsets=None):
+        if max_zones is None:
+            max_zones = CONF['service:mdns'].zone_cache_size
+
+        if max_rrsets is None:
+            max_rrsets = CONF['service:mdns'].zone_cache_max_rrsets
+
+        self.max_zones = max_zones
+        self.max_rrsets = max_rrsets
+
+        self._snapshots = collections.OrderedDict()
+        self._names = {}
+        self._rrset_count = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_zones > 0
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __contains__(self, domain_id):
+        return domain_id in self._snapshots
+
+    def get(self, domain_id, serial):
+        """Returns the snapshot of a zone at a serial, or None"""
+        snapshot = self._snapshots.get(domain_id)
+
+        if snapshot is None or snapshot.serial != serial:
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        del self._snapshots[domain_id]
+        self._snapshots[domain_id] = snapshot
+
+        self.hits += 1
+        return snapshot
+
+    def put(self, snapshot):
+        """Stores a snapshot, replacing any snapshot of the same zone"""
+        if not self.enabled:
+            return
+
+        if len(snapshot) > self.max_rrsets:
+            LOG.debug("Not caching zone %(name)s, %(count)d RRsets exceed the "
+                      "cache size", {'name': snapshot.name,
+                                     'count': len(snapshot)})
+            self.invalidate(snapshot.domain_id)
+            return
+
+        self.invalidate(snapshot.domain_id)
+
+        self._snapshots[snapshot.domain_id] = snapshot
+        self._names[snapshot.name.lower()] = snapshot.domain_id
+        self._rrset_count += len(snapshot)
+
+        while (len(self._snapshots) > self.max_zones or
+               self._rrset_count > self.max_rrsets):
+            self._remove(next(iter(self._snapshots)))
+
+    def invalidate(self, domain_id, serial=None):
+        """
+        Drops the cached snapshot of a zone.
+
+        If serial is given, the snapshot is only dropped if it was rendered
+        at a different serial.
+        """
+        snapshot = self._snapshots.get(domain_id)
+
+        if snapshot is not None and snapshot.serial != serial:
+            self._remove(domain_id)
+
+    def clear(self):
+        self._snapshots.clear()
+        self._names.clear()
+        self._rrset_count = 0
+
+    def find_domain_ids(self, name):
+        """
+        Returns the ids of cached zones which may contain the given name,
+        most specific zone first.
+        """
+        labels = name.lower().rstrip('.').split('.')
+        domain_ids = []
+
+        for i in range(len(labels)):
+            domain_id = self._names.get('.'.join(labels[i:]) + '.')
+
+            if domain_id is not None:
+                domain_ids.append(domain_id)
+
+        return domain_ids
+
+    def _remove(self, domain_id):
+        snapshot = self._snapshots.pop(domain_id)
+        self._rrset_count -= len(snapshot)
+
+        if self._names.get(snapshot.name.lower()) == domain_id:
+            del self._names[snapshot.name.lower()]
@@ -13,6 +13,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
+
 import dns
 import dns.flags
 import dns.opcode
@@ -24,6 +26,7 @@ from oslo.config import cfg
 from oslo_log import log as logging
 
 from designate import exceptions
+from designate.mdns import cache
 from designate.mdns import xfr
 from designate.central import rpcapi as central_api
 from designate.i18n import _LI
@@ -39,11 +42,16 @@ CONF.import_opt('default_pool_id', 'designate.central',
 
 class RequestHandler(xfr.XFRMixin):
 
-    def __init__(self, storage, tg):
+    def __init__(self, storage, tg, zone_cache=None):
         # Get a storage connection
         self.storage = storage
         self.tg = tg
 
+        if zone_cache is None:
+            zone_cache = cache.ZoneCache()
+
+        self.zone_cache = zone_cache
+
     @property
     def central_api(self):
         return central_api.CentralAPI.get_instance()
@@ -61,14 +69,19 @@ class RequestHandler(xfr.XFRMixin):
                 return self._handle_query_error(request, dns.rcode.REFUSED)
 
             q_rrset = request.question[0]
-            # Handle AXFR and IXFR requests with an AXFR responses for now.
-            # It is permissible for a server to send an AXFR response when
-            # receiving an IXFR request.
-            # TODO(Ron): send IXFR response when receiving IXFR request.
-            if q_rrset.rdtype in (dns.rdatatype.AXFR, dns.rdatatype.IXFR):
+            if q_rrset.rdtype == dns.rdatatype.AXFR:
                 response = self._handle_axfr(request)
-            else:
+            elif q_rrset.rdtype == dns.rdatatype.IXFR:
+                response = self._handle_ixfr(request)
+            elif q_rrset.rdtype == dns.rdatatype.SOA:
+                # NOTE: Zone transfers and SOA queries stay on the primary.
+                #       Backends compare the SOA serial to decide whether to
+                #       transfer a zone, a lagging replica could have them
+                #       miss the latest changes.
                 response = self._handle_record_query(request)
+            else:
+                with self.storage.replica_reads(request.environ['context']):
+                    response = self._handle_record_query(request)
         elif request.opcode() == dns.opcode.NOTIFY:
             response = self._handle_notify(request)
         else:
@@ -207,6 +220,38 @@ class RequestHandler(xfr.XFRMixin):
 
         return r_rrset
 
+    def _build_zone_snapshot(self, context, domain):
+        soa_rrsets = []
+        rrsets = []
+
+        # Fetch every recordset in one go, the SOA is split out as an AXFR
+        # response needs to have it at the beginning and end.
+        criterion = {'domain_id': domain.id}
+        recordsets = self.storage.find_recordsets(context, criterion)
+
+        for recordset in recordsets:
+            r_rrset = self._convert_to_rrset(domain, recordset)
+
+            if r_rrset is None:
+                continue
+            elif recordset.type == 'SOA':
+                soa_rrsets.append(r_rrset)
+            else:
+                rrsets.append(r_rrset)
+
+        return cache.ZoneSnapshot(
+            domain.id, domain.name, domain.serial, soa_rrsets, rrsets)
+
+    def _get_zone_snapshot(self, context, domain):
+        """Returns the rendered zone, from the cache when possible"""
+        snapshot = self.zone_cache.get(domain.id, domain.serial)
+
+        if snapshot is None:
+            snapshot = self._build_zone_snapshot(context, domain)
+            self.zone_cache.put(snapshot)
+
+        return snapshot
+
     def _handle_axfr(self, request):
         context = request.environ['context']
 
@@ -232,32 +277,292 @@ class RequestHandler(xfr.XFRMixin):
 
             return self._handle_query_error(request, dns.rcode.REFUSED)
 
-        r_rrsets = []
+        # Over TCP the zone is sent as a stream of messages, rather than
+        # being built up in memory as a single response.
+        if request.environ.get('protocol') == 'tcp':
+            return self._stream_axfr(request, domain)
+
+        snapshot = self._get_zone_snapshot(context, domain)
 
-        # The AXFR response needs to have a SOA at the beginning and end.
-        criterion = {'domain_id': domain.id, 'type': 'SOA'}
-        soa_recordsets = self.storage.find_recordsets(context, criterion)
+        response.set_rcode(dns.rcode.NOERROR)
+        # TODO(vinod) check if we dnspython has an upper limit on the number
+        # of rrsets.
+        response.answer = snapshot.axfr_rrsets()
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
 
-        for recordset in soa_recordsets:
-            r_rrsets.append(self._convert_to_rrset(domain, recordset))
+        return response
 
-        # Get all the recordsets other than SOA
-        criterion = {'domain_id': domain.id, 'type': '!SOA'}
-        recordsets = self.storage.find_recordsets(context, criterion)
+    def _iter_zone_rrsets(self, context, domain):
+        """
+        Yields lists of the RRsets of a zone, in AXFR order, as pages of
+        recordsets are read from storage.
 
-        for recordset in recordsets:
-            r_rrset = self._convert_to_rrset(domain, recordset)
-            if r_rrset:
-                r_rrsets.append(r_rrset)
+        When the whole zone fits in the zone cache, it is cached once the
+        last page has been read, unless the domain changed while the pages
+        were read and they may mix recordsets from different serials.
+        """
+        page_size = CONF['service:mdns'].axfr_page_size
+
+        soa_recordset = self.storage.find_recordset(
+            context, {'domain_id': domain.id, 'type': 'SOA'})
+        soa_rrsets = [self._convert_to_rrset(domain, soa_recordset)]
+
+        yield soa_rrsets
+
+        cached_rrsets = [] if self.zone_cache.enabled else None
+        # Paging on to the end, so there's no need for a total count
+        criterion = {'domain_id': domain.id, 'type': '!SOA',
+                     'total_count': 'none'}
+        marker = None
+
+        while True:
+            recordsets = self.storage.find_recordsets(
+                context, dict(criterion), marker=marker, limit=page_size)
+
+            rrsets = []
+            for recordset in recordsets:
+                r_rrset = self._convert_to_rrset(domain, recordset)
+
+                if r_rrset is not None:
+                    rrsets.append(r_rrset)
+
+            if cached_rrsets is not None:
+                cached_rrsets.extend(rrsets)
+
+                if len(cached_rrsets) >= self.zone_cache.max_rrsets:
+                    cached_rrsets = None
+
+            if rrsets:
+                yield rrsets
+
+            if len(recordsets) < page_size:
+                break
+
+            marker = recordsets[-1].id
+
+        yield soa_rrsets
+
+        if cached_rrsets is not None and self._is_serial_current(
+                context, domain):
+            self.zone_cache.put(cache.ZoneSnapshot(
+                domain.id, domain.name, domain.serial, soa_rrsets,
+                cached_rrsets))
+
+    def _is_serial_current(self, context, domain):
+        """
+        Returns whether the domain is still at the serial it was read at
+        """
+        try:
+            serial = self.storage.get_domain(context, domain.id).serial
+        except exceptions.DomainNotFound:
+            serial = None
+
+        if serial != domain.serial:
+            LOG.warning(_LW("Domain %(domain_id)s changed from serial "
+                            "%(serial)s while it was being transferred, "
+                            "not caching it") %
+                        {'domain_id': domain.id, 'serial': domain.serial})
+            return False
+
+        return True
+
+    def _stream_axfr(self, request, domain):
+        """
+        Yields the responses making up an AXFR, each holding a part of the
+        zone. These are packed into as few DNS messages as possible when
+        serialized.
+        """
+        context = request.environ['context']
+
+        snapshot = self.zone_cache.get(domain.id, domain.serial)
+
+        if snapshot is not None:
+            pages = [snapshot.axfr_rrsets()]
+        else:
+            pages = self._iter_zone_rrsets(context, domain)
+
+        for rrsets in pages:
+            response = dns.message.make_response(request)
+            response.set_rcode(dns.rcode.NOERROR)
+            response.answer = rrsets
+            # For all the data stored in designate mdns is Authoritative
+            response.flags |= dns.flags.AA
+
+            yield response
+
+    def _build_change_rrsets(self, zone_changes):
+        """Groups journalled changes into RRsets, one per name and type"""
+        rdatas = collections.OrderedDict()
+
+        for zone_change in zone_changes:
+            key = (zone_change.name, zone_change.type, zone_change.ttl)
+            rdatas.setdefault(key, []).append(str(zone_change.data))
+
+        return [dns.rrset.from_text_list(name, ttl, dns.rdataclass.IN,
+                                         type_, rdata)
+                for (name, type_, ttl), rdata in rdatas.items()]
+
+    def _build_ixfr_sequences(self, context, domain, serial):
+        """
+        Builds the difference sequences of an IXFR, from serial to the
+        current serial of the domain, as described in RFC 1995.
+
+        Returns None when the journal doesn't hold every change since serial,
+        e.g. when serial has aged out of the journal.
+        """
+        criterion = {'domain_id': domain.id, 'serial': '>%d' % serial}
+        zone_changes = self.storage.find_zone_changes(
+            context, criterion, sort_key='serial')
+
+        # Group the changes by serial, and split out the SOAs which mark the
+        # serials each difference sequence is between.
+        steps = collections.OrderedDict()
+
+        for zone_change in zone_changes:
+            step = steps.setdefault(zone_change.serial, {
+                'DELETE': [], 'ADD': [], 'SOA-DELETE': [], 'SOA-ADD': []})
+
+            if zone_change.type == 'SOA':
+                step['SOA-' + zone_change.action].append(zone_change)
+            else:
+                step[zone_change.action].append(zone_change)
 
-        # Append the SOA recordset at the end
-        for recordset in soa_recordsets:
-            r_rrsets.append(self._convert_to_rrset(domain, recordset))
+        sequences = []
+        from_serial = serial
 
+        for to_serial, step in steps.items():
+            if len(step['SOA-DELETE']) != 1 or len(step['SOA-ADD']) != 1:
+                return None
+
+            old_soa = self._build_change_rrsets(step['SOA-DELETE'])[0]
+            new_soa = self._build_change_rrsets(step['SOA-ADD'])[0]
+
+            if (old_soa[0].serial != from_serial or
+                    new_soa[0].serial != to_serial):
+                return None
+
+            sequences.append(old_soa)
+            sequences.extend(self._build_change_rrsets(step['DELETE']))
+            sequences.append(new_soa)
+            sequences.extend(self._build_change_rrsets(step['ADD']))
+
+            from_serial = to_serial
+
+        if from_serial != domain.serial:
+            return None
+
+        return sequences
+
+    def _handle_ixfr(self, request):
+        """
+        Answers an IXFR request with the changes since the serial of the SOA
+        in the authority section, or with an AXFR when that isn't possible.
+        """
+        context = request.environ['context']
+        q_rrset = request.question[0]
+
+        # The client's current SOA is required to know what to send
+        soa_rrsets = [rrset for rrset in request.authority
+                      if rrset.rdtype == dns.rdatatype.SOA]
+
+        if len(soa_rrsets) != 1 or len(soa_rrsets[0]) != 1:
+            return self._handle_axfr(request)
+
+        serial = soa_rrsets[0][0].serial
+
+        try:
+            criterion = self._domain_criterion_from_request(
+                request, {'name': q_rrset.name.to_text()})
+            domain = self.storage.find_domain(context, criterion)
+
+        except exceptions.DomainNotFound:
+            LOG.warning(_LW("DomainNotFound while handling ixfr request. "
+                            "Question was %(qr)s") % {'qr': q_rrset})
+
+            return self._handle_query_error(request, dns.rcode.REFUSED)
+
+        except exceptions.Forbidden:
+            LOG.warning(_LW("Forbidden while handling ixfr request. "
+                            "Question was %(qr)s") % {'qr': q_rrset})
+
+            return self._handle_query_error(request, dns.rcode.REFUSED)
+
+        if domain.type != 'PRIMARY' or serial > domain.serial:
+            return self._handle_axfr(request)
+
+        if serial == domain.serial:
+            sequences = []
+        else:
+            sequences = self._build_ixfr_sequences(context, domain, serial)
+
+        if sequences is None:
+            LOG.debug("Changes to %(name)s since serial %(serial)d are not "
+                      "journalled, answering IXFR with AXFR",
+                      {'name': domain.name, 'serial': serial})
+            return self._handle_axfr(request)
+
+        soa_recordset = self.storage.find_recordset(
+            context, {'domain_id': domain.id, 'type': 'SOA'})
+        soa_rrset = self._convert_to_rrset(domain, soa_recordset)
+
+        response = dns.message.make_response(request)
         response.set_rcode(dns.rcode.NOERROR)
-        # TODO(vinod) check if we dnspython has an upper limit on the number
-        # of rrsets.
-        response.answer = r_rrsets
+
+        # A client which is up to date is sent the current SOA alone.
+        if sequences:
+            response.answer = [soa_rrset] + sequences + [soa_rrset]
+        else:
+            response.answer = [soa_rrset]
+
+        # For all the data stored in designate mdns is Authoritative
+        response.flags |= dns.flags.AA
+
+        return response
+
+    def _handle_cached_record_query(self, request):
+        """
+        Attempt to answer a DNS QUERY request from the zone cache.
+
+        This returns None whenever the answer can not be found in a current
+        snapshot, in which case the query should be answered from storage.
+        """
+        context = request.environ['context']
+        q_rrset = request.question[0]
+        name = q_rrset.name.to_text()
+
+        domain_ids = self.zone_cache.find_domain_ids(name)
+
+        if not domain_ids:
+            return None
+
+        # Records can't be placed in the namespace of a child zone, so only
+        # the most specific zone has to be checked.
+        try:
+            criterion = self._domain_criterion_from_request(
+                request, {'id': domain_ids[0]})
+            domain = self.storage.find_domain(context, criterion)
+
+        except exceptions.DomainNotFound:
+            self.zone_cache.invalidate(domain_ids[0])
+            return None
+
+        except exceptions.Forbidden:
+            return None
+
+        snapshot = self.zone_cache.get(domain.id, domain.serial)
+
+        if snapshot is None:
+            return None
+
+        r_rrset = snapshot.find_rrset(name, q_rrset.rdtype)
+
+        if r_rrset is None:
+            return None
+
+        response = dns.message.make_response(request)
+        response.set_rcode(dns.rcode.NOERROR)
+        response.answer = [r_rrset]
         # For all the data stored in designate mdns is Authoritative
         response.flags |= dns.flags.AA
 
@@ -265,6 +570,11 @@ class RequestHandler(xfr.XFRMixin):
 
     def _handle_record_query(self, request):
         """Handle a DNS QUERY request for a record"""
+        response = self._handle_cached_record_query(request)
+
+        if response is not None:
+            return response
+
         context = request.environ['context']
         response = dns.message.make_response(request)
 
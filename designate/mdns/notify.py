@@ -40,6 +40,10 @@ class NotifyEndpoint(base.BaseEndpoint):
     RPC_API_VERSION = '1.1'
     RPC_API_NAMESPACE = 'notify'
 
+    def __init__(self, tg, zone_cache=None, serial_poller=None):
+        super(NotifyEndpoint, self).__init__(tg, zone_cache)
+        self.serial_poller = serial_poller
+
     def notify_zone_changed(self, context, domain, nameserver, timeout,
                             retry_interval, max_retries, delay):
         """
@@ -58,6 +62,11 @@ class NotifyEndpoint(base.BaseEndpoint):
             current_retry is the current retry number.
             The return value is just used for testing and not by pool manager.
         """
+        # The zone is about to be transferred at its new serial, drop any
+        # older rendering of it.
+        if self.zone_cache is not None:
+            self.zone_cache.invalidate(domain.id, domain.serial)
+
         time.sleep(delay)
         return self._make_and_send_dns_message(
             domain, nameserver, timeout, retry_interval, max_retries,
@@ -80,11 +89,22 @@ class NotifyEndpoint(base.BaseEndpoint):
         :param delay: The time to wait before sending the first request.
         :return: The pool manager is informed of the status with update_status.
         """
-        (status, actual_serial, retries) = self.get_serial_number(
+        def _update_status(status, actual_serial, retries):
+            self.pool_manager_api.update_status(
+                context, domain, nameserver, status, actual_serial)
+
+        # Polls over UDP are handed to the serial poller, rather than holding
+        # on to this RPC worker while waiting and retrying.
+        if self.serial_poller is not None and \
+                not CONF['service:mdns'].all_tcp:
+            self.serial_poller.poll(
+                self._make_dns_message(domain.name), domain, nameserver,
+                timeout, retry_interval, max_retries, delay, _update_status)
+            return
+
+        _update_status(*self.get_serial_number(
             context, domain, nameserver, timeout, retry_interval, max_retries,
-            delay)
-        self.pool_manager_api.update_status(
-            context, domain, nameserver, status, actual_serial)
+            delay))
 
     def get_serial_number(self, context, domain, nameserver, timeout,
                           retry_interval, max_retries, delay):
@@ -0,0 +1,289 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import heapq
+import itertools
+import random
+import socket
+import time
+
+import dns.exception
+import dns.flags
+import dns.inet
+import dns.message
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import eventlet
+import eventlet.queue
+from oslo_log import log as logging
+
+from designate.i18n import _LE
+from designate.i18n import _LI
+from designate.i18n import _LW
+
+LOG = logging.getLogger(__name__)
+
+
+class SerialPoll(object):
+    """The state of one SOA serial check of a zone on a nameserver"""
+    def __init__(self, message, domain, nameserver, timeout, retry_interval,
+                 max_retries, callback):
+        self.message = message
+        self.domain = domain
+        self.nameserver = nameserver
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.retries = max_retries
+        self.callback = callback
+
+        self.status = 'ERROR'
+        self.actual_serial = None
+
+        # Incremented for every query sent, so that the expiry of an earlier
+        # query is told apart from the current one.
+        self.attempt = 0
+
+    @property
+    def destination(self):
+        return (self.nameserver.host, int(self.nameserver.port))
+
+
+class SerialPoller(object):
+    """
+    Polls nameservers for the SOA serial of zones without a thread per poll.
+
+    Polls are kept in a heap ordered by when they next need attention, either
+    to send a query or to give up waiting for its response. A single
+    scheduler thread works through the heap, while the queries of all polls
+    share one UDP socket per address family, whose receiver thread matches
+    responses to polls by query ID.
+    """
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._wakeup = eventlet.queue.LightQueue()
+
+        self._polls = set()
+        self._pending = {}
+        self._sockets = {}
+
+        self._tg = None
+
+    def __len__(self):
+        """Returns the number of polls which are not finished"""
+        return len(self._polls)
+
+    def start(self, tg):
+        self._tg = tg
+        self._tg.add_thread(self._schedule)
+
+    def stop(self):
+        for sock in self._sockets.values():
+            sock.close()
+
+        self._sockets.clear()
+
+    def poll(self, message, domain, nameserver, timeout, retry_interval,
+             max_retries, delay, callback):
+        """
+        Starts polling a nameserver until it serves domain.serial or newer.
+
+        :param message: The SOA query to send.
+        :param delay: The time to wait before sending the first query.
+        :param callback: Called with (status, actual_serial, retries) once
+            the poll is finished, status being either "SUCCESS", "ERROR" or
+            "NO_DOMAIN".
+        """
+        poll = SerialPoll(message, domain, nameserver, timeout,
+                          retry_interval, max_retries, callback)
+
+        self._polls.add(poll)
+        self._push(time.time() + delay, self._send, poll)
+
+        return poll
+
+    def _push(self, when, action, poll, *args):
+        heapq.heappush(
+            self._heap, (when, next(self._sequence), action, poll, args))
+
+        # Wake the scheduler, in case this is now the earliest entry
+        self._wakeup.put(None)
+
+    def _schedule(self):
+        while True:
+            now = time.time()
+
+            while self._heap and self._heap[0][0] <= now:
+                when, _, action, poll, args = heapq.heappop(self._heap)
+
+                try:
+                    action(poll, *args)
+                except Exception:
+                    LOG.exception(_LE("Failed polling '%(zone)s' on "
+                                      "'%(host)s:%(port)s'") %
+                                  {'zone': poll.domain.name,
+                                   'host': poll.nameserver.host,
+                                   'port': poll.nameserver.port})
+                    self._finish(poll)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+
+            try:
+                self._wakeup.get(timeout=timeout)
+            except eventlet.queue.Empty:
+                pass
+
+    def _get_socket(self, host):
+        family = dns.inet.af_for_address(host)
+
+        if family not in self._sockets:
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            sock.bind(('::' if family == socket.AF_INET6 else '0.0.0.0', 0))
+
+            self._sockets[family] = sock
+            self._tg.add_thread(self._receive, sock)
+
+        return self._sockets[family]
+
+    def _new_query_id(self):
+        while True:
+            query_id = random.randint(0, 65535)
+
+            if query_id not in self._pending:
+                return query_id
+
+    def _send(self, poll):
+        poll.attempt += 1
+        poll.message.id = self._new_query_id()
+
+        LOG.info(_LI("Sending 'SOA' for '%(zone)s' to '%(server)s:"
+                     "%(port)s'.") %
+                 {'zone': poll.domain.name, 'server': poll.nameserver.host,
+                  'port': poll.nameserver.port})
+
+        self._pending[poll.message.id] = poll
+        self._push(time.time() + poll.timeout, self._expire, poll,
+                   poll.attempt)
+
+        sock = self._get_socket(poll.nameserver.host)
+        sock.sendto(poll.message.to_wire(), poll.destination)
+
+    def _expire(self, poll, attempt):
+        if poll.attempt != attempt or \
+                self._pending.get(poll.message.id) is not poll:
+            # The response to that query has arrived already
+            return
+
+        del self._pending[poll.message.id]
+
+        LOG.warn(_LW("Got Timeout while trying to send 'SOA' for '%(zone)s' "
+                     "to '%(server)s:%(port)s'. Timeout='%(timeout)d' "
+                     "seconds. Retry='%(retry)d'") %
+                 {'zone': poll.domain.name, 'server': poll.nameserver.host,
+                  'port': poll.nameserver.port, 'timeout': poll.timeout,
+                  'retry': poll.attempt})
+
+        self._retry(poll)
+
+    def _receive(self, sock):
+        while True:
+            try:
+                wire, addr = sock.recvfrom(65535)
+            except socket.error:
+                if self._sockets.get(sock.family) is not sock:
+                    # The poller was stopped
+                    return
+
+                LOG.exception(_LE("Failed receiving SOA responses"))
+                continue
+
+            try:
+                response = dns.message.from_wire(wire)
+            except dns.exception.DNSException:
+                LOG.debug("Ignoring malformed response from %s", addr[0])
+                continue
+
+            poll = self._pending.get(response.id)
+
+            if poll is None or tuple(addr[:2]) != poll.destination or \
+                    not poll.message.is_response(response):
+                LOG.debug("Ignoring unexpected response from %s", addr[0])
+                continue
+
+            del self._pending[response.id]
+
+            try:
+                self._handle_response(poll, response)
+            except Exception:
+                LOG.exception(_LE("Failed handling SOA response for "
+                                  "'%s'") % poll.domain.name)
+                self._finish(poll)
+
+    def _handle_response(self, poll, response):
+        domain = poll.domain
+
+        if response.rcode() in (dns.rcode.NXDOMAIN, dns.rcode.REFUSED,
+                                dns.rcode.SERVFAIL):
+            LOG.info(_LI("%(zone)s not found on %(server)s:%(port)s") %
+                     {'zone': domain.name, 'server': poll.nameserver.host,
+                      'port': poll.nameserver.port})
+            poll.status = 'NO_DOMAIN'
+
+        elif not (response.flags & dns.flags.AA):
+            LOG.warn(_LW("Failed to get expected response while trying to "
+                         "send 'SOA' for '%(zone)s' to '%(server)s:"
+                         "%(port)s'.\nResponse message:\n%(resp)s\n") %
+                     {'zone': domain.name, 'server': poll.nameserver.host,
+                      'port': poll.nameserver.port, 'resp': str(response)})
+
+        elif len(response.answer) == 1 \
+                and str(response.answer[0].name) == str(domain.name) \
+                and response.answer[0].rdclass == dns.rdataclass.IN \
+                and response.answer[0].rdtype == dns.rdatatype.SOA:
+            rrset = response.answer[0]
+            poll.actual_serial = rrset.to_rdataset().items[0].serial
+
+        if poll.actual_serial is not None and \
+                poll.actual_serial >= domain.serial:
+            # TODO(vinod): Account for serial number wrap around.
+            poll.status = 'SUCCESS'
+            self._finish(poll)
+            return
+
+        LOG.warn(_LW("Got lower serial for '%(zone)s' to '%(host)s:"
+                     "%(port)s'. Expected:'%(es)d'. Got:'%(as)s'."
+                     "Retries left='%(retries)d'") %
+                 {'zone': domain.name, 'host': poll.nameserver.host,
+                  'port': poll.nameserver.port, 'es': domain.serial,
+                  'as': poll.actual_serial, 'retries': poll.retries - 1})
+
+        self._retry(poll)
+
+    def _retry(self, poll):
+        poll.retries -= 1
+
+        if poll.retries > 0:
+            self._push(time.time() + poll.retry_interval, self._send, poll)
+        else:
+            self._finish(poll)
+
+    def _finish(self, poll):
+        if self._pending.get(poll.message.id) is poll:
+            del self._pending[poll.message.id]
+
+        self._polls.discard(poll)
+
+        # Run the callback in its own thread, as it may block on RPC
+        eventlet.spawn_n(
+            poll.callback, poll.status, poll.actual_serial, poll.retries)
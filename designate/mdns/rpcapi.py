@@ -37,9 +37,13 @@ class MdnsAPI(object):
 
     XFR API version history:
         1.0 - Added perform_zone_xfr.
+
+    TsigKey API version history:
+        1.0 - Added invalidate_tsigkey.
     """
     RPC_NOTIFY_API_VERSION = '1.1'
     RPC_XFR_API_VERSION = '1.0'
+    RPC_TSIGKEY_API_VERSION = '1.0'
 
     def __init__(self, topic=None):
         topic = topic if topic else cfg.CONF.mdns_topic
@@ -54,6 +58,12 @@ class MdnsAPI(object):
                                       version=self.RPC_XFR_API_VERSION)
         self.xfr_client = rpc.get_client(xfr_target, version_cap='1.0')
 
+        tsigkey_target = messaging.Target(
+            topic=topic, namespace='tsigkey',
+            version=self.RPC_TSIGKEY_API_VERSION)
+        self.tsigkey_client = rpc.get_client(tsigkey_target,
+                                             version_cap='1.0')
+
     @classmethod
     def get_instance(cls):
         """
@@ -116,3 +126,10 @@ class MdnsAPI(object):
         LOG.info(_LI("perform_zone_xfr: Calling mdns for zone %(zone)s") %
                  {"zone": domain.name})
         return self.xfr_client.cast(context, 'perform_zone_xfr', domain=domain)
+
+    def invalidate_tsigkey(self, context, tsigkey):
+        LOG.info(_LI("invalidate_tsigkey: Calling mdns for tsigkey %(name)s") %
+                 {"name": tsigkey.name})
+        # Every mdns instance caches TSIG keys, so this is a fanout cast.
+        cctxt = self.tsigkey_client.prepare(fanout=True)
+        return cctxt.cast(context, 'invalidate_tsigkey', tsigkey=tsigkey)
@@ -20,8 +20,11 @@ from designate import utils
 from designate import service
 from designate import storage
 from designate import dnsutils
+from designate.mdns import cache
 from designate.mdns import handler
 from designate.mdns import notify
+from designate.mdns import poller
+from designate.mdns import tsigkey
 from designate.mdns import xfr
 
 LOG = logging.getLogger(__name__)
@@ -30,28 +33,64 @@ CONF = cfg.CONF
 
 class Service(service.DNSService, service.RPCService, service.Service):
     def __init__(self, threads=None):
-        super(Service, self).__init__(threads=threads)
-
-        # Get a storage connection
+        # Get a storage connection. This happens first, as the RPC endpoints
+        # built by the base classes share the storage backed TSIG key cache.
         self.storage = storage.get_storage(CONF['service:mdns'].storage_driver)
 
+        super(Service, self).__init__(threads=threads)
+
     @property
     def service_name(self):
         return 'mdns'
 
+    def start(self):
+        super(Service, self).start()
+
+        self._serial_poller.start(self.tg)
+
+    def stop(self):
+        self._serial_poller.stop()
+
+        super(Service, self).stop()
+
+    @property
+    @utils.cache_result
+    def _zone_cache(self):
+        # The zone cache is shared between the DNS application, which fills
+        # it, and the RPC endpoints, which learn about serial changes.
+        return cache.ZoneCache()
+
+    @property
+    @utils.cache_result
+    def _tsigkey_cache(self):
+        # The TSIG key cache is shared between the DNS middleware, which fills
+        # it, and the RPC endpoints, which learn about changed keys.
+        return dnsutils.TsigKeyCache(
+            self.storage, CONF['service:mdns'].tsig_key_cache_ttl)
+
+    @property
+    @utils.cache_result
+    def _serial_poller(self):
+        return poller.SerialPoller()
+
     @property
     @utils.cache_result
     def _rpc_endpoints(self):
-        return [notify.NotifyEndpoint(self.tg), xfr.XfrEndpoint(self.tg)]
+        return [notify.NotifyEndpoint(self.tg, self._zone_cache,
+                                      self._serial_poller),
+                xfr.XfrEndpoint(self.tg, self._zone_cache),
+                tsigkey.TsigKeyEndpoint(self.tg, self._tsigkey_cache)]
 
     @property
     @utils.cache_result
     def _dns_application(self):
         # Create an instance of the RequestHandler class and wrap with
         # necessary middleware.
-        application = handler.RequestHandler(self.storage, self.tg)
-        application = dnsutils.TsigInfoMiddleware(application, self.storage)
+        application = handler.RequestHandler(
+            self.storage, self.tg, self._zone_cache)
+        application = dnsutils.TsigInfoMiddleware(
+            application, self._tsigkey_cache)
         application = dnsutils.SerializationMiddleware(
-            application, dnsutils.TsigKeyring(self.storage))
+            application, dnsutils.TsigKeyring(self._tsigkey_cache))
 
         return application
@@ -0,0 +1,36 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from oslo_log import log as logging
+
+from designate.mdns import base
+
+LOG = logging.getLogger(__name__)
+
+
+class TsigKeyEndpoint(base.BaseEndpoint):
+    RPC_API_VERSION = '1.0'
+    RPC_API_NAMESPACE = 'tsigkey'
+
+    def __init__(self, tg, tsigkey_cache):
+        super(TsigKeyEndpoint, self).__init__(tg)
+        self.tsigkey_cache = tsigkey_cache
+
+    def invalidate_tsigkey(self, context, tsigkey):
+        """
+        :param context: The user context.
+        :param tsigkey: The created, updated or deleted TsigKey, whose cached
+            entries are dropped.
+        """
+        LOG.debug("Invalidating cached TSIG key %s", tsigkey.name)
+        self.tsigkey_cache.invalidate(tsigkey)
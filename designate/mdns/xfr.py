@@ -48,6 +48,9 @@ class XFRMixin(object):
 
         self.central_api.update_domain(context, domain, increment_serial=False)
 
+        if getattr(self, 'zone_cache', None) is not None:
+            self.zone_cache.invalidate(domain.id)
+
 
 class XfrEndpoint(base.BaseEndpoint, XFRMixin):
     RPC_API_VERSION = '1.0'
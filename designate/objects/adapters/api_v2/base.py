@@ -48,6 +48,10 @@ class APIv2Adapter(base.DesignateAdapter):
         if isinstance(list_object, obj_base.PagedListObjectMixin):
             metadata = {}
             metadata['total_count'] = list_object.total_count
+
+            if list_object.obj_attr_is_set('total_count_capped'):
+                metadata['total_count_capped'] = \
+                    list_object.total_count_capped
             r_list['metadata'] = metadata
 
         return r_list
@@ -31,9 +31,8 @@ class NotSpecifiedSentinel:
     pass
 
 
-def get_attrname(name):
-    """Return the mangled name of the attribute's underlying storage."""
-    return '_obj_field_%s' % name
+# The value of a field which has not been set
+_UNSET = object()
 
 
 def make_class_properties(cls):
@@ -53,21 +52,44 @@ def make_class_properties(cls):
     # Store the results
     cls.FIELDS = fields
 
-    for field in cls.FIELDS.keys():
-        def getter(self, name=field):
-            self._obj_check_relation(name)
-            return getattr(self, get_attrname(name), None)
+    # Each field's value is kept at a fixed index of the object's
+    # _obj_values list, and whether it has changed in the same bit of the
+    # object's _obj_changed mask.
+    cls._obj_field_names = tuple(fields.keys())
+    cls._obj_field_index = dict(
+        (name, index) for index, name in enumerate(cls._obj_field_names))
+    cls._obj_relation_names = tuple(
+        name for name in cls._obj_field_names
+        if fields[name].get('relation', False))
 
-        def setter(self, value, name=field):
-            if (self.obj_attr_is_set(name) and value != getattr(self, name)
-                    or not self.obj_attr_is_set(name)):
-                self._obj_changes.add(name)
+    for index, field in enumerate(cls._obj_field_names):
+        relation = fields[field].get('relation', False)
 
-            if (self.obj_attr_is_set(name) and value != getattr(self, name)
-                    and name not in self._obj_original_values.keys()):
-                self._obj_original_values[name] = getattr(self, name)
+        def getter(self, index=index, relation=relation):
+            value = self._obj_values[index]
 
-            return setattr(self, get_attrname(name), value)
+            if value is _UNSET:
+                if relation:
+                    raise exceptions.RelationNotLoaded
+                return None
+
+            return value
+
+        def setter(self, value, index=index, name=field):
+            old_value = self._obj_values[index]
+
+            if old_value is _UNSET:
+                self._obj_changed |= 1 << index
+
+            elif value != old_value:
+                self._obj_changed |= 1 << index
+
+                if self._obj_original_values is None:
+                    self._obj_original_values = {}
+
+                self._obj_original_values.setdefault(name, old_value)
+
+            self._obj_values[index] = value
 
         setattr(cls, field, property(getter, setter))
 
@@ -84,18 +106,49 @@ def _schema_ref_resolver(uri):
     return obj.obj_get_schema()
 
 
-def make_class_validator(obj):
+# Validators, keyed by the structure of the objects they validate
+_VALIDATORS = {}
+
+
+def _schema_key(obj):
+    """
+    Return a key identifying the schema of obj, a DesignateObject or
+    DesignateObject class
+
+    The schema of an object only depends on its class, and on the relations
+    which are set on it, recursively, so objects with the same key share
+    their validator.
+    """
+    if isinstance(obj, type):
+        return (obj,)
+
+    key = [obj.__class__]
 
+    if not isinstance(obj, ListObjectMixin):
+        for name in obj._obj_relation_names:
+            if obj.obj_attr_is_set(name):
+                key.append((name, _schema_key(getattr(obj, name))))
+
+    return tuple(key)
+
+
+def make_class_schema(obj):
+    """
+    Build the JSON Schema of obj, a DesignateObject or DesignateObject class
+
+    Relations are only included once set, so a class has none.
+    """
     schema = {
         '$schema': 'http://json-schema.org/draft-04/hyper-schema',
         'title': obj.obj_name(),
         'description': 'Designate %s Object' % obj.obj_name(),
     }
 
-    if isinstance(obj, ListObjectMixin):
+    if isinstance(obj, ListObjectMixin) or (
+            isinstance(obj, type) and issubclass(obj, ListObjectMixin)):
 
-        schema['type'] = 'array',
-        schema['items'] = make_class_validator(obj.LIST_ITEM_TYPE)
+        schema['type'] = 'array'
+        schema['items'] = make_class_schema(obj.LIST_ITEM_TYPE)
 
     else:
         schema['type'] = 'object'
@@ -105,25 +158,52 @@ def make_class_validator(obj):
 
         for name, properties in obj.FIELDS.items():
             if properties.get('relation', False):
-                if obj.obj_attr_is_set(name):
+                if not isinstance(obj, type) and obj.obj_attr_is_set(name):
                     schema['properties'][name] = \
-                        make_class_validator(getattr(obj, name))
+                        make_class_schema(getattr(obj, name))
             else:
                 schema['properties'][name] = properties.get('schema', {})
 
             if properties.get('required', False):
                 schema['required'].append(name)
 
-    resolver = jsonschema.RefResolver.from_schema(
-        schema, handlers={'obj': _schema_ref_resolver})
+    return schema
+
 
-    obj._obj_validator = validators.Draft4Validator(
-        schema, resolver=resolver, format_checker=format.draft4_format_checker)
+def make_class_validator(obj):
+    """
+    Return the validator for obj, a DesignateObject or DesignateObject class
 
-    return schema
+    Validators are built once for each schema, and then reused.
+    """
+    key = _schema_key(obj)
+
+    validator = _VALIDATORS.get(key)
+
+    if validator is None:
+        schema = make_class_schema(obj)
+
+        resolver = jsonschema.RefResolver.from_schema(
+            schema, handlers={'obj': _schema_ref_resolver})
+
+        validator = validators.Draft4Validator(
+            schema, resolver=resolver,
+            format_checker=format.draft4_format_checker)
+
+        _VALIDATORS[key] = validator
+
+    return validator
 
 
 class DesignateObjectMetaclass(type):
+    def __new__(mcs, names, bases, dict_):
+        # NOTE: The state of an object lives in the slots declared by
+        #       DesignateObject, sparing every instance a __dict__.
+        dict_.setdefault('__slots__', ())
+
+        return super(DesignateObjectMetaclass, mcs).__new__(
+            mcs, names, bases, dict_)
+
     def __init__(cls, names, bases, dict_):
         if not hasattr(cls, '_obj_classes'):
             # This means we're working on the base DesignateObject class,
@@ -148,6 +228,12 @@ class DesignateObjectMetaclass(type):
 class DesignateObject(object):
     FIELDS = {}
 
+    __slots__ = ('_obj_values', '_obj_changed', '_obj_original_values')
+
+    _obj_field_names = ()
+    _obj_field_index = {}
+    _obj_relation_names = ()
+
     def _obj_check_relation(self, name):
         if name in self.FIELDS and self.FIELDS[name].get('relation', False):
             if not self.obj_attr_is_set(name):
@@ -178,9 +264,9 @@ class DesignateObject(object):
             else:
                 setattr(instance, field, value)
 
-        instance._obj_changes = set(primitive['designate_object.changes'])
+        instance._obj_set_changed(primitive['designate_object.changes'])
         instance._obj_original_values = \
-            primitive['designate_object.original_values']
+            primitive['designate_object.original_values'] or None
 
         return instance
 
@@ -220,14 +306,15 @@ class DesignateObject(object):
     @classmethod
     def obj_get_schema(cls):
         """Returns the JSON Schema for this Object."""
-        return cls._obj_validator.schema
+        return make_class_validator(cls).schema
 
     def __init__(self, **kwargs):
-        self._obj_changes = set()
-        self._obj_original_values = dict()
+        self._obj_values = [_UNSET] * len(self._obj_field_names)
+        self._obj_changed = 0
+        self._obj_original_values = None
 
         for name, value in kwargs.items():
-            if name in self.FIELDS.keys():
+            if name in self._obj_field_index:
                 setattr(self, name, value)
             else:
                 raise TypeError("__init__() got an unexpected keyword "
@@ -243,32 +330,37 @@ class DesignateObject(object):
         """
         data = {}
 
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                if isinstance(getattr(self, field), DesignateObject):
-                    data[field] = getattr(self, field).to_primitive()
-                else:
-                    data[field] = getattr(self, field)
+        for field, value in zip(self._obj_field_names, self._obj_values):
+            if value is _UNSET:
+                continue
+
+            if isinstance(value, DesignateObject):
+                data[field] = value.to_primitive()
+            else:
+                data[field] = value
 
         return {
             'designate_object.name': self.obj_name(),
             'designate_object.data': data,
-            'designate_object.changes': sorted(self._obj_changes),
-            'designate_object.original_values': dict(self._obj_original_values)
+            'designate_object.changes': sorted(self._obj_changed_fields()),
+            'designate_object.original_values':
+                dict(self._obj_original_values or {})
         }
 
     def to_dict(self):
         """Convert the object to a simple dictionary."""
         data = {}
 
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                if isinstance(getattr(self, field), ListObjectMixin):
-                    data[field] = getattr(self, field).to_list()
-                elif isinstance(getattr(self, field), DesignateObject):
-                    data[field] = getattr(self, field).to_dict()
-                else:
-                    data[field] = getattr(self, field)
+        for field, value in zip(self._obj_field_names, self._obj_values):
+            if value is _UNSET:
+                continue
+
+            if isinstance(value, ListObjectMixin):
+                data[field] = value.to_list()
+            elif isinstance(value, DesignateObject):
+                data[field] = value.to_dict()
+            else:
+                data[field] = value
 
         return data
 
@@ -281,13 +373,11 @@ class DesignateObject(object):
     def is_valid(self):
         """Returns True if the Object is valid."""
 
-        make_class_validator(self)
-
-        return self._obj_validator.is_valid(self.to_dict())
+        return make_class_validator(self).is_valid(self.to_dict())
 
     def validate(self):
 
-        make_class_validator(self)
+        validator = make_class_validator(self)
 
         # NOTE(kiall): We make use of the Object registry here in order to
         #              avoid an impossible circular import.
@@ -302,7 +392,7 @@ class DesignateObject(object):
             'values': values,
         })
 
-        for error in self._obj_validator.iter_errors(values):
+        for error in validator.iter_errors(values):
             errors.append(ValidationError.from_js_error(error))
 
         if len(errors) > 0:
@@ -315,11 +405,31 @@ class DesignateObject(object):
         Return True or False depending of if a particular attribute has had
         an attribute's value explicitly set.
         """
-        return hasattr(self, get_attrname(name))
+        index = self._obj_field_index.get(name)
+
+        return index is not None and self._obj_values[index] is not _UNSET
+
+    def _obj_changed_fields(self):
+        changed = self._obj_changed
+
+        if not changed:
+            return set()
+
+        return set(name for index, name in enumerate(self._obj_field_names)
+                   if changed >> index & 1)
+
+    def _obj_set_changed(self, fields):
+        self._obj_changed = 0
+
+        for field in fields:
+            index = self._obj_field_index.get(field)
+
+            if index is not None:
+                self._obj_changed |= 1 << index
 
     def obj_what_changed(self):
         """Returns a set of fields that have been modified."""
-        return set(self._obj_changes)
+        return self._obj_changed_fields()
 
     def obj_get_changes(self):
         """Returns a dict of changed fields and their new values."""
@@ -333,35 +443,29 @@ class DesignateObject(object):
     def obj_reset_changes(self, fields=None):
         """Reset the list of fields that have been changed."""
         if fields:
-            self._obj_changes -= set(fields)
             for field in fields:
-                self._obj_original_values.pop(field, None)
+                index = self._obj_field_index.get(field)
+
+                if index is not None:
+                    self._obj_changed &= ~(1 << index)
+
+                if self._obj_original_values:
+                    self._obj_original_values.pop(field, None)
 
         else:
-            self._obj_changes.clear()
-            self._obj_original_values = dict()
+            self._obj_changed = 0
+            self._obj_original_values = None
 
     def obj_get_original_value(self, field):
         """Returns the original value of a field."""
-        if field in self._obj_original_values.keys():
+        if (self._obj_original_values and
+                field in self._obj_original_values):
             return self._obj_original_values[field]
         elif self.obj_attr_is_set(field):
             return getattr(self, field)
         else:
             raise KeyError(field)
 
-    def __setattr__(self, name, value):
-        """Enforces all object attributes are private or well defined"""
-        if name[0:5] == '_obj_' or name in self.FIELDS.keys():
-            super(DesignateObject, self).__setattr__(name, value)
-
-        else:
-            raise AttributeError(
-                "Designate object '%(type)s' has no attribute '%(name)s'" % {
-                    'type': self.obj_name(),
-                    'name': name,
-                })
-
     def __deepcopy__(self, memodict=None):
         """
         Efficiently make a deep copy of this object.
@@ -374,12 +478,11 @@ class DesignateObject(object):
 
         c_obj = self.__class__()
 
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                c_field = copy.deepcopy(getattr(self, field), memodict)
-                setattr(c_obj, field, c_field)
+        for field, value in zip(self._obj_field_names, self._obj_values):
+            if value is not _UNSET:
+                setattr(c_obj, field, copy.deepcopy(value, memodict))
 
-        c_obj._obj_changes = set(self._obj_changes)
+        c_obj._obj_changed = self._obj_changed
 
         return c_obj
 
@@ -400,6 +503,8 @@ class DictObjectMixin(object):
     Eventually, this should be removed as other code is updated to use object
     rather than dictionary accessors.
     """
+    __slots__ = ()
+
     def __getitem__(self, key):
         return getattr(self, key)
 
@@ -407,10 +512,10 @@ class DictObjectMixin(object):
         setattr(self, key, value)
 
     def __contains__(self, item):
-        return item in self.FIELDS.keys()
+        return item in self.FIELDS
 
     def get(self, key, default=NotSpecifiedSentinel):
-        if key not in self.FIELDS.keys():
+        if key not in self.FIELDS:
             raise AttributeError("'%s' object has no attribute '%s'" % (
                                  self.__class__, key))
 
@@ -420,20 +525,20 @@ class DictObjectMixin(object):
             return getattr(self, key)
 
     def iteritems(self):
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                yield field, getattr(self, field)
+        for field, value in zip(self._obj_field_names, self._obj_values):
+            if value is not _UNSET:
+                yield field, value
 
     def __iter__(self):
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                yield field, getattr(self, field)
+        return self.iteritems()
 
     items = lambda self: list(self.iteritems())
 
 
 class ListObjectMixin(object):
     """Mixin to allow DesignateObjects to behave like python lists."""
+    __slots__ = ()
+
     FIELDS = {
         'objects': {
             'relation': True
@@ -454,9 +559,9 @@ class ListObjectMixin(object):
             else:
                 setattr(instance, field, value)
 
-        instance._obj_changes = set(primitive['designate_object.changes'])
+        instance._obj_set_changed(primitive['designate_object.changes'])
         instance._obj_original_values = \
-            primitive['designate_object.original_values']
+            primitive['designate_object.original_values'] or None
 
         return instance
 
@@ -483,6 +588,37 @@ class ListObjectMixin(object):
 
         return list_
 
+    @property
+    def is_valid(self):
+        """Returns True if every item in the list is valid."""
+        return all(item.is_valid for item in self.objects)
+
+    def validate(self):
+        """
+        Validate every item in the list, reporting the errors of all the
+        invalid items at once
+
+        The path of each error starts with the index of its item. Items with
+        the same structure share a validator, so large lists are validated
+        without rebuilding it for every item.
+        """
+        ValidationErrorList = self.obj_cls_from_name('ValidationErrorList')
+
+        errors = ValidationErrorList()
+
+        for index, item in enumerate(self.objects):
+            try:
+                item.validate()
+            except exceptions.InvalidObject as e:
+                for error in e.errors:
+                    error.path = [index] + list(error.path)
+                    errors.append(error)
+
+        if len(errors) > 0:
+            raise exceptions.InvalidObject(
+                "Provided object does not match "
+                "schema", errors=errors, object=self)
+
     def __init__(self, *args, **kwargs):
         super(ListObjectMixin, self).__init__(*args, **kwargs)
         if 'objects' not in kwargs:
@@ -492,20 +628,23 @@ class ListObjectMixin(object):
     def to_primitive(self):
         data = {}
 
-        for field in self.FIELDS.keys():
-            if self.obj_attr_is_set(field):
-                if field == 'objects':
-                    data[field] = [o.to_primitive() for o in self.objects]
-                elif isinstance(getattr(self, field), DesignateObject):
-                    data[field] = getattr(self, field).to_primitive()
-                else:
-                    data[field] = getattr(self, field)
+        for field, value in zip(self._obj_field_names, self._obj_values):
+            if value is _UNSET:
+                continue
+
+            if field == 'objects':
+                data[field] = [o.to_primitive() for o in value]
+            elif isinstance(value, DesignateObject):
+                data[field] = value.to_primitive()
+            else:
+                data[field] = value
 
         return {
             'designate_object.name': self.obj_name(),
             'designate_object.data': data,
-            'designate_object.changes': list(self._obj_changes),
-            'designate_object.original_values': dict(self._obj_original_values)
+            'designate_object.changes': list(self._obj_changed_fields()),
+            'designate_object.original_values':
+                dict(self._obj_original_values or {})
         }
 
     def __iter__(self):
@@ -565,7 +704,7 @@ class ListObjectMixin(object):
         self.objects.sort(cmp=cmp, key=key, reverse=reverse)
 
     def obj_what_changed(self):
-        changes = set(self._obj_changes)
+        changes = self._obj_changed_fields()
         for item in self.objects:
             if item.obj_what_changed():
                 changes.add('objects')
@@ -578,6 +717,8 @@ class PersistentObjectMixin(object):
 
     This adds the fields that we use in common for all persistent objects.
     """
+    __slots__ = ()
+
     FIELDS = {
         'id': {
             'schema': {
@@ -615,6 +756,8 @@ class SoftDeleteObjectMixin(object):
 
     This adds the fields that we use in common for all soft-deleted objects.
     """
+    __slots__ = ()
+
     FIELDS = {
         'deleted': {
             'schema': {
@@ -638,10 +781,102 @@ class PagedListObjectMixin(object):
 
     This adds fields that would populate API metadata for collections.
     """
+    __slots__ = ()
+
     FIELDS = {
         'total_count': {
             'schema': {
                 'type': ['integer'],
             }
+        },
+        # Set on estimated counts, whether total_count stopped at the
+        # estimate limit
+        'total_count_capped': {
+            'schema': {
+                'type': ['boolean'],
+            }
         }
     }
+
+
+class Snapshot(object):
+    """
+    The state of some values, which can later be restored in place
+
+    DesignateObjects, lists, dicts and sets are captured, as are the
+    DesignateObjects, lists, dicts and sets they hold, recursively. Tuples
+    are searched for them too. Unlike a deepcopy, no objects are built, only
+    the field values of the objects and the contents of the containers are
+    copied.
+
+    Any other mutable value, such as a context, is neither captured nor
+    restored, and must not be changed in place by the code the snapshot
+    guards.
+    """
+
+    def __init__(self, *values):
+        self._objects = []
+        self._lists = []
+        self._dicts = []
+        self._sets = []
+
+        seen = set()
+
+        for value in values:
+            self._capture(value, seen)
+
+    def _capture(self, value, seen):
+        if id(value) in seen:
+            return
+
+        if isinstance(value, DesignateObject):
+            seen.add(id(value))
+
+            self._objects.append((value, (
+                list(value._obj_values),
+                value._obj_changed,
+                dict(value._obj_original_values or {}))))
+
+            for field_value in value._obj_values:
+                self._capture(field_value, seen)
+
+        elif isinstance(value, (list, tuple)):
+            seen.add(id(value))
+
+            if isinstance(value, list):
+                self._lists.append((value, list(value)))
+
+            for item in value:
+                self._capture(item, seen)
+
+        elif isinstance(value, dict):
+            seen.add(id(value))
+
+            self._dicts.append((value, dict(value)))
+
+            for item in value.values():
+                self._capture(item, seen)
+
+        elif isinstance(value, set):
+            seen.add(id(value))
+
+            self._sets.append((value, set(value)))
+
+    def restore(self):
+        """Undo any changes made to the captured values since"""
+        for obj, (values, changed, original_values) in self._objects:
+            # Keep the snapshot intact, in case it's restored again
+            obj._obj_values = list(values)
+            obj._obj_changed = changed
+            obj._obj_original_values = dict(original_values) or None
+
+        for list_, items in self._lists:
+            list_[:] = items
+
+        for dict_, items in self._dicts:
+            dict_.clear()
+            dict_.update(items)
+
+        for set_, items in self._sets:
+            set_.clear()
+            set_.update(items)
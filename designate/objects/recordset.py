@@ -166,6 +166,10 @@ class RecordSet(base.DictObjectMixin, base.PersistentObjectMixin,
             # to validation above, so this re - inserts them, and makes sure
             # the index is right
             for error in e.errors:
+                # Only errors in the records need their index corrected
+                if len(error.path) < 2 or error.path[0] != 'records':
+                    continue
+
                 error.path[1] += increment
                 while error.path[1] in error_indexes:
                     increment += 1
@@ -52,8 +52,27 @@ OPTS = [
     cfg.IntOpt('periodic-sync-seconds', default=None,
                help='Zones Updated within last N seconds will be syncd. Use '
                     'None to sync all zones.'),
+    cfg.IntOpt('periodic-sync-batch-size', default=1000,
+               help='The number of zones fetched from central at once while '
+                    'synchronizing'),
+    cfg.FloatOpt('periodic-sync-max-rate', default=0,
+                 help='The maximum number of zones checked per second while '
+                      'synchronizing. Zones are spread evenly over the sync '
+                      'interval, 0 sets no further limit'),
     cfg.StrOpt('cache-driver', default='sqlalchemy',
                help='The cache driver to use'),
+    cfg.FloatOpt('update-coalesce-window', default=2.0,
+                 help='The time to wait for further updates of a domain '
+                      'before pushing it to the pool, only the latest of the '
+                      'updates received meanwhile is pushed. 0 pushes every '
+                      'update straight away'),
+    cfg.IntOpt('target-concurrency', default=10,
+               help='The maximum number of concurrent calls to each pool '
+                    'target'),
+    cfg.IntOpt('target-timeout', default=120,
+               help='The time to wait for the pool targets to act on a '
+                    'domain change, targets which have not finished by then '
+                    'count as failed'),
 ]
 
 CONF.register_opts(OPTS, group='service:pool_manager')
@@ -27,6 +27,10 @@ class PoolManagerCache(DriverPlugin):
     __plugin_ns__ = 'designate.pool_manager.cache'
     __plugin_type__ = 'pool_manager_cache'
 
+    # Whether the statuses stored can be retrieved afterwards, which isn't
+    # the case for caches which don't keep anything
+    keeps_statuses = True
+
     @abc.abstractmethod
     def clear(self, context, pool_manager_status):
         """
@@ -61,3 +65,25 @@ class PoolManagerCache(DriverPlugin):
         :param action: the action of the pool manager status object
         :return: the pool manager status object
         """
+
+    def flush(self):
+        """
+
+        Write out any changes the cache has deferred. Caches which write
+        changes as they are made have none.
+        """
+
+    @abc.abstractmethod
+    def retrieve_many(self, context, nameserver_ids, domain_id, action):
+        """
+
+        Retrieve the pool manager status objects of many nameservers at once.
+
+        :param context: Security context information
+        :param nameserver_ids: the nameserver IDs of the pool manager status
+                               objects
+        :param domain_id: the domain ID of the pool manger status objects
+        :param action: the action of the pool manager status objects
+        :return: a list of the pool manager status objects found, nameservers
+                 without one are left out
+        """
@@ -100,6 +100,61 @@ class MemcachePoolManagerCache(cache_base.PoolManagerCache):
 
         return pool_manager_status
 
+    def retrieve_many(self, context, nameserver_ids, domain_id, action):
+        pool_manager_statuses = []
+        keys = []
+
+        for nameserver_id in nameserver_ids:
+            values = {
+                'nameserver_id': nameserver_id,
+                'domain_id': domain_id,
+                'action': action,
+            }
+            pool_manager_status = objects.PoolManagerStatus(**values)
+            pool_manager_statuses.append(pool_manager_status)
+
+            keys.append(self._build_status_key(pool_manager_status))
+            keys.append(self._build_serial_number_key(pool_manager_status))
+
+        # Fetch the status and serial number of every nameserver at once
+        values = self._get_multi(keys)
+
+        found = objects.PoolManagerStatusList()
+
+        for pool_manager_status in pool_manager_statuses:
+            status = values.get(
+                self._build_status_key(pool_manager_status))
+            serial_number = values.get(
+                self._build_serial_number_key(pool_manager_status))
+
+            if status is None or serial_number is None:
+                continue
+
+            pool_manager_status.serial_number = serial_number
+            if status == DEFAULT_STATUS:
+                pool_manager_status.status = None
+            else:
+                pool_manager_status.status = status
+
+            found.append(pool_manager_status)
+
+        return found
+
+    def _get_multi(self, keys):
+        # NOTE: The in-memory client, used when no memcached_servers are
+        #       configured, only has get()
+        if hasattr(self.cache, 'get_multi'):
+            return self.cache.get_multi(keys)
+
+        values = {}
+
+        for key in keys:
+            value = self.cache.get(key)
+            if value is not None:
+                values[key] = value
+
+        return values
+
     @staticmethod
     def _status_key(pool_manager_status, tail):
         key = '{nameserver}-{domain}-{action}-{tail}'.format(
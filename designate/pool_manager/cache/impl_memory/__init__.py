@@ -0,0 +1,248 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import datetime
+import time
+
+import eventlet
+from oslo.config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from designate import exceptions
+from designate import objects
+from designate.context import DesignateContext
+from designate.i18n import _LI
+from designate.i18n import _LW
+from designate.pool_manager.cache import base as cache_base
+
+
+LOG = logging.getLogger(__name__)
+
+cfg.CONF.register_group(cfg.OptGroup(
+    name='pool_manager_cache:memory',
+    title="Configuration for in-memory Pool Manager Cache"
+))
+
+OPTS = [
+    cfg.IntOpt('expiration', default=3600,
+               help='Time in seconds to expire cache entries.'),
+    cfg.IntOpt('max-entries', default=100000,
+               help='The maximum number of entries to cache, the least '
+                    'recently stored entries are dropped beyond it.'),
+    cfg.BoolOpt('persist', default=False,
+                help='Whether to also write the cache behind to the '
+                     'SQLAlchemy pool manager cache, and recover from it on '
+                     'startup.'),
+    cfg.FloatOpt('persist-interval', default=1.0,
+                 help='The time in seconds changes are gathered for before '
+                      'being written to the SQLAlchemy pool manager cache.'),
+]
+
+cfg.CONF.register_opts(OPTS, group='pool_manager_cache:memory')
+
+
+class MemoryPoolManagerCache(cache_base.PoolManagerCache):
+    """
+    Keeps the pool manager statuses in the memory of the pool manager
+
+    Entries expire after the configured expiration, and the least recently
+    stored are dropped once there are max-entries of them. When persist is
+    enabled, changes are written behind to the SQLAlchemy pool manager cache
+    every persist-interval, expired and dropped entries included, and the
+    unexpired statuses are loaded from it on startup so a restarted pool
+    manager recovers its state.
+    """
+    __plugin_name__ = 'memory'
+
+    def __init__(self):
+        super(MemoryPoolManagerCache, self).__init__()
+
+        self.expiration = cfg.CONF['pool_manager_cache:memory'].expiration
+        self.max_entries = cfg.CONF['pool_manager_cache:memory'].max_entries
+        self.persist_interval = \
+            cfg.CONF['pool_manager_cache:memory'].persist_interval
+
+        # (status, serial_number, expires_at), by status key, in the order
+        # they were stored
+        self._entries = collections.OrderedDict()
+
+        # The keys changed since they were last written behind
+        self._dirty = set()
+        self._flusher = None
+
+        self.persistent = None
+
+        if cfg.CONF['pool_manager_cache:memory'].persist:
+            # NOTE: Imported here, so the SQLAlchemy cache's options are only
+            #       needed when persisting
+            from designate.pool_manager.cache import impl_sqlalchemy
+
+            self.persistent = impl_sqlalchemy.SQLAlchemyPoolManagerCache()
+            self._load()
+
+    def get_name(self):
+        return self.name
+
+    def clear(self, context, pool_manager_status):
+        key = self._build_key(pool_manager_status)
+
+        self._entries.pop(key, None)
+        self._mark_dirty(key)
+
+    def store(self, context, pool_manager_status):
+        key = self._build_key(pool_manager_status)
+
+        self._set(key, pool_manager_status.status,
+                  pool_manager_status.serial_number)
+        self._mark_dirty(key)
+
+    def retrieve(self, context, nameserver_id, domain_id, action):
+        key = (nameserver_id, domain_id, action)
+
+        pool_manager_status = self._get(key)
+        if pool_manager_status is None:
+            raise exceptions.PoolManagerStatusNotFound
+
+        return pool_manager_status
+
+    def retrieve_many(self, context, nameserver_ids, domain_id, action):
+        found = objects.PoolManagerStatusList()
+
+        for nameserver_id in nameserver_ids:
+            pool_manager_status = self._get(
+                (nameserver_id, domain_id, action))
+
+            if pool_manager_status is not None:
+                found.append(pool_manager_status)
+
+        return found
+
+    def flush(self):
+        """Write the pending changes behind to the SQLAlchemy cache"""
+        # Cancel the scheduled flush, unless that's what is running
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+
+        if self.persistent is None or not self._dirty:
+            return
+
+        context = DesignateContext.get_admin_context(all_tenants=True)
+
+        keys, self._dirty = self._dirty, set()
+
+        for key in keys:
+            try:
+                self._flush_key(context, key)
+            except Exception:
+                LOG.warn(_LW('Failed to persist pool manager status %s, '
+                             'retrying later'), key, exc_info=True)
+                self._mark_dirty(key)
+
+    def _flush_key(self, context, key):
+        # Write the latest state of the key, whatever it was changed by
+        pool_manager_status = self._get(key)
+
+        try:
+            persisted_status = self.persistent.retrieve(context, *key)
+        except exceptions.PoolManagerStatusNotFound:
+            persisted_status = None
+
+        if pool_manager_status is None:
+            if persisted_status is not None:
+                self.persistent.clear(context, persisted_status)
+
+        elif persisted_status is None:
+            self.persistent.store(context, pool_manager_status)
+
+        else:
+            persisted_status.status = pool_manager_status.status
+            persisted_status.serial_number = \
+                pool_manager_status.serial_number
+            self.persistent.store(context, persisted_status)
+
+    def _load(self):
+        context = DesignateContext.get_admin_context(all_tenants=True)
+
+        # Statuses keep the expiry they had, counted from when they were
+        # last stored, and those stored longer ago than that are left out
+        now = timeutils.utcnow()
+        since = now - datetime.timedelta(seconds=self.expiration)
+
+        pool_manager_statuses = self.persistent.retrieve_all(
+            context, limit=self.max_entries, since=since)
+
+        # Oldest first, so the most recently stored are the last dropped
+        for pool_manager_status in reversed(pool_manager_statuses):
+            stored_at = pool_manager_status.updated_at or \
+                pool_manager_status.created_at
+            age = timeutils.delta_seconds(stored_at, now)
+
+            self._set(self._build_key(pool_manager_status),
+                      pool_manager_status.status,
+                      pool_manager_status.serial_number,
+                      expires_at=time.time() + self.expiration - age)
+
+        LOG.info(_LI('Recovered %d pool manager statuses'),
+                 len(pool_manager_statuses))
+
+    def _mark_dirty(self, key):
+        if self.persistent is None:
+            return
+
+        self._dirty.add(key)
+
+        # Gather the changes made over the interval into one write
+        if self._flusher is None:
+            self._flusher = eventlet.spawn_after(
+                self.persist_interval, self.flush)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        status, serial_number, expires_at = entry
+
+        if expires_at <= time.time():
+            del self._entries[key]
+            self._mark_dirty(key)
+            return None
+
+        # Entries are copied in and out, so changes to a status only reach
+        # the cache once stored
+        nameserver_id, domain_id, action = key
+
+        return objects.PoolManagerStatus(
+            nameserver_id=nameserver_id, domain_id=domain_id, action=action,
+            status=status, serial_number=serial_number)
+
+    def _set(self, key, status, serial_number, expires_at=None):
+        if expires_at is None:
+            expires_at = time.time() + self.expiration
+
+        # Move the key to the end, as the most recently stored
+        self._entries.pop(key, None)
+        self._entries[key] = (status, serial_number, expires_at)
+
+        while len(self._entries) > self.max_entries:
+            dropped_key, _ = self._entries.popitem(last=False)
+            self._mark_dirty(dropped_key)
+
+    @staticmethod
+    def _build_key(pool_manager_status):
+        return (pool_manager_status.nameserver_id,
+                pool_manager_status.domain_id,
+                pool_manager_status.action)
@@ -14,12 +14,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 from designate import exceptions
+from designate import objects
 from designate.pool_manager.cache import base as cache_base
 
 
 class NoopPoolManagerCache(cache_base.PoolManagerCache):
     __plugin_name__ = 'noop'
 
+    keeps_statuses = False
+
     def __init__(self):
         super(NoopPoolManagerCache, self).__init__()
 
@@ -34,3 +37,6 @@ class NoopPoolManagerCache(cache_base.PoolManagerCache):
 
     def retrieve(self, context, nameserver_id, domain_id, action):
         raise exceptions.PoolManagerStatusNotFound
+
+    def retrieve_many(self, context, nameserver_ids, domain_id, action):
+        return objects.PoolManagerStatusList()
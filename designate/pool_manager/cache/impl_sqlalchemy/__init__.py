@@ -16,6 +16,8 @@
 from oslo.config import cfg
 from oslo_db import options
 from oslo_log import log as logging
+from sqlalchemy import func
+from sqlalchemy import select
 
 from designate import exceptions
 from designate import objects
@@ -76,3 +78,39 @@ class SQLAlchemyPoolManagerCache(sqlalchemy_base.SQLAlchemy,
             context, tables.pool_manager_statuses, objects.PoolManagerStatus,
             objects.PoolManagerStatusList,
             exceptions.PoolManagerStatusNotFound, criterion, one=True)
+
+    def retrieve_many(self, context, nameserver_ids, domain_id, action):
+        criterion = {
+            'nameserver_id': list(nameserver_ids),
+            'domain_id': domain_id,
+            'action': action
+        }
+        return self._find(
+            context, tables.pool_manager_statuses, objects.PoolManagerStatus,
+            objects.PoolManagerStatusList,
+            exceptions.PoolManagerStatusNotFound, criterion)
+
+    def retrieve_all(self, context, limit=None, since=None):
+        """
+        Retrieve the pool manager statuses most recently stored first, for
+        recovering other caches
+
+        :param limit: the most statuses to retrieve
+        :param since: when given, only the statuses stored since this UTC
+                      datetime are retrieved
+        """
+        table = tables.pool_manager_statuses
+        stored_at = func.coalesce(table.c.updated_at, table.c.created_at)
+
+        query = select([table]).order_by(stored_at.desc(), table.c.id)
+
+        if since is not None:
+            query = query.where(stored_at >= since)
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        results = self.read_session.execute(query).fetchall()
+
+        return sqlalchemy_base._set_listobject_from_models(
+            objects.PoolManagerStatusList(), results)
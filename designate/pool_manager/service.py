@@ -13,9 +13,13 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import itertools
+import time
 from contextlib import contextmanager
 from decimal import Decimal
 
+import eventlet.queue
+import eventlet.semaphore
 from oslo.config import cfg
 from oslo import messaging
 from oslo_log import log as logging
@@ -60,6 +64,38 @@ def wrap_backend_call():
         raise exceptions.Backend('Unknown backend failure: %r' % e)
 
 
+class TokenBucket(object):
+    """
+    Paces calls to consume() to rate per second, allowing bursts of up to
+    capacity calls
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated_at = time.time()
+
+    def consume(self):
+        """Takes a token, waiting for one if there are none left"""
+        if self.rate <= 0:
+            return
+
+        now = time.time()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        if self._tokens < 1:
+            time.sleep((1 - self._tokens) / self.rate)
+
+            self._tokens = 1
+            self._updated_at = time.time()
+
+        self._tokens -= 1
+
+
 class Service(service.RPCService, service.Service):
     """
     Service side of the Pool Manager RPC API.
@@ -88,12 +124,27 @@ class Service(service.RPCService, service.Service):
         self.retry_interval = CONF['service:pool_manager'].poll_retry_interval
         self.max_retries = CONF['service:pool_manager'].poll_max_retries
         self.delay = CONF['service:pool_manager'].poll_delay
+        self.target_timeout = CONF['service:pool_manager'].target_timeout
+        self.coalesce_window = \
+            CONF['service:pool_manager'].update_coalesce_window
+
+        # Updates waiting for the coalesce window to pass, by domain id
+        self._pending_updates = {}
+
+        # The serials every nameserver is known to have reached during the
+        # current periodic sync, by domain id
+        self._synced_serials = {}
+
+        # Where the periodic sync is up to, and the pace it's going at
+        self._sync_marker = None
+        self._sync_bucket = None
 
         # Create the necessary Backend instances for each target
         self._setup_target_backends()
 
     def _setup_target_backends(self):
         self.target_backends = {}
+        self.target_semaphores = {}
 
         for target in self.pool.targets:
             # Fetch an instance of the Backend class, passing in the options
@@ -101,6 +152,10 @@ class Service(service.RPCService, service.Service):
             self.target_backends[target.id] = backend.get_backend(
                     target.type, target)
 
+            # Bound the number of calls in flight to each target
+            self.target_semaphores[target.id] = eventlet.semaphore.Semaphore(
+                CONF['service:pool_manager'].target_concurrency)
+
         LOG.info(_LI('%d targets setup'), len(self.pool.targets))
 
         if not self.target_backends:
@@ -147,6 +202,9 @@ class Service(service.RPCService, service.Service):
 
         super(Service, self).stop()
 
+        # Write out the statuses the cache has yet to persist
+        self.cache.flush()
+
     @property
     def central_api(self):
         return central_api.CentralAPI.get_instance()
@@ -181,7 +239,7 @@ class Service(service.RPCService, service.Service):
             domains = self._get_failed_domains(context, UPDATE_ACTION)
 
             for domain in domains:
-                self.update_domain(context, domain)
+                self._update_domain(context, domain)
 
         except Exception:
             LOG.exception(_LE('An unhandled exception in periodic recovery '
@@ -189,6 +247,16 @@ class Service(service.RPCService, service.Service):
 
     def periodic_sync(self):
         """
+        Synchronizes the zones of the pool, in batches, at a pace spreading
+        them evenly over the sync interval.
+
+        Zones already at their serial on every nameserver, as found by one
+        SOA query to each, or as confirmed by an update made since the sync
+        started, are not updated. A sync which has not finished by the end
+        of the interval stops, and the next one carries on from the last
+        zone it reached. Every new sync checks every zone again, as a
+        nameserver may have lost a zone since it was last checked.
+
         :return: None
         """
         context = DesignateContext.get_admin_context(all_tenants=True)  # noqa
@@ -208,19 +276,98 @@ class Service(service.RPCService, service.Service):
             current = utils.increment_serial()
             criterion['serial'] = ">%s" % (current - periodic_sync_seconds)
 
-        domains = self.central_api.find_domains(context, criterion)
+        interval = CONF['service:pool_manager'].periodic_sync_interval
+        batch_size = CONF['service:pool_manager'].periodic_sync_batch_size
+        deadline = time.time() + interval
 
         try:
-            for domain in domains:
-                # TODO(kiall): If the domain was created within the last
-                #              periodic_sync_seconds, attempt to recreate to
-                #              fill in targets which may have failed.
-                self.update_domain(context, domain)
+            if self._sync_marker is None:
+                # Starting over, so what was synced during the last sync is
+                # to be checked again
+                self._synced_serials = {}
+                self._sync_bucket = self._build_sync_bucket(
+                    context, criterion, interval)
+
+            while time.time() < deadline:
+                # The zones are paged through to the end, so there's no
+                # need for a total count
+                batch_criterion = dict(criterion, total_count='none')
+
+                # Page through the zones by id, as opposed to a marker, so
+                # the sync can't be lost to the marker zone being deleted
+                if self._sync_marker is not None:
+                    batch_criterion['id'] = '>%s' % self._sync_marker
+
+                domains = self.central_api.find_domains(
+                    context, batch_criterion, limit=batch_size, sort_key='id',
+                    sort_dir='asc')
+
+                for domain in domains:
+                    self._sync_domain(context, domain)
+                    self._sync_marker = domain.id
+
+                if len(domains) < batch_size:
+                    LOG.debug("Finished Periodic Synchronization")
+                    self._sync_marker = None
+                    break
+
+            else:
+                LOG.warn(_LW('Periodic synchronization did not finish within '
+                             'its interval, continuing from domain %s next '
+                             'time'), self._sync_marker)
 
         except Exception:
             LOG.exception(_LE('An unhandled exception in periodic '
                               'synchronization occurred.'))
 
+    def _build_sync_bucket(self, context, criterion, interval):
+        # Spread the zones evenly over the interval
+        count = self.central_api.count_domains(context, criterion)
+        rate = float(count) / interval
+
+        max_rate = CONF['service:pool_manager'].periodic_sync_max_rate
+        if max_rate > 0 and rate > max_rate:
+            LOG.warn(_LW('Synchronizing %(count)d zones at the maximum rate '
+                         'of %(rate)s per second will take longer than the '
+                         'sync interval'), {'count': count, 'rate': max_rate})
+            rate = max_rate
+
+        return TokenBucket(rate, capacity=max(rate, 1))
+
+    def _sync_domain(self, context, domain):
+        # TODO(kiall): If the domain was created within the last
+        #              periodic_sync_seconds, attempt to recreate to
+        #              fill in targets which may have failed.
+        if self._synced_serials.get(domain.id, 0) >= domain.serial:
+            return
+
+        self._sync_bucket.consume()
+
+        if self._is_synced_on_nameservers(context, domain):
+            self._synced_serials[domain.id] = domain.serial
+            return
+
+        self._update_domain(context, domain)
+
+    def _is_synced_on_nameservers(self, context, domain):
+        """
+        Returns whether every nameserver already serves the domain's serial,
+        checked with a single SOA query each.
+        """
+        for nameserver in self.pool.nameservers:
+            try:
+                (status, actual_serial, retries) = \
+                    self.mdns_api.get_serial_number(
+                        context, domain, nameserver, self.timeout,
+                        self.retry_interval, 0, 0)
+            except messaging.MessagingException:
+                return False
+
+            if actual_serial is None or actual_serial < domain.serial:
+                return False
+
+        return True
+
     # Standard Create/Update/Delete Methods
     def create_domain(self, context, domain):
         """
@@ -230,14 +377,9 @@ class Service(service.RPCService, service.Service):
         """
         LOG.info(_LI("Creating new domain %s"), domain.name)
 
-        results = []
-
         # Create the domain on each of the Pool Targets
-        for target in self.pool.targets:
-            results.append(
-                self._create_domain_on_target(context, target, domain))
-
-        if self._exceed_or_meet_threshold(results.count(True)):
+        if self._fan_out_to_targets(
+                self._create_domain_on_target, context, domain):
             LOG.debug('Consensus reached for creating domain %(domain)s '
                       'on pool targets' % {'domain': domain.name})
 
@@ -286,20 +428,50 @@ class Service(service.RPCService, service.Service):
 
     def update_domain(self, context, domain):
         """
+        Updates of a domain are coalesced over the update coalesce window,
+        after which the latest of them is pushed to the pool.
+
         :param context: Security context information.
         :param domain: Domain to be updated
         :return: None
         """
-        LOG.info(_LI("Updating domain %s"), domain.name)
+        if self.coalesce_window <= 0:
+            return self._update_domain(context, domain)
 
-        results = []
+        pending = self._pending_updates.get(domain.id)
 
-        # Update the domain on each of the Pool Targets
-        for target in self.pool.targets:
-            results.append(
-                self._update_domain_on_target(context, target, domain))
+        if pending is not None:
+            LOG.debug("Coalescing update of domain %s to serial %s",
+                      domain.name, domain.serial)
+
+            if domain.serial >= pending[1].serial:
+                self._pending_updates[domain.id] = (context, domain)
+
+            return
+
+        self._pending_updates[domain.id] = (context, domain)
+        self.tg.add_thread(self._push_pending_update, domain.id)
+
+    def _push_pending_update(self, domain_id):
+        time.sleep(self.coalesce_window)
+
+        # The domain may have been deleted meanwhile
+        context, domain = self._pending_updates.pop(domain_id, (None, None))
 
-        if self._exceed_or_meet_threshold(results.count(True)):
+        if domain is not None:
+            self._update_domain(context, domain)
+
+    def _update_domain(self, context, domain):
+        """
+        :param context: Security context information.
+        :param domain: Domain to be updated
+        :return: None
+        """
+        LOG.info(_LI("Updating domain %s"), domain.name)
+
+        # Update the domain on each of the Pool Targets
+        if self._fan_out_to_targets(
+                self._update_domain_on_target, context, domain):
             LOG.debug('Consensus reached for updating domain %(domain)s '
                       'on pool targets' % {'domain': domain.name})
 
@@ -316,13 +488,13 @@ class Service(service.RPCService, service.Service):
         for also_notify in self.pool.also_notifies:
             self._update_domain_on_also_notify(context, also_notify, domain)
 
+        # See which nameservers already have another update in progress
+        cached_statuses = self._retrieve_cached_statuses(
+            context, domain, UPDATE_ACTION)
+
         # Send a NOTIFY to each nameserver
         for nameserver in self.pool.nameservers:
-            # See if there is already another update in progress
-            try:
-                update_status = self.cache.retrieve(
-                    context, nameserver.id, domain.id, UPDATE_ACTION)
-            except exceptions.PoolManagerStatusNotFound:
+            if nameserver.id not in cached_statuses:
                 update_status = self._build_status_object(
                     nameserver, domain, UPDATE_ACTION)
                 self.cache.store(context, update_status)
@@ -379,19 +551,19 @@ class Service(service.RPCService, service.Service):
         """
         LOG.info(_LI("Deleting domain %s"), domain.name)
 
-        results = []
+        # There is no point pushing any pending update
+        self._pending_updates.pop(domain.id, None)
+        self._synced_serials.pop(domain.id, None)
 
         # Delete the domain on each of the Pool Targets
-        for target in self.pool.targets:
-            results.append(
-                self._delete_domain_on_target(context, target, domain))
+        consensus = self._fan_out_to_targets(
+            self._delete_domain_on_target, context, domain, MAXIMUM_THRESHOLD)
 
         # TODO(kiall): We should monitor that the Domain is actually deleted
         #              correctly on each of the nameservers, rather than
         #              assuming a sucessful delete-on-target is OK as we have
         #              in the past.
-        if self._exceed_or_meet_threshold(
-                results.count(True), MAXIMUM_THRESHOLD):
+        if consensus:
             LOG.debug('Consensus reached for deleting domain %(domain)s '
                       'on pool targets' % {'domain': domain.name})
 
@@ -446,13 +618,22 @@ class Service(service.RPCService, service.Service):
         action = UPDATE_ACTION if domain.action == 'NONE' else domain.action
 
         with lockutils.lock('update-status-%s' % domain.id):
-            try:
-                current_status = self.cache.retrieve(
-                    context, nameserver.id, domain.id, action)
-            except exceptions.PoolManagerStatusNotFound:
+            # Take one snapshot of the cached statuses of the nameservers,
+            # which the consensus is then reached from
+            cached_statuses = self._retrieve_cached_statuses(
+                context, domain, action)
+
+            current_status = cached_statuses.get(nameserver.id)
+
+            if current_status is None:
                 current_status = self._build_status_object(
                     nameserver, domain, action)
                 self.cache.store(context, current_status)
+
+                # Only count the new status if the cache keeps it
+                if self.cache.keeps_statuses:
+                    cached_statuses[nameserver.id] = current_status
+
             cache_serial = current_status.serial_number
 
             LOG.debug('For domain %s : %s on nameserver %s the cache serial '
@@ -465,7 +646,11 @@ class Service(service.RPCService, service.Service):
                 current_status.serial_number = actual_serial
                 self.cache.store(context, current_status)
 
-            consensus_serial = self._get_consensus_serial(context, domain)
+            pm_statuses = self._retrieve_statuses(
+                context, domain, action, cached_statuses)
+
+            consensus_serial, error_serial = self._get_consensus_serials(
+                pm_statuses)
 
             # If there is a valid consensus serial we can still send a success
             # for that serial.
@@ -481,8 +666,9 @@ class Service(service.RPCService, service.Service):
                     context, domain.id, SUCCESS_STATUS, consensus_serial)
 
             if status == ERROR_STATUS:
-                error_serial = self._get_error_serial(
-                    context, domain, consensus_serial)
+                if not self._is_consensus(pm_statuses, ERROR_STATUS):
+                    error_serial = 0
+
                 if error_serial > consensus_serial or error_serial == 0:
                     LOG.warn(_LW('For domain %(domain)s '
                                  'the error serial is %(error_serial)s.') %
@@ -492,11 +678,65 @@ class Service(service.RPCService, service.Service):
                         context, domain.id, ERROR_STATUS, error_serial)
 
             if consensus_serial == domain.serial and self._is_consensus(
-                    context, domain, action, SUCCESS_STATUS,
-                    MAXIMUM_THRESHOLD):
+                    pm_statuses, SUCCESS_STATUS, MAXIMUM_THRESHOLD):
+                self._synced_serials[domain.id] = domain.serial
                 self._clear_cache(context, domain, action)
 
     # Utility Methods
+    def _fan_out_to_targets(self, method, context, domain, threshold=None):
+        """
+        Calls method(context, target, domain) for all the pool targets at
+        once, and returns whether enough of them succeeded.
+
+        Results are counted as they arrive, so this returns as soon as the
+        outcome is known rather than waiting for the slowest target, which is
+        left to finish in the background. Targets which have not finished by
+        the target timeout count as failed.
+        """
+        results = eventlet.queue.LightQueue()
+
+        def _call_target(target):
+            with self.target_semaphores[target.id]:
+                try:
+                    results.put(method(context, target, domain))
+                except Exception:
+                    LOG.exception(_LE("Unhandled failure acting on domain "
+                                      "%(domain)s on target %(target)s"),
+                                  {'domain': domain.name, 'target': target.id})
+                    results.put(False)
+
+        for target in self.pool.targets:
+            self.tg.add_thread(_call_target, target)
+
+        total = len(self.pool.targets)
+        success_count = 0
+        failure_count = 0
+        deadline = time.time() + self.target_timeout
+
+        while success_count + failure_count < total:
+            if self._exceed_or_meet_threshold(success_count, threshold):
+                return True
+
+            if not self._exceed_or_meet_threshold(
+                    total - failure_count, threshold):
+                return False
+
+            try:
+                result = results.get(timeout=max(deadline - time.time(), 0))
+            except eventlet.queue.Empty:
+                LOG.warn(_LW('%(count)d of %(total)d pool targets did not '
+                             'finish acting on domain %(domain)s in time') %
+                         {'count': total - success_count - failure_count,
+                          'total': total, 'domain': domain.name})
+                break
+
+            if result:
+                success_count += 1
+            else:
+                failure_count += 1
+
+        return self._exceed_or_meet_threshold(success_count, threshold)
+
     def _get_failed_domains(self, context, action):
         criterion = {
             'pool_id': CONF['service:pool_manager'].pool_id,
@@ -519,24 +759,8 @@ class Service(service.RPCService, service.Service):
         return self._percentage(
             count, len(self.pool.targets)) >= Decimal(threshold)
 
-    @staticmethod
-    def _get_sorted_serials(pool_manager_statuses, descending=False):
-        serials = []
-        for pool_manager_status in pool_manager_statuses:
-            serials.append(pool_manager_status.serial_number)
-        serials.sort(reverse=descending)
-        return serials
-
-    def _get_serials_ascending(self, pool_manager_statuses):
-        return self._get_sorted_serials(pool_manager_statuses)
-
-    def _get_serials_descending(self, pool_manager_statuses):
-        return self._get_sorted_serials(pool_manager_statuses, descending=True)
-
-    def _is_consensus(self, context, domain, action, status, threshold=None):
+    def _is_consensus(self, pool_manager_statuses, status, threshold=None):
         status_count = 0
-        pool_manager_statuses = self._retrieve_statuses(
-            context, domain, action)
         for pool_manager_status in pool_manager_statuses:
             if pool_manager_status.status == status:
                 status_count += 1
@@ -544,32 +768,34 @@ class Service(service.RPCService, service.Service):
             threshold = self.threshold
         return self._exceed_or_meet_threshold(status_count, threshold)
 
-    def _get_consensus_serial(self, context, domain):
+    def _get_consensus_serials(self, pool_manager_statuses):
+        """
+        Returns the consensus serial, the highest serial enough nameservers
+        have reached, and the error serial, the lowest non zero serial above
+        it, from a single pass over the sorted serials.
+
+        The error serial only applies when enough nameservers are in error.
+        """
         consensus_serial = 0
-        action = UPDATE_ACTION if domain.action == 'NONE' else domain.action
+        error_serial = 0
+
+        serials = sorted(
+            (pm_status.serial_number for pm_status in pool_manager_statuses),
+            reverse=True)
+
+        serial_count = 0
+        for serial, equal_serials in itertools.groupby(serials):
+            # The number of nameservers at this serial, or higher
+            serial_count += len(list(equal_serials))
 
-        pm_statuses = self._retrieve_statuses(context, domain, action)
-        for serial in self._get_serials_descending(pm_statuses):
-            serial_count = 0
-            for pm_status in pm_statuses:
-                if pm_status.serial_number >= serial:
-                    serial_count += 1
             if self._exceed_or_meet_threshold(serial_count, self.threshold):
                 consensus_serial = serial
                 break
-        return consensus_serial
 
-    def _get_error_serial(self, context, domain, consensus_serial):
-        error_serial = 0
-        action = UPDATE_ACTION if domain.action == 'NONE' else domain.action
+            if serial > 0:
+                error_serial = serial
 
-        if self._is_consensus(context, domain, action, ERROR_STATUS):
-            pm_statuses = self._retrieve_statuses(context, domain, action)
-            for serial in self._get_serials_ascending(pm_statuses):
-                if serial > consensus_serial:
-                    error_serial = serial
-                    break
-        return error_serial
+        return consensus_serial, error_serial
 
     # When we hear back from the nameserver, the serial_number is set to the
     # value the nameserver
@@ -645,12 +871,29 @@ class Service(service.RPCService, service.Service):
 
         return pool_manager_status
 
-    def _retrieve_statuses(self, context, domain, action):
+    def _retrieve_cached_statuses(self, context, domain, action):
+        """
+        Retrieves the cached statuses of all the nameservers at once, by
+        nameserver id.
+        """
+        pool_manager_statuses = self.cache.retrieve_many(
+            context, [nameserver.id for nameserver in self.pool.nameservers],
+            domain.id, action)
+
+        return dict((pool_manager_status.nameserver_id, pool_manager_status)
+                    for pool_manager_status in pool_manager_statuses)
+
+    def _retrieve_statuses(self, context, domain, action,
+                           cached_statuses=None):
+        if cached_statuses is None:
+            cached_statuses = self._retrieve_cached_statuses(
+                context, domain, action)
+
         pool_manager_statuses = []
         for nameserver in self.pool.nameservers:
-            try:
-                pool_manager_status = self.cache.retrieve(
-                    context, nameserver.id, domain.id, action)
+            pool_manager_status = cached_statuses.get(nameserver.id)
+
+            if pool_manager_status is not None:
                 LOG.debug('Cache hit! Retrieved status %s and serial %s '
                           'for domain %s on nameserver %s with action %s from '
                           'the cache.' %
@@ -658,7 +901,7 @@ class Service(service.RPCService, service.Service):
                            pool_manager_status.serial_number,
                            domain.name,
                            self._get_destination(nameserver), action))
-            except exceptions.PoolManagerStatusNotFound:
+            else:
                 LOG.debug('Cache miss! Did not retrieve status and serial '
                           'for domain %s on nameserver %s with action %s from '
                           'the cache. Getting it from the server.' %
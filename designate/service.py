@@ -18,12 +18,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 import abc
+import collections
 import socket
 import struct
 import errno
 import time
 
 import six
+import eventlet.event
+import eventlet.queue
+import eventlet.semaphore
 import eventlet.wsgi
 from oslo import messaging
 from oslo.config import cfg
@@ -225,6 +229,74 @@ class WSGIService(object):
                              log=loggers.WritableLogger(logger))
 
 
+class DNSRequestQueue(object):
+    """
+    A bounded queue of DNS requests, handled by a fixed number of workers.
+
+    Requests which arrive while the queue is full are rejected rather than
+    queued, so that a flood of queries can't spawn an unbounded number of
+    threads all waiting on the database.
+    """
+    def __init__(self, name, handler, size, workers):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+
+        self._queue = eventlet.queue.LightQueue(size)
+        self._saturated = False
+
+        self.handled = 0
+        self.dropped = 0
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    def start(self, tg):
+        for i in range(self.workers):
+            tg.add_thread(self._worker)
+
+    def put(self, *args, **kwargs):
+        """
+        Queue a request, returning False if it was rejected as the queue is
+        full.
+        """
+        try:
+            self._queue.put_nowait((args, kwargs))
+        except eventlet.queue.Full:
+            self.dropped += 1
+
+            if not self._saturated:
+                LOG.warning(_LW("The %(name)s request queue is full, "
+                                "requests are being rejected") %
+                            {'name': self.name})
+                self._saturated = True
+
+            return False
+
+        self._saturated = False
+        return True
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'handled': self.handled,
+            'dropped': self.dropped,
+        }
+
+    def _worker(self):
+        while True:
+            args, kwargs = self._queue.get()
+
+            try:
+                self.handler(*args, **kwargs)
+            except Exception:
+                LOG.exception(_LE("Unhandled exception in %(name)s request "
+                                  "worker") % {'name': self.name})
+            finally:
+                self.handled += 1
+
+
 @six.add_metaclass(abc.ABCMeta)
 class DNSService(object):
     """
@@ -242,6 +314,25 @@ class DNSService(object):
             self._service_config.host,
             self._service_config.port)
 
+        # The address the queries are received on, with any port picked by
+        # the OS, which the queue statistics are reported for
+        self._dns_interface = '%s:%d' % self._dns_sock_udp.getsockname()[:2]
+
+        self._dns_queue_tcp = DNSRequestQueue(
+            'tcp', self._dns_handle,
+            self._service_config.query_queue_size,
+            self._service_config.query_workers)
+
+        self._dns_queue_udp = DNSRequestQueue(
+            'udp', self._dns_handle,
+            self._service_config.query_queue_size,
+            self._service_config.query_workers)
+
+        # The queries still being answered on each open TCP connection
+        # waiting for its next query, or None while a query is being read.
+        # The connection which started waiting the longest ago comes first.
+        self._dns_conns_tcp = collections.OrderedDict()
+
     @abc.abstractproperty
     def _dns_application(self):
         pass
@@ -249,9 +340,44 @@ class DNSService(object):
     def start(self):
         super(DNSService, self).start()
 
+        self._dns_queue_tcp.start(self.tg)
+        self._dns_queue_udp.start(self.tg)
+
         self.tg.add_thread(self._dns_handle_tcp)
         self.tg.add_thread(self._dns_handle_udp)
 
+        interval = self._service_config.query_stats_interval
+
+        if interval > 0:
+            self.tg.add_timer(interval, self._dns_log_stats, interval)
+
+    def get_dns_stats(self):
+        """
+        Returns the depth and counters of the TCP and UDP request queues, by
+        the host:port of the interface they serve
+        """
+        return {
+            self._dns_interface: {
+                'tcp': self._dns_queue_tcp.stats(),
+                'udp': self._dns_queue_udp.stats(),
+            }
+        }
+
+    def _dns_log_stats(self):
+        for interface, stats in self.get_dns_stats().items():
+            LOG.info(_LI("DNS queries on %(interface)s: TCP queue depth "
+                         "%(tcp_depth)d, %(tcp_handled)d handled, "
+                         "%(tcp_dropped)d dropped; UDP queue depth "
+                         "%(udp_depth)d, %(udp_handled)d handled, "
+                         "%(udp_dropped)d dropped") %
+                     {'interface': interface,
+                      'tcp_depth': stats['tcp']['depth'],
+                      'tcp_handled': stats['tcp']['handled'],
+                      'tcp_dropped': stats['tcp']['dropped'],
+                      'udp_depth': stats['udp']['depth'],
+                      'udp_handled': stats['udp']['handled'],
+                      'udp_dropped': stats['udp']['dropped']})
+
     def wait(self):
         super(DNSService, self).wait()
 
@@ -266,71 +392,251 @@ class DNSService(object):
         while True:
             client, addr = self._dns_sock_tcp.accept()
 
-            if self._service_config.tcp_recv_timeout:
-                client.settimeout(self._service_config.tcp_recv_timeout)
-
-            LOG.debug("Handling TCP Request from: %(host)s:%(port)d" %
+            LOG.debug("Handling TCP Connection from: %(host)s:%(port)d" %
                       {'host': addr[0], 'port': addr[1]})
 
-            # Prepare a variable for the payload to be buffered
-            payload = ""
+            if not self._dns_make_room_tcp():
+                LOG.warning(_LW("Refusing TCP Connection from "
+                                "%(host)s:%(port)d, too many connections "
+                                "are open") %
+                            {'host': addr[0], 'port': addr[1]})
+                client.close()
+                continue
 
-            try:
-                # Receive the first 2 bytes containing the payload length
+            self._dns_conns_tcp[client] = None
+
+            # Each connection is read from in its own thread, so that a slow
+            # client doesn't hold up accepting others.
+            self.tg.add_thread(self._dns_handle_tcp_conn, addr, client)
+
+    def _dns_make_room_tcp(self):
+        """
+        Make room for a new TCP connection, by closing the connection idle
+        the longest when there are tcp_max_connections open. Returns False
+        when none of the connections are idle.
+        """
+        max_connections = self._service_config.tcp_max_connections
+
+        if not max_connections or len(self._dns_conns_tcp) < max_connections:
+            return True
+
+        for client, pending in six.iteritems(self._dns_conns_tcp):
+            # A connection is idle while it waits for a query with none
+            # left to answer
+            if pending is not None and all(e.ready() for e in pending):
+                # The connection is forgotten once its thread closes it
+                self._dns_conns_tcp[client] = None
+                self._dns_close_tcp(client)
+                return True
+
+        return False
+
+    def _dns_set_waiting_tcp(self, client, pending):
+        if client not in self._dns_conns_tcp:
+            return
+
+        if pending is not None:
+            # Move the connection to the end, as the most recently waiting
+            del self._dns_conns_tcp[client]
+
+        self._dns_conns_tcp[client] = pending
+
+    @staticmethod
+    def _dns_recv(client, length):
+        """
+        Receive exactly length bytes from a TCP client, or fewer if the
+        client closes the connection first.
+        """
+        data = ""
+
+        while len(data) < length:
+            chunk = client.recv(length - len(data))
+            if not chunk:
+                break
+            data += chunk
+
+        return data
+
+    def _dns_handle_tcp_conn(self, addr, client):
+        """
+        Handle a TCP connection, which may carry any number of queries
+        (RFC 7766).
+
+        Each query is dispatched to a thread of its own as soon as it has been
+        read, so pipelined queries are answered in the order they complete.
+        The connection is closed once the client closes it, or sends nothing
+        for tcp_idle_timeout seconds, and every query has been answered. It
+        may also be closed while idle to make room for a new connection.
+
+        :param addr: Tuple of the client's (IP, Port)
+        :param client: Client socket
+        """
+        idle_timeout = self._service_config.tcp_idle_timeout or None
+        recv_timeout = self._service_config.tcp_recv_timeout or None
+
+        # Responses are sent by the thread handling each query, they must not
+        # be interleaved with one another.
+        send_lock = eventlet.semaphore.Semaphore()
+        pending = []
+
+        try:
+            while True:
+                pending = [e for e in pending if not e.ready()]
+
+                # Wait for the start of the next query
+                self._dns_set_waiting_tcp(client, pending)
+                client.settimeout(idle_timeout)
                 expected_length_raw = client.recv(2)
+                self._dns_set_waiting_tcp(client, None)
+
+                if not expected_length_raw:
+                    # The client closed the connection
+                    break
+
+                # Receive the rest of the 2 bytes containing the payload
+                # length, and then the payload.
+                client.settimeout(recv_timeout)
+                expected_length_raw += self._dns_recv(
+                    client, 2 - len(expected_length_raw))
+
+                if len(expected_length_raw) < 2:
+                    break
+
                 (expected_length, ) = struct.unpack('!H', expected_length_raw)
+                payload = self._dns_recv(client, expected_length)
 
-                # Keep receiving data until we've got all the data we expect
-                while len(payload) < expected_length:
-                    data = client.recv(65535)
-                    if not data:
-                        break
-                    payload += data
+                if len(payload) < expected_length:
+                    break
 
-            except socket.timeout:
-                client.close()
-                LOG.warn(_LW("TCP Timeout from: %(host)s:%(port)d") %
-                         {'host': addr[0], 'port': addr[1]})
+                LOG.debug("Handling TCP Request from: %(host)s:%(port)d" %
+                          {'host': addr[0], 'port': addr[1]})
 
-            # Dispatch a thread to handle the query
-            self.tg.add_thread(self._dns_handle, addr, payload, client=client)
+                # Queue the query to be handled by a worker
+                done = eventlet.event.Event()
+                queued = self._dns_queue_tcp.put(
+                    addr, payload, client=client, send_lock=send_lock,
+                    done=done)
+
+                if queued:
+                    pending.append(done)
+                else:
+                    # The client is waiting for an answer, so rather than
+                    # dropping the query, it is REFUSED.
+                    refused = dnsutils.build_refused_wire(payload)
+
+                    if refused is not None:
+                        self._dns_send_tcp(client, refused, send_lock)
+
+        except socket.timeout:
+            LOG.debug("TCP Timeout from: %(host)s:%(port)d" %
+                      {'host': addr[0], 'port': addr[1]})
+
+        except socket.error as e:
+            LOG.debug("TCP Error from: %(host)s:%(port)d: %(error)s" %
+                      {'host': addr[0], 'port': addr[1], 'error': e})
+
+        finally:
+            # Let the queries still being handled send their responses
+            for done in pending:
+                done.wait()
+
+            self._dns_conns_tcp.pop(client, None)
+            client.close()
 
     def _dns_handle_udp(self):
         LOG.info(_LI("_handle_udp thread started"))
 
         while True:
-            # TODO(kiall): Determine the appropriate default value for
-            #              UDP recvfrom.
-            payload, addr = self._dns_sock_udp.recvfrom(8192)
+            payload, addr = self._dns_sock_udp.recvfrom(
+                self._service_config.udp_recv_size)
 
             LOG.debug("Handling UDP Request from: %(host)s:%(port)d" %
                      {'host': addr[0], 'port': addr[1]})
 
-            self.tg.add_thread(self._dns_handle, addr, payload)
+            # Requests which can't be queued are dropped, the client will
+            # retry once the flood has passed.
+            self._dns_queue_udp.put(addr, payload)
 
-    def _dns_handle(self, addr, payload, client=None):
+    @staticmethod
+    def _dns_send_tcp(client, response, send_lock):
+        """
+        Send a response, made of one or more messages, to a TCP client.
+
+        Each message is serialized before send_lock is taken, so responses to
+        the other queries on the connection aren't held up while the next
+        message of a long transfer is read from storage.
+        """
+        if isinstance(response, six.string_types):
+            response = [response]
+
+        for message in response:
+            msg_length = len(message)
+            tcp_response = struct.pack("!H", msg_length) + message
+
+            with send_lock:
+                client.sendall(tcp_response)
+
+    @staticmethod
+    def _dns_close_tcp(client):
+        """
+        Shut a TCP connection down, waking the thread reading from it, which
+        then closes it
+        """
+        try:
+            client.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+
+    def _dns_handle(self, addr, payload, client=None, send_lock=None,
+                    done=None):
         """
         Handle a DNS Query
 
         :param addr: Tuple of the client's (IP, Port)
         :param payload: Raw DNS query payload
         :param client: Client socket (for TCP only)
+        :param send_lock: Lock held while sending the response to the client
+                          (for TCP only)
+        :param done: Event sent once the query has been handled
         """
         try:
-            # Call into the DNS Application itself with the payload and addr
-            response = self._dns_application({
-                'payload': payload,
-                'addr': addr
-            })
+            try:
+                # Call into the DNS Application itself with the payload and
+                # addr
+                response = self._dns_application({
+                    'payload': payload,
+                    'addr': addr,
+                    'protocol': 'tcp' if client else 'udp',
+                })
+            except Exception:
+                LOG.exception(_LE("Unhandled exception while processing "
+                                  "request from %(host)s:%(port)d") %
+                              {'host': addr[0], 'port': addr[1]})
+
+                # Answer the query, rather than leaving the client waiting
+                response = dnsutils.build_servfail_wire(payload)
+
+                if response is None and client:
+                    self._dns_close_tcp(client)
 
             # Send back a response only if present
             if response is not None:
                 if client:
-                    # Handle TCP Responses
-                    msg_length = len(response)
-                    tcp_response = struct.pack("!H", msg_length) + response
-                    client.send(tcp_response)
-                    client.close()
+                    # Handle TCP Responses, which may be a sequence of
+                    # messages sent as they are serialized.
+                    if send_lock is None:
+                        send_lock = eventlet.semaphore.Semaphore()
+
+                    try:
+                        self._dns_send_tcp(client, response, send_lock)
+                    except Exception:
+                        # Part of the response may have been sent, the
+                        # client must not mistake it for the whole of it.
+                        LOG.exception(_LE("Failed sending the response to "
+                                          "%(host)s:%(port)d, closing the "
+                                          "connection") %
+                                      {'host': addr[0], 'port': addr[1]})
+                        self._dns_close_tcp(client)
                 else:
                     # Handle UDP Responses
                     self._dns_sock_udp.sendto(response, addr)
@@ -340,6 +646,10 @@ class DNSService(object):
                               "from %(host)s:%(port)d") %
                           {'host': addr[0], 'port': addr[1]})
 
+        finally:
+            if done is not None:
+                done.send()
+
 _launcher = None
 
 
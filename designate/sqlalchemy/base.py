@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import contextlib
 import threading
 
 import six
@@ -22,7 +23,8 @@ from oslo_db import exception as oslo_db_exception
 from oslo_log import log as logging
 from oslo_utils import timeutils
 from sqlalchemy import exc as sqlalchemy_exc
-from sqlalchemy import select, or_
+from sqlalchemy import bindparam, func, select, or_
+from sqlalchemy.types import TypeDecorator
 
 from designate import exceptions
 from designate.sqlalchemy import session
@@ -31,13 +33,17 @@ from designate.sqlalchemy import utils
 
 LOG = logging.getLogger(__name__)
 
+# NOTE: Keep IN (...) clauses comfortably below the bound parameter limits
+#       of the backends we support (SQLite defaults to 999).
+RELATION_BATCH_SIZE = 500
+
 
 def _set_object_from_model(obj, model, **extra):
     """Update a DesignateObject with the values from a SQLA Model"""
 
-    for fieldname in obj.FIELDS.keys():
+    for fieldname in obj.FIELDS:
         if hasattr(model, fieldname):
-            if fieldname in extra.keys():
+            if fieldname in extra:
                 obj[fieldname] = extra[fieldname]
             else:
                 obj[fieldname] = getattr(model, fieldname)
@@ -47,6 +53,18 @@ def _set_object_from_model(obj, model, **extra):
     return obj
 
 
+def _set_object_from_values(obj, values):
+    """Update a DesignateObject with the values written to a row"""
+
+    for fieldname in obj.FIELDS.keys():
+        if fieldname in values:
+            obj[fieldname] = values[fieldname]
+
+    obj.obj_reset_changes()
+
+    return obj
+
+
 def _set_listobject_from_models(obj, models, map_=None):
         for model in models:
             extra = {}
@@ -70,6 +88,9 @@ class SQLAlchemy(object):
 
         self.engine = session.get_engine(self.get_name())
 
+        # A ReplicaSet, when reads may be served by replicas of the database
+        self.replicas = None
+
         self.local_store = threading.local()
 
     @abc.abstractmethod
@@ -97,6 +118,36 @@ class SQLAlchemy(object):
     def rollback(self):
         self.session.rollback()
 
+    @contextlib.contextmanager
+    def replica_reads(self, context):
+        """
+        Serve the reads made within the block from a replica, if one is
+        usable. Reads made inside a transaction always use the primary.
+        """
+        if (self.replicas is None or
+                getattr(self.local_store, 'replica_scope', False)):
+            yield
+            return
+
+        self.local_store.replica_scope = True
+        self.local_store.replica = self.replicas.choose()
+
+        try:
+            yield
+        finally:
+            self.local_store.replica_scope = False
+            self.local_store.replica = None
+
+    @property
+    def read_session(self):
+        """The session, or replica engine, to execute read queries with"""
+        replica = getattr(self.local_store, 'replica', None)
+
+        if replica is None or self.session.transaction is not None:
+            return self.session
+
+        return replica
+
     def _apply_criterion(self, table, query, criterion):
         if criterion is not None:
             for name, value in criterion.items():
@@ -191,6 +242,119 @@ class SQLAlchemy(object):
 
         return _set_object_from_model(obj, resultproxy.fetchone())
 
+    @staticmethod
+    def _get_column_defaults(table, values, onupdate=False):
+        """
+        Evaluate the client side defaults of the columns missing from values
+
+        Returns the names of any missing columns with a server side default
+        only, whose values can only be known by reading the row back.
+        """
+        server_defaults = []
+
+        for column in table.columns:
+            if column.name in values:
+                continue
+
+            default = column.onupdate if onupdate else column.default
+
+            if default is not None and default.is_scalar:
+                values[column.name] = default.arg
+            elif default is not None and default.is_callable:
+                values[column.name] = default.arg(None)
+            elif not onupdate and column.server_default is not None:
+                server_defaults.append(column.name)
+            elif not onupdate:
+                values[column.name] = None
+
+        return server_defaults
+
+    def _as_read(self, table, values):
+        """
+        Convert written values to those a read of the row would return, for
+        the columns of types which normalize their values, e.g. UUIDs.
+        """
+        dialect = self.engine.dialect
+        values = dict(values)
+
+        for name, value in values.items():
+            if name not in table.c:
+                continue
+
+            type_ = table.c[name].type
+
+            if isinstance(type_, TypeDecorator):
+                values[name] = type_.process_result_value(
+                    type_.process_bind_param(value, dialect), dialect)
+
+        return values
+
+    @staticmethod
+    def _group_rows(rows):
+        """Group rows by their set of keys, as executemany needs"""
+        groups = {}
+
+        for row in rows:
+            groups.setdefault(frozenset(row[1].keys()), []).append(row)
+
+        return groups.values()
+
+    def _create_many(self, table, objs, exc_dup, skip_values=None,
+                     extra_values=None):
+        """
+        Insert many objects, with one executemany INSERT per set of columns
+
+        The client side column defaults are evaluated up front, so the objects
+        are updated from the inserted values rather than by reading each row
+        back. Only columns with a server side default, and no value, need a
+        single read of the inserted rows afterwards.
+
+        :param extra_values: A list of dicts of extra values, one per object.
+        """
+        rows = []
+        refetch = set()
+
+        for i, obj in enumerate(objs):
+            values = obj.obj_get_changes()
+
+            if skip_values is not None:
+                for skip_value in skip_values:
+                    values.pop(skip_value, None)
+
+            if extra_values is not None:
+                values.update(extra_values[i])
+
+            refetch.update(self._get_column_defaults(table, values))
+
+            rows.append((obj, values))
+
+        for group in self._group_rows(rows):
+            try:
+                self.session.execute(
+                    table.insert(), [dict(row) for _, row in group])
+            except oslo_db_exception.DBDuplicateEntry:
+                raise exc_dup()
+
+        for obj, values in rows:
+            _set_object_from_values(obj, self._as_read(table, values))
+
+        if refetch:
+            self._refetch_columns(table, objs, refetch)
+
+        return objs
+
+    def _refetch_columns(self, table, objs, columns):
+        """Read the given columns of the objects rows back, in batches"""
+        objs_by_id = dict((obj.id, obj) for obj in objs)
+        ids = list(objs_by_id.keys())
+
+        for i in range(0, len(ids), RELATION_BATCH_SIZE):
+            query = select([table.c.id] + [table.c[c] for c in columns])\
+                .where(table.c.id.in_(ids[i:i + RELATION_BATCH_SIZE]))
+
+            for row in self.session.execute(query).fetchall():
+                _set_object_from_model(objs_by_id[row.id], row)
+
     def _find(self, context, table, cls, list_cls, exc_notfound, criterion,
               one=False, marker=None, limit=None, sort_key=None,
               sort_dir=None, query=None, apply_tenant_criteria=True):
@@ -205,13 +369,15 @@ class SQLAlchemy(object):
             query = self._apply_tenant_criteria(context, table, query)
         query = self._apply_deleted_criteria(context, table, query)
 
+        read_session = self.read_session
+
         # Execute the Query
         if one:
             # NOTE(kiall): If we expect one value, and two rows match, we raise
             #              a NotFound. Limiting to 2 allows us to determine
             #              when we need to raise, while selecting the minimal
             #              number of rows.
-            resultproxy = self.session.execute(query.limit(2))
+            resultproxy = read_session.execute(query.limit(2))
             results = resultproxy.fetchall()
 
             if len(results) != 1:
@@ -225,7 +391,7 @@ class SQLAlchemy(object):
                 marker_query = select([table]).where(table.c.id == marker)
 
                 try:
-                    marker_resultproxy = self.session.execute(marker_query)
+                    marker_resultproxy = read_session.execute(marker_query)
                     marker = marker_resultproxy.fetchone()
                     if marker is None:
                         raise exceptions.MarkerNotFound(
@@ -240,12 +406,15 @@ class SQLAlchemy(object):
                         raise
 
             try:
+                # NOTE: The id is unique, so (sort_key, id) fully orders the
+                #       rows, which keeps the pagination a simple seek.
+                sort_keys = [sort_key, 'id'] if sort_key != 'id' else ['id']
+
                 query = utils.paginate_query(
-                    query, table, limit,
-                    [sort_key, 'id', 'created_at'], marker=marker,
+                    query, table, limit, sort_keys, marker=marker,
                     sort_dir=sort_dir)
 
-                resultproxy = self.session.execute(query)
+                resultproxy = read_session.execute(query)
                 results = resultproxy.fetchall()
 
                 return _set_listobject_from_models(list_cls(), results)
@@ -258,6 +427,61 @@ class SQLAlchemy(object):
             except ValueError as value_error:
                 raise exceptions.ValueError(value_error.message)
 
+    def _count(self, context, table, criterion, query=None, limit=None):
+        """
+        Count the rows matching criterion
+
+        When limit is given, at most limit rows are counted, which costs no
+        more than reading that many ids rather than scanning every match.
+        """
+        if query is None:
+            query = select([table.c.id])
+
+        query = self._apply_criterion(table, query, criterion)
+        query = self._apply_tenant_criteria(context, table, query)
+        query = self._apply_deleted_criteria(context, table, query)
+
+        if limit is None:
+            query = query.with_only_columns([func.count(table.c.id)])
+        else:
+            query = select([func.count()]).select_from(
+                query.limit(limit).alias())
+
+        resultproxy = self.read_session.execute(query)
+        result = resultproxy.fetchone()
+
+        if result is None:
+            return 0
+
+        return result[0]
+
+    def _find_grouped(self, context, table, cls, list_cls, exc_notfound,
+                      group_key, group_ids):
+        """
+        Find all rows whose group_key column matches one of group_ids
+
+        Rather than issuing one query per parent object, the children of all
+        the parents are fetched using batched IN (...) queries, and returned
+        as a dict of group id to a list_cls instance. Every requested group id
+        is present in the result, even if no rows matched it.
+        """
+        group_ids = list(group_ids)
+        results = dict((group_id, list_cls()) for group_id in group_ids)
+
+        for i in range(0, len(group_ids), RELATION_BATCH_SIZE):
+            batch = group_ids[i:i + RELATION_BATCH_SIZE]
+
+            objs = self._find(context, table, cls, list_cls, exc_notfound,
+                              {group_key: batch})
+
+            for obj in objs:
+                results[getattr(obj, group_key)].append(obj)
+
+        for objs in results.values():
+            objs.obj_reset_changes()
+
+        return results
+
     def _update(self, context, table, obj, exc_dup, exc_notfound,
                 skip_values=None):
 
@@ -295,6 +519,60 @@ class SQLAlchemy(object):
 
         return _set_object_from_model(obj, resultproxy.fetchone())
 
+    def _update_many(self, context, table, objs, exc_dup, exc_notfound,
+                     skip_values=None):
+        """
+        Update many objects, with one executemany UPDATE per set of changed
+        columns
+
+        As with _create_many, the objects are updated from the written values
+        rather than by reading each row back. The version of each object is
+        incremented from the one it was read with.
+        """
+        rows = []
+
+        for obj in objs:
+            values = obj.obj_get_changes()
+
+            if skip_values is not None:
+                for skip_value in skip_values:
+                    values.pop(skip_value, None)
+
+            # The version is incremented in SQL, below
+            values.pop('version', None)
+
+            self._get_column_defaults(table, values, onupdate=True)
+
+            rows.append((obj, values))
+
+        sane_rowcount = self.engine.dialect.supports_sane_multi_rowcount
+
+        for group in self._group_rows(rows):
+            query = table.update().where(table.c.id == bindparam('_id'))
+
+            query = self._apply_tenant_criteria(context, table, query)
+            query = self._apply_deleted_criteria(context, table, query)
+            query = self._apply_version_increment(context, table, query)
+
+            try:
+                resultproxy = self.session.execute(
+                    query, [dict(row, _id=o.id) for o, row in group])
+            except oslo_db_exception.DBDuplicateEntry:
+                raise exc_dup()
+
+            if (sane_rowcount or len(group) == 1) and \
+                    resultproxy.rowcount != len(group):
+                raise exc_notfound()
+
+        for obj, values in rows:
+            if hasattr(table.c, 'version') and obj.obj_attr_is_set('version') \
+                    and obj.version is not None:
+                values['version'] = obj.version + 1
+
+            _set_object_from_values(obj, self._as_read(table, values))
+
+        return objs
+
     def _delete(self, context, table, obj, exc_notfound):
         if hasattr(table.c, 'deleted'):
             # Perform a Soft Delete
@@ -0,0 +1,128 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""Routing of reads to read replicas of the primary database"""
+import time
+
+from oslo_log import log as logging
+
+from designate.i18n import _LW
+
+
+LOG = logging.getLogger(__name__)
+
+
+class Replica(object):
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+
+        self.healthy = True
+        self.lag = 0
+        self.checked_at = None
+
+    def __repr__(self):
+        return '<Replica %s healthy=%s lag=%s>' % (
+            self.name, self.healthy, self.lag)
+
+
+class ReplicaSet(object):
+    """
+    Chooses the replica to read from, or None for the primary
+
+    Replicas are health checked lazily, at most once per check_interval,
+    as they're considered for a read. Replicas which fail the check, or lag
+    the primary by more than max_lag seconds, are skipped. When no replica
+    qualifies, reads fall back to the primary.
+
+    A chosen replica may still lag by up to max_lag plus check_interval
+    seconds, so only reads which tolerate that should be routed to one.
+    """
+
+    def __init__(self, replicas, check_interval, max_lag):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+
+        self._next = 0
+
+    def choose(self):
+        """Return the engine of a usable replica, or None for the primary"""
+        count = len(self.replicas)
+        start = self._next
+
+        for i in range(count):
+            replica = self.replicas[(start + i) % count]
+
+            self._check(replica)
+
+            if replica.healthy and replica.lag <= self.max_lag:
+                self._next = (start + i + 1) % count
+                return replica.engine
+
+        return None
+
+    def _check(self, replica):
+        now = time.time()
+
+        if (replica.checked_at is not None and
+                now - replica.checked_at < self.check_interval):
+            return
+
+        replica.checked_at = now
+
+        try:
+            lag = self._get_lag(replica.engine)
+        except Exception:
+            LOG.warn(_LW('Replica %s failed its health check, reading from '
+                         'the primary'), replica.name, exc_info=True)
+            replica.healthy = False
+            return
+
+        if lag is None:
+            LOG.warn(_LW('Replica %s is not replicating, reading from the '
+                         'primary'), replica.name)
+            replica.healthy = False
+            return
+
+        replica.healthy = True
+        replica.lag = lag
+
+    @staticmethod
+    def _get_lag(engine):
+        """
+        Return how many seconds engine is behind its primary, or None when
+        it has stopped replicating
+        """
+        dialect = engine.dialect.name
+
+        if dialect == 'mysql':
+            row = engine.execute('SHOW SLAVE STATUS').fetchone()
+
+            if row is None:
+                # Not a slave, so it can't lag
+                return 0
+
+            return row['Seconds_Behind_Master']
+
+        elif dialect == 'postgresql':
+            row = engine.execute(
+                'SELECT CASE WHEN pg_is_in_recovery() THEN '
+                'COALESCE(EXTRACT(EPOCH FROM now() - '
+                'pg_last_xact_replay_timestamp()), 0) ELSE 0 END').fetchone()
+
+            return row[0]
+
+        engine.execute('SELECT 1').fetchone()
+
+        return 0
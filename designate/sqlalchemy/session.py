@@ -41,8 +41,8 @@ def _create_facade_lazily(cfg_group, connection=None, discriminator=None):
     return _FACADES[cache_name]
 
 
-def get_engine(cfg_group):
-    facade = _create_facade_lazily(cfg_group)
+def get_engine(cfg_group, connection=None, discriminator=None):
+    facade = _create_facade_lazily(cfg_group, connection, discriminator)
     return facade.get_engine()
 
 
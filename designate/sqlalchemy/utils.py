@@ -98,6 +98,18 @@ def paginate_query(query, table, limit, sort_keys, marker=None,
             criteria_list.append(criteria)
 
         f = sqlalchemy.sql.or_(*criteria_list)
+
+        # Also bound the first sort key on its own. It is implied by the
+        # criteria above, but lets the database seek to the marker using an
+        # index on that column, rather than filtering every preceding row.
+        if marker_values[0] is not None:
+            table_attr = getattr(table.c, sort_keys[0])
+
+            if sort_dirs[0] == 'desc':
+                f = sqlalchemy.sql.and_(table_attr <= marker_values[0], f)
+            else:
+                f = sqlalchemy.sql.and_(table_attr >= marker_values[0], f)
+
         query = query.where(f)
 
     if limit is not None:
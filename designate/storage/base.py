@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 import abc
+import contextlib
 
 import six
 
@@ -27,6 +28,16 @@ class Storage(DriverPlugin):
     __plugin_ns__ = 'designate.storage'
     __plugin_type__ = 'storage'
 
+    @contextlib.contextmanager
+    def replica_reads(self, context):
+        """
+        Allow the reads made within the block to be served by a replica of
+        the storage, where the driver supports replicas.
+
+        :param context: RPC Context.
+        """
+        yield
+
     @abc.abstractmethod
     def create_quota(self, context, quota):
         """
@@ -287,6 +298,16 @@ class Storage(DriverPlugin):
         :param domain_id: Domain ID to delete.
         """
 
+    @abc.abstractmethod
+    def find_domain_names(self, context, criterion=None):
+        """
+        Find the id, name and pool_id of Domains, without loading their
+        other fields
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        """
+
     @abc.abstractmethod
     def count_domains(self, context, criterion=None):
         """
@@ -306,6 +327,16 @@ class Storage(DriverPlugin):
         :param recordset: RecordSet object with the values to be created.
         """
 
+    @abc.abstractmethod
+    def create_recordsets(self, context, domain_id, recordsets):
+        """
+        Create several recordsets on a given Domain ID at once
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to create the recordsets in.
+        :param recordsets: RecordSet objects with the values to be created.
+        """
+
     @abc.abstractmethod
     def get_recordset(self, context, recordset_id):
         """
@@ -439,6 +470,29 @@ class Storage(DriverPlugin):
         :param criterion: Criteria to filter by.
         """
 
+    @abc.abstractmethod
+    def update_records_status(self, context, criterion, values):
+        """
+        Update the status of every record matching the criterion at once,
+        without loading them.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param values: The status and/or action to set.
+        :returns: The number of records updated.
+        """
+
+    @abc.abstractmethod
+    def purge_records(self, context, criterion):
+        """
+        Delete every record matching the criterion at once, along with the
+        recordsets this leaves without records.
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :returns: The number of records deleted.
+        """
+
     @abc.abstractmethod
     def create_blacklist(self, context, blacklist):
         """
@@ -473,6 +527,15 @@ class Storage(DriverPlugin):
         :param sort_dir: Direction to sort after using sort_key.
         """
 
+    @abc.abstractmethod
+    def get_blacklists_version(self, context):
+        """
+        Get a value which changes whenever a Blacklist is created, updated
+        or deleted, so cached Blacklists can be checked without reading them.
+
+        :param context: RPC Context.
+        """
+
     @abc.abstractmethod
     def find_blacklist(self, context, criterion):
         """
@@ -621,6 +684,78 @@ class Storage(DriverPlugin):
         :param pool_attribute_id: The ID of the PoolAttribute to be deleted
         """
 
+    @abc.abstractmethod
+    def create_zone_change(self, context, domain_id, zone_change):
+        """
+        Record a change to a Domain in the change journal
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID the change was made to.
+        :param zone_change: ZoneChange object with the values to be created.
+        """
+
+    @abc.abstractmethod
+    def find_zone_changes(self, context, criterion=None, marker=None,
+                          limit=None, sort_key=None, sort_dir=None):
+        """
+        Find ZoneChanges
+
+        :param context: RPC Context.
+        :param criterion: Criteria to filter by.
+        :param marker: Resource ID from which after the requested page will
+                       start after
+        :param limit: Integer limit of objects of the page size after the
+                      marker
+        :param sort_key: Key from which to sort after.
+        :param sort_dir: Direction to sort after using sort_key.
+        """
+
+    @abc.abstractmethod
+    def delete_zone_changes(self, context, domain_id, keep=0):
+        """
+        Delete the journalled changes of a Domain
+
+        :param context: RPC Context.
+        :param domain_id: Domain ID to delete the changes of.
+        :param keep: Number of most recent serials to keep the changes of.
+        """
+
+    @abc.abstractmethod
+    def acquire_lock(self, context, name, holder, lease_time):
+        """
+        Take a named lock, unless another holder's lease on it is current.
+
+        :param context: RPC Context.
+        :param name: Name of the lock.
+        :param holder: Unique ID of the holder taking the lock.
+        :param lease_time: Seconds after which the lock may be taken over.
+        :returns: True if the lock was taken, False otherwise.
+        """
+
+    @abc.abstractmethod
+    def renew_lock(self, context, name, holder, lease_time):
+        """
+        Extend holder's lease on a named lock.
+
+        :param context: RPC Context.
+        :param name: Name of the lock.
+        :param holder: Unique ID of the holder which took the lock.
+        :param lease_time: Seconds from now after which the lock may be taken
+                           over.
+        :returns: True if the lease was renewed, False if holder lost it.
+        """
+
+    @abc.abstractmethod
+    def release_lock(self, context, name, holder):
+        """
+        Release a named lock, if holder still holds it.
+
+        :param context: RPC Context.
+        :param name: Name of the lock.
+        :param holder: Unique ID of the holder which took the lock.
+        :returns: True if the lock was released, False if holder lost it.
+        """
+
     def ping(self, context):
         """Ping the Storage connection"""
         return {
@@ -13,30 +13,53 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import datetime
 import time
 import hashlib
 
 from oslo.config import cfg
 from oslo_log import log as logging
+from oslo_db import exception as oslo_db_exception
 from oslo_db import options
-from sqlalchemy import select, distinct, func
+import six
+from sqlalchemy import select, distinct, exists, func, DateTime
 from sqlalchemy.sql.expression import or_
 
 from designate import exceptions
 from designate import objects
 from designate.sqlalchemy import base as sqlalchemy_base
+from designate.sqlalchemy import replicas
+from designate.sqlalchemy import session
 from designate.storage import base as storage_base
 from designate.storage.impl_sqlalchemy import tables
 
 
 LOG = logging.getLogger(__name__)
 
+TOTAL_COUNTS = ('exact', 'estimate', 'none')
+
+# The most matches counted for an estimated total count
+COUNT_ESTIMATE_LIMIT = 1000
+
 cfg.CONF.register_group(cfg.OptGroup(
     name='storage:sqlalchemy', title="Configuration for SQLAlchemy Storage"
 ))
 
 cfg.CONF.register_opts(options.database_opts, group='storage:sqlalchemy')
 
+cfg.CONF.register_opts([
+    cfg.ListOpt('replica-connections', default=[],
+                help='SQLAlchemy connection strings of read replicas of the '
+                     'database. Reads which tolerate lagging behind recent '
+                     'writes, made outside of a transaction, are spread '
+                     'across the healthy replicas.'),
+    cfg.IntOpt('replica-check-interval', default=10,
+               help='Seconds between health and lag checks of a replica'),
+    cfg.IntOpt('replica-max-lag', default=5,
+               help='Replicas lagging the primary by more than this many '
+                    'seconds are not read from'),
+], group='storage:sqlalchemy')
+
 
 class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     """SQLAlchemy connection"""
@@ -45,9 +68,61 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     def __init__(self):
         super(SQLAlchemyStorage, self).__init__()
 
+        connections = list(cfg.CONF[self.name].replica_connections)
+
+        if cfg.CONF[self.name].slave_connection:
+            connections.append(cfg.CONF[self.name].slave_connection)
+
+        if connections:
+            self.replicas = replicas.ReplicaSet(
+                [replicas.Replica('replica-%d' % i, session.get_engine(
+                    self.name, connection, 'replica-%d' % i))
+                 for i, connection in enumerate(connections)],
+                cfg.CONF[self.name].replica_check_interval,
+                cfg.CONF[self.name].replica_max_lag)
+
     def get_name(self):
         return self.name
 
+    def _pop_total_count(self, criterion):
+        """
+        Take the requested kind of total count out of the criterion, either
+        "exact" (the default), "estimate" or "none".
+        """
+        if criterion is None or 'total_count' not in criterion:
+            return criterion, 'exact'
+
+        criterion = dict(criterion)
+        total_count = criterion.pop('total_count')
+
+        if total_count not in TOTAL_COUNTS:
+            raise exceptions.BadRequest(
+                'total_count must be one of %s' % ', '.join(TOTAL_COUNTS))
+
+        return criterion, total_count
+
+    def _set_total_count(self, context, results, criterion, marker, limit,
+                         total_count, count_method):
+        if total_count == 'none':
+            results.total_count = None
+
+        elif marker is None and (limit is None or len(results) < int(limit)):
+            # The first page holds every match, there's nothing to count
+            results.total_count = len(results)
+
+        elif total_count == 'estimate':
+            # Count no further than COUNT_ESTIMATE_LIMIT matches, so the cost
+            # is bounded however many there are. The one extra match counted
+            # tells whether the count was capped.
+            count = count_method(context, criterion,
+                                 limit=COUNT_ESTIMATE_LIMIT + 1)
+
+            results.total_count = min(count, COUNT_ESTIMATE_LIMIT)
+            results.total_count_capped = count > COUNT_ESTIMATE_LIMIT
+
+        else:
+            results.total_count = count_method(context, criterion)
+
     # CRUD for our resources (quota, server, tsigkey, tenant, domain & record)
     # R - get_*, find_*s
     #
@@ -176,7 +251,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.domains, query)
         query = query.group_by(tables.domains.c.tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         tenant_list = objects.TenantList(
@@ -194,7 +269,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_deleted_criteria(context, tables.domains, query)
         query = query.where(tables.domains.c.tenant_id == tenant_id)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         results = resultproxy.fetchall()
 
         return objects.Tenant(
@@ -209,7 +284,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.domains, query)
         query = self._apply_deleted_criteria(context, tables.domains, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -222,6 +297,8 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     ##
     def _find_domains(self, context, criterion, one=False, marker=None,
                       limit=None, sort_key=None, sort_dir=None):
+        criterion, total_count = self._pop_total_count(criterion)
+
         # Check to see if the criterion can use the reverse_name column
         criterion = self._rname_check(criterion)
 
@@ -230,18 +307,27 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             exceptions.DomainNotFound, criterion, one, marker, limit,
             sort_key, sort_dir)
 
-        def _load_relations(domain):
-            if domain.type == 'SECONDARY':
-                domain.attributes = self._find_domain_attributes(
-                    context, {'domain_id': domain.id})
+        # Load Relations
+        def _load_relations(domains):
+            secondaries = [d for d in domains if d.type == 'SECONDARY']
+
+            if not secondaries:
+                return
+
+            attributes = self._find_domain_attributes_by_domain(
+                context, [d.id for d in secondaries])
+
+            for domain in secondaries:
+                domain.attributes = attributes[domain.id]
                 domain.obj_reset_changes(['attributes'])
 
         if one:
-            _load_relations(domains)
+            _load_relations([domains])
         else:
-            domains.total_count = self.count_domains(context, criterion)
-            for d in domains:
-                _load_relations(d)
+            self._set_total_count(
+                context, domains, criterion, marker, limit, total_count,
+                self._count_domains)
+            _load_relations(domains)
 
         return domains
 
@@ -338,6 +424,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                 data[rrset.name, rrset.type] = rrset
 
             keep = set()
+            create = []
             for rrset in domain.recordsets:
                 current = data.get((rrset.name, rrset.type))
 
@@ -347,8 +434,12 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                     self.update_recordset(context, current)
                     keep.add(current.id)
                 else:
-                    self.create_recordset(context, domain.id, rrset)
-                    keep.add(rrset.id)
+                    create.append(rrset)
+
+            # Create the new recordsets and all their records together
+            for rrset in self._create_recordsets(
+                    context, updated_domain, create):
+                keep.add(rrset.id)
 
             if domain.type == 'SECONDARY':
                 # Purge anything that shouldn't be there :P
@@ -375,19 +466,19 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._delete(context, tables.domains, domain,
                             exceptions.DomainNotFound)
 
-    def count_domains(self, context, criterion=None):
-        query = select([func.count(tables.domains.c.id)])
-        query = self._apply_criterion(tables.domains, query, criterion)
-        query = self._apply_tenant_criteria(context, tables.domains, query)
-        query = self._apply_deleted_criteria(context, tables.domains, query)
+    def find_domain_names(self, context, criterion=None):
+        query = select([tables.domains.c.id, tables.domains.c.name,
+                        tables.domains.c.pool_id])
 
-        resultproxy = self.session.execute(query)
-        result = resultproxy.fetchone()
+        return self._find(
+            context, tables.domains, objects.Domain, objects.DomainList,
+            exceptions.DomainNotFound, criterion, query=query)
 
-        if result is None:
-            return 0
+    def count_domains(self, context, criterion=None):
+        return self._count_domains(context, criterion)
 
-        return result[0]
+    def _count_domains(self, context, criterion, limit=None):
+        return self._count(context, tables.domains, criterion, limit=limit)
 
     # Domain attribute methods
     def _find_domain_attributes(self, context, criterion, one=False,
@@ -398,6 +489,12 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                           exceptions.DomainAttributeNotFound, criterion, one,
                           marker, limit, sort_key, sort_dir)
 
+    def _find_domain_attributes_by_domain(self, context, domain_ids):
+        return self._find_grouped(
+            context, tables.domain_attributes, objects.DomainAttribute,
+            objects.DomainAttributeList, exceptions.DomainAttributeNotFound,
+            'domain_id', domain_ids)
+
     def create_domain_attribute(self, context, domain_id, domain_attribute):
         domain_attribute.domain_id = domain_id
         return self._create(tables.domain_attributes, domain_attribute,
@@ -436,6 +533,8 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                          limit=None, sort_key=None, sort_dir=None):
         query = None
 
+        criterion, total_count = self._pop_total_count(criterion)
+
         # Check to see if the criterion can use the reverse_name column
         criterion = self._rname_check(criterion)
 
@@ -457,20 +556,24 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             one, marker, limit, sort_key, sort_dir, query)
 
         if not one:
-            recordsets.total_count = self.count_recordsets(context, criterion)
+            self._set_total_count(
+                context, recordsets, criterion, marker, limit, total_count,
+                self._count_recordsets)
 
         # Load Relations
-        def _load_relations(recordset):
-            recordset.records = self._find_records(
-                context, {'recordset_id': recordset.id})
+        def _load_relations(recordsets):
+            records = self._find_records_by_recordset(
+                context, [r.id for r in recordsets])
 
-            recordset.obj_reset_changes(['recordset'])
+            for recordset in recordsets:
+                recordset.records = records[recordset.id]
+
+                recordset.obj_reset_changes(['records'])
 
         if one:
-            _load_relations(recordsets)
+            _load_relations([recordsets])
         else:
-            for recordset in recordsets:
-                _load_relations(recordset)
+            _load_relations(recordsets)
 
         return recordsets
 
@@ -478,28 +581,51 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         # Fetch the domain as we need the tenant_id
         domain = self._find_domains(context, {'id': domain_id}, one=True)
 
-        recordset.tenant_id = domain.tenant_id
-        recordset.domain_id = domain_id
+        return self._create_recordsets(context, domain, [recordset])[0]
+
+    def create_recordsets(self, context, domain_id, recordsets):
+        # Fetch the domain once for the whole batch, as we need the tenant_id
+        domain = self._find_domains(context, {'id': domain_id}, one=True)
+
+        return objects.RecordSetList(
+            objects=self._create_recordsets(context, domain, recordsets))
+
+    def _create_recordsets(self, context, domain, recordsets):
+        """
+        Create recordsets and their records, with a single INSERT for all
+        the recordsets and another for all their records.
+        """
+        records = []
+
+        for recordset in recordsets:
+            recordset.tenant_id = domain.tenant_id
+            recordset.domain_id = domain.id
 
         # Patch in the reverse_name column
-        extra_values = {"reverse_name": recordset.name[::-1]}
+        extra_values = [{"reverse_name": recordset.name[::-1]}
+                        for recordset in recordsets]
 
-        recordset = self._create(
-            tables.recordsets, recordset, exceptions.DuplicateRecordSet,
+        self._create_many(
+            tables.recordsets, recordsets, exceptions.DuplicateRecordSet,
             ['records'], extra_values=extra_values)
 
-        if recordset.obj_attr_is_set('records'):
-            for record in recordset.records:
-                # NOTE: Since we're dealing with a mutable object, the return
-                #       value is not needed. The original item will be mutated
-                #       in place on the input "recordset.records" list.
-                self.create_record(context, domain_id, recordset.id, record)
-        else:
-            recordset.records = objects.RecordList()
+        for recordset in recordsets:
+            if recordset.obj_attr_is_set('records'):
+                # NOTE: Since we're dealing with mutable objects, the records
+                #       are mutated in place on the input "recordset.records"
+                #       list.
+                for record in recordset.records:
+                    self._prepare_record(
+                        domain.tenant_id, domain.id, recordset.id, record)
+                    records.append(record)
+            else:
+                recordset.records = objects.RecordList()
 
-        recordset.obj_reset_changes(['records'])
+            recordset.obj_reset_changes(['records'])
 
-        return recordset
+        self._create_many(tables.records, records, exceptions.DuplicateRecord)
+
+        return recordsets
 
     def get_recordset(self, context, recordset_id):
         return self._find_recordsets(context, {'id': recordset_id}, one=True)
@@ -514,10 +640,10 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._find_recordsets(context, criterion, one=True)
 
     def update_recordset(self, context, recordset):
-        recordset = self._update(
-            context, tables.recordsets, recordset,
+        recordset = self._update_many(
+            context, tables.recordsets, [recordset],
             exceptions.DuplicateRecordSet, exceptions.RecordSetNotFound,
-            ['records'])
+            ['records'])[0]
 
         if recordset.obj_attr_is_set('records'):
             # Gather the Record ID's we have
@@ -545,17 +671,28 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             #       "recordset.records" list.
 
             # Delete Records
-            for record_id in have_records - keep_records:
-                self.delete_record(context, record_id)
+            delete_records = have_records - keep_records
+
+            if delete_records:
+                self._delete_records(context, delete_records)
 
             # Update Records
             for record in update_records:
-                self.update_record(context, record)
+                if record.obj_what_changed():
+                    record.hash = self._recalculate_record_hash(record)
+
+            self._update_many(
+                context, tables.records, update_records,
+                exceptions.DuplicateRecord, exceptions.RecordNotFound)
 
             # Create Records
             for record in create_records:
-                self.create_record(
-                    context, recordset.domain_id, recordset.id, record)
+                self._prepare_record(
+                    recordset.tenant_id, recordset.domain_id, recordset.id,
+                    record)
+
+            self._create_many(
+                tables.records, create_records, exceptions.DuplicateRecord)
 
         return recordset
 
@@ -568,26 +705,20 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
                             exceptions.RecordSetNotFound)
 
     def count_recordsets(self, context, criterion=None):
+        return self._count_recordsets(context, criterion)
+
+    def _count_recordsets(self, context, criterion, limit=None):
         # Ensure that we return only active recordsets
         rjoin = tables.recordsets.join(
             tables.domains,
             tables.recordsets.c.domain_id == tables.domains.c.id)
 
-        query = select([func.count(tables.recordsets.c.id)]).\
+        query = select([tables.recordsets.c.id]).\
             select_from(rjoin).\
             where(tables.domains.c.deleted == '0')
 
-        query = self._apply_criterion(tables.recordsets, query, criterion)
-        query = self._apply_tenant_criteria(context, tables.recordsets, query)
-        query = self._apply_deleted_criteria(context, tables.recordsets, query)
-
-        resultproxy = self.session.execute(query)
-        result = resultproxy.fetchone()
-
-        if result is None:
-            return 0
-
-        return result[0]
+        return self._count(context, tables.recordsets, criterion, query,
+                           limit=limit)
 
     # Record Methods
     def _find_records(self, context, criterion, one=False, marker=None,
@@ -597,6 +728,11 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             exceptions.RecordNotFound, criterion, one, marker, limit,
             sort_key, sort_dir)
 
+    def _find_records_by_recordset(self, context, recordset_ids):
+        return self._find_grouped(
+            context, tables.records, objects.Record, objects.RecordList,
+            exceptions.RecordNotFound, 'recordset_id', recordset_ids)
+
     def _recalculate_record_hash(self, record):
         """
         Calculates the hash of the record, used to ensure record uniqueness.
@@ -606,14 +742,17 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return md5.hexdigest()
 
+    def _prepare_record(self, tenant_id, domain_id, recordset_id, record):
+        record.tenant_id = tenant_id
+        record.domain_id = domain_id
+        record.recordset_id = recordset_id
+        record.hash = self._recalculate_record_hash(record)
+
     def create_record(self, context, domain_id, recordset_id, record):
         # Fetch the domain as we need the tenant_id
         domain = self._find_domains(context, {'id': domain_id}, one=True)
 
-        record.tenant_id = domain.tenant_id
-        record.domain_id = domain_id
-        record.recordset_id = recordset_id
-        record.hash = self._recalculate_record_hash(record)
+        self._prepare_record(domain.tenant_id, domain_id, recordset_id, record)
 
         return self._create(
             tables.records, record, exceptions.DuplicateRecord)
@@ -644,6 +783,24 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         return self._delete(context, tables.records, record,
                             exceptions.RecordNotFound)
 
+    def _delete_records(self, context, record_ids):
+        """Delete records by id, in batches"""
+        record_ids = list(record_ids)
+        batch_size = sqlalchemy_base.RELATION_BATCH_SIZE
+
+        for i in range(0, len(record_ids), batch_size):
+            batch = record_ids[i:i + batch_size]
+
+            query = tables.records.delete().where(
+                tables.records.c.id.in_(batch))
+            query = self._apply_tenant_criteria(
+                context, tables.records, query)
+
+            resultproxy = self.session.execute(query)
+
+            if resultproxy.rowcount != len(batch):
+                raise exceptions.RecordNotFound()
+
     def count_records(self, context, criterion=None):
         # Ensure that we return only active records
         rjoin = tables.records.join(
@@ -658,7 +815,7 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
         query = self._apply_tenant_criteria(context, tables.records, query)
         query = self._apply_deleted_criteria(context, tables.records, query)
 
-        resultproxy = self.session.execute(query)
+        resultproxy = self.read_session.execute(query)
         result = resultproxy.fetchone()
 
         if result is None:
@@ -666,6 +823,54 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
 
         return result[0]
 
+    def update_records_status(self, context, criterion, values):
+        table = tables.records
+
+        query = table.update().values(values)
+        query = self._apply_criterion(table, query, criterion)
+        query = self._apply_tenant_criteria(context, table, query)
+        query = self._apply_version_increment(context, table, query)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount
+
+    def purge_records(self, context, criterion):
+        records = tables.records
+        recordsets = tables.recordsets
+
+        # Only the recordsets losing records may be left empty
+        query = select([distinct(records.c.recordset_id)])
+        query = self._apply_criterion(records, query, criterion)
+        query = self._apply_tenant_criteria(context, records, query)
+
+        recordset_ids = [row[0] for row in self.session.execute(query)]
+
+        if not recordset_ids:
+            return 0
+
+        query = records.delete()
+        query = self._apply_criterion(records, query, criterion)
+        query = self._apply_tenant_criteria(context, records, query)
+
+        count = self.session.execute(query).rowcount
+
+        batch_size = sqlalchemy_base.RELATION_BATCH_SIZE
+
+        for i in range(0, len(recordset_ids), batch_size):
+            batch = recordset_ids[i:i + batch_size]
+
+            remaining = select([records.c.id])\
+                .where(records.c.recordset_id == recordsets.c.id)
+
+            query = recordsets.delete()\
+                .where(recordsets.c.id.in_(batch))\
+                .where(~exists(remaining))
+
+            self.session.execute(query)
+
+        return count
+
     # Blacklist Methods
     def _find_blacklists(self, context, criterion, one=False, marker=None,
                          limit=None, sort_key=None, sort_dir=None):
@@ -690,6 +895,15 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     def find_blacklist(self, context, criterion):
         return self._find_blacklists(context, criterion, one=True)
 
+    def get_blacklists_version(self, context):
+        # Creating a blacklist changes the count and latest created_at,
+        # updating one its version and deleting one the count.
+        query = select([func.count(tables.blacklists.c.id),
+                        func.sum(tables.blacklists.c.version),
+                        func.max(tables.blacklists.c.created_at)])
+
+        return tuple(self.read_session.execute(query).fetchone())
+
     def update_blacklist(self, context, blacklist):
         return self._update(
             context, tables.blacklists, blacklist,
@@ -1100,6 +1314,108 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
             zone_transfer_accept,
             exceptions.ZoneTransferAcceptNotFound)
 
+    # Zone Change Methods
+    def _find_zone_changes(self, context, criterion, one=False, marker=None,
+                           limit=None, sort_key=None, sort_dir=None):
+        return self._find(
+            context, tables.zone_changes, objects.ZoneChange,
+            objects.ZoneChangeList, exceptions.ZoneChangeNotFound, criterion,
+            one, marker, limit, sort_key, sort_dir)
+
+    def create_zone_change(self, context, domain_id, zone_change):
+        zone_change.domain_id = domain_id
+
+        return self._create(
+            tables.zone_changes, zone_change, exceptions.DuplicateZoneChange)
+
+    def find_zone_changes(self, context, criterion=None, marker=None,
+                          limit=None, sort_key=None, sort_dir=None):
+        return self._find_zone_changes(context, criterion, marker=marker,
+                                       limit=limit, sort_key=sort_key,
+                                       sort_dir=sort_dir)
+
+    def delete_zone_changes(self, context, domain_id, keep=0):
+        table = tables.zone_changes
+
+        # Find the newest serial which is no longer to be kept, everything up
+        # to and including it is deleted.
+        query = select([table.c.serial])\
+            .where(table.c.domain_id == domain_id)\
+            .group_by(table.c.serial)\
+            .order_by(table.c.serial.desc())\
+            .offset(keep)\
+            .limit(1)
+
+        result = self.session.execute(query).fetchone()
+
+        if result is None:
+            return
+
+        query = table.delete()\
+                     .where(table.c.domain_id == domain_id)\
+                     .where(table.c.serial <= result[0])
+
+        self.session.execute(query)
+
+    # Lock Methods
+    def _get_lease_times(self, lease_time):
+        """
+        Return the current time, and when a lease taken now expires, by the
+        database's clock, so skew between the clocks of the hosts sharing
+        the locks can't shorten or lengthen the leases.
+        """
+        query = select([func.current_timestamp(type_=DateTime)])
+        now = self.session.execute(query).scalar()
+
+        return now, now + datetime.timedelta(seconds=lease_time)
+
+    def acquire_lock(self, context, name, holder, lease_time):
+        table = tables.locks
+
+        now, expires_at = self._get_lease_times(lease_time)
+
+        try:
+            self.session.execute(table.insert(), [{
+                'name': name, 'holder': holder, 'expires_at': expires_at}])
+            return True
+        except oslo_db_exception.DBDuplicateEntry:
+            pass
+
+        # Take over the lock if its holder let the lease expire
+        query = table.update()\
+                     .where(table.c.name == name)\
+                     .where(table.c.expires_at < now)\
+                     .values(holder=holder, expires_at=expires_at)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount == 1
+
+    def renew_lock(self, context, name, holder, lease_time):
+        table = tables.locks
+
+        now, expires_at = self._get_lease_times(lease_time)
+
+        query = table.update()\
+                     .where(table.c.name == name)\
+                     .where(table.c.holder == holder)\
+                     .values(expires_at=expires_at)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount == 1
+
+    def release_lock(self, context, name, holder):
+        table = tables.locks
+
+        query = table.delete()\
+                     .where(table.c.name == name)\
+                     .where(table.c.holder == holder)
+
+        resultproxy = self.session.execute(query)
+
+        return resultproxy.rowcount == 1
+
     # diagnostics
     def ping(self, context):
         start_time = time.time()
@@ -1119,6 +1435,10 @@ class SQLAlchemyStorage(sqlalchemy_base.SQLAlchemy, storage_base.Storage):
     # Reverse Name utils
     def _rname_check(self, criterion):
         # If the criterion has 'name' in it, switch it out for reverse_name
-        if criterion is not None and criterion.get('name', "").startswith('*'):
+        if criterion is not None:
+            name = criterion.get('name')
+
+            if isinstance(name, six.string_types) and name.startswith('*'):
                 criterion['reverse_name'] = criterion.pop('name')[::-1]
+
         return criterion
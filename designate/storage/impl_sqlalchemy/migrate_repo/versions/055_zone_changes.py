@@ -0,0 +1,65 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from sqlalchemy import (Integer, String, Text, DateTime, Enum, Index,
+                        ForeignKeyConstraint)
+from sqlalchemy.schema import Table, Column, MetaData
+
+from designate import utils
+from designate.sqlalchemy.types import UUID
+
+meta = MetaData()
+
+ZONE_CHANGE_ACTIONS = ['ADD', 'DELETE']
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    # Load the domains table, for the foreign key
+    Table('domains', meta, autoload=True)
+
+    zone_changes_table = Table('zone_changes', meta,
+        Column('id', UUID(), default=utils.generate_uuid, primary_key=True),
+        Column('version', Integer(), default=1, nullable=False),
+        Column('created_at', DateTime()),
+        Column('updated_at', DateTime()),
+
+        Column('domain_id', UUID(), nullable=False),
+        Column('serial', Integer(), nullable=False),
+        Column('action', Enum(name='zone_change_actions',
+                              *ZONE_CHANGE_ACTIONS), nullable=False),
+        Column('name', String(255), nullable=False),
+        Column('type', String(16), nullable=False),
+        Column('ttl', Integer(), nullable=False),
+        Column('data', Text(), nullable=False),
+
+        ForeignKeyConstraint(['domain_id'], ['domains.id'],
+                             ondelete='CASCADE'),
+
+        mysql_engine='InnoDB',
+        mysql_charset='utf8')
+
+    zone_changes_table.create()
+
+    index = Index('zone_changes_domain_serial',
+                  zone_changes_table.c.domain_id,
+                  zone_changes_table.c.serial)
+    index.create(migrate_engine)
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    zone_changes_table = Table('zone_changes', meta, autoload=True)
+    zone_changes_table.drop()
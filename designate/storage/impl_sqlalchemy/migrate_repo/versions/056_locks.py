@@ -0,0 +1,38 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from sqlalchemy import String, DateTime
+from sqlalchemy.schema import Table, Column, MetaData
+
+meta = MetaData()
+
+
+def upgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    locks_table = Table('locks', meta,
+        Column('name', String(255), primary_key=True),
+        Column('holder', String(36), nullable=False),
+        Column('expires_at', DateTime(), nullable=False),
+
+        mysql_engine='InnoDB',
+        mysql_charset='utf8')
+
+    locks_table.create()
+
+
+def downgrade(migrate_engine):
+    meta.bind = migrate_engine
+
+    locks_table = Table('locks', meta, autoload=True)
+    locks_table.drop()
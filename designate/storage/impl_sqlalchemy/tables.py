@@ -35,6 +35,7 @@ TSIG_ALGORITHMS = ['hmac-md5', 'hmac-sha1', 'hmac-sha224', 'hmac-sha256',
 TSIG_SCOPES = ['POOL', 'ZONE']
 POOL_PROVISIONERS = ['UNMANAGED']
 ACTIONS = ['CREATE', 'DELETE', 'UPDATE', 'NONE']
+ZONE_CHANGE_ACTIONS = ['ADD', 'DELETE']
 
 ZONE_ATTRIBUTE_KEYS = ('master',)
 
@@ -185,6 +186,36 @@ records = Table('records', metadata,
     mysql_charset='utf8',
 )
 
+zone_changes = Table('zone_changes', metadata,
+    Column('id', UUID, default=utils.generate_uuid, primary_key=True),
+    Column('version', Integer(), default=1, nullable=False),
+    Column('created_at', DateTime, default=lambda: timeutils.utcnow()),
+    Column('updated_at', DateTime, onupdate=lambda: timeutils.utcnow()),
+
+    Column('domain_id', UUID, nullable=False),
+    Column('serial', Integer(), nullable=False),
+    Column('action', Enum(name='zone_change_actions', *ZONE_CHANGE_ACTIONS),
+           nullable=False),
+    Column('name', String(255), nullable=False),
+    Column('type', String(16), nullable=False),
+    Column('ttl', Integer, nullable=False),
+    Column('data', Text, nullable=False),
+
+    ForeignKeyConstraint(['domain_id'], ['domains.id'], ondelete='CASCADE'),
+
+    mysql_engine='InnoDB',
+    mysql_charset='utf8',
+)
+
+locks = Table('locks', metadata,
+    Column('name', String(255), primary_key=True),
+    Column('holder', String(36), nullable=False),
+    Column('expires_at', DateTime, nullable=False),
+
+    mysql_engine='InnoDB',
+    mysql_charset='utf8',
+)
+
 tsigkeys = Table('tsigkeys', metadata,
     Column('id', UUID, default=utils.generate_uuid, primary_key=True),
     Column('version', Integer(), default=1, nullable=False),
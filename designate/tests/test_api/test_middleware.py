@@ -27,6 +27,7 @@ from designate.api import middleware
 
 class FakeRequest(object):
     def __init__(self):
+        self.method = 'GET'
         self.headers = {}
         self.environ = {}
         self.params = {}
@@ -60,6 +61,7 @@ class KeystoneContextMiddlewareTest(ApiTestCase):
         self.assertEqual('UserID', context.user)
         self.assertEqual('TenantID', context.tenant)
         self.assertEqual(['admin', 'Member'], context.roles)
+        self.assertTrue(context.stale_reads)
 
     def test_process_request_invalid_keystone_token(self):
         app = middleware.KeystoneContextMiddleware({})
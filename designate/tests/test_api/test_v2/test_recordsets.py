@@ -19,6 +19,7 @@ from oslo_log import log as logging
 
 from designate import exceptions
 from designate.central import service as central_service
+from designate.storage import impl_sqlalchemy
 from designate.tests.test_api.test_v2 import ApiV2TestCase
 
 LOG = logging.getLogger(__name__)
@@ -86,6 +87,77 @@ class ApiV2RecordSetsTest(ApiV2TestCase):
         self.assertEqual('UPDATE', response.json['action'])
         self.assertEqual('PENDING', response.json['status'])
 
+    def test_create_recordsets(self):
+        fixtures = [
+            self.get_recordset_fixture(
+                self.domain['name'], 'A', fixture=0,
+                values={'records': ['192.0.2.1']}),
+            self.get_recordset_fixture(
+                self.domain['name'], 'A', fixture=1,
+                values={'records': ['192.0.2.2']}),
+        ]
+
+        response = self.client.post_json(
+            '/zones/%s/recordsets' % self.domain['id'], fixtures)
+
+        # Check the headers are what we expect
+        self.assertEqual(202, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+
+        # Check the body structure is what we expect
+        self.assertIn('recordsets', response.json)
+        self.assertEqual(2, len(response.json['recordsets']))
+        self.assertEqual(
+            set([fixture['name'] for fixture in fixtures]),
+            set([rs['name'] for rs in response.json['recordsets']]))
+
+        for recordset in response.json['recordsets']:
+            self.assertIn('id', recordset)
+            self.assertEqual('CREATE', recordset['action'])
+            self.assertEqual('PENDING', recordset['status'])
+
+    def test_create_recordsets_empty(self):
+        self._assert_exception(
+            'bad_request', 400, self.client.post_json,
+            '/zones/%s/recordsets' % self.domain['id'], [])
+
+    def test_create_recordsets_soa(self):
+        fixtures = [
+            self.get_recordset_fixture(self.domain['name'], fixture=0),
+            self.get_recordset_fixture(
+                self.domain['name'], values={'type': 'SOA'}),
+        ]
+
+        self._assert_exception(
+            'bad_request', 400, self.client.post_json,
+            '/zones/%s/recordsets' % self.domain['id'], fixtures)
+
+        # None of the recordsets were created
+        response = self.client.get(
+            '/zones/%s/recordsets?type=A' % self.domain['id'])
+        self.assertEqual(0, len(response.json['recordsets']))
+
+    def test_create_recordsets_validation(self):
+        fixtures = [
+            self.get_recordset_fixture(self.domain['name'], fixture=0),
+            self.get_recordset_fixture(self.domain['name'], fixture=1),
+            self.get_recordset_fixture(self.domain['name'], fixture=0),
+        ]
+
+        # Give the first and last recordsets an invalid TTL
+        fixtures[0]['ttl'] = -1
+        fixtures[2]['ttl'] = -1
+
+        response = self.client.post_json(
+            '/zones/%s/recordsets' % self.domain['id'], fixtures, status=400)
+
+        self.assertEqual('invalid_object', response.json['type'])
+
+        # The errors of both recordsets are reported, by index
+        self.assertEqual(
+            [0, 2], sorted(error['path'][0]
+                           for error in response.json['errors']['errors']))
+
     def test_create_recordset_invalid_id(self):
         self._assert_invalid_uuid(self.client.post, '/zones/%s/recordsets')
 
@@ -622,6 +694,34 @@ class ApiV2RecordSetsTest(ApiV2TestCase):
         # But there should be four in total (NS/SOA + the created)
         self.assertEqual(4, response.json['metadata']['total_count'])
 
+    def test_total_count_false(self):
+        url = '/zones/%s/recordsets?limit=1&total_count=false' % \
+            self.domain['id']
+
+        response = self.client.get(url)
+
+        self.assertEqual(1, len(response.json['recordsets']))
+        self.assertIsNone(response.json['metadata']['total_count'])
+
+    def test_total_count_estimate(self):
+        url = '/zones/%s/recordsets?limit=1&total_count=estimate' % \
+            self.domain['id']
+
+        response = self.client.get(url)
+        self.assertEqual(2, response.json['metadata']['total_count'])
+        self.assertFalse(response.json['metadata']['total_count_capped'])
+
+        # Estimates stop counting at the estimate limit
+        with patch.object(impl_sqlalchemy, 'COUNT_ESTIMATE_LIMIT', 1):
+            response = self.client.get(url)
+            self.assertEqual(1, response.json['metadata']['total_count'])
+            self.assertTrue(response.json['metadata']['total_count_capped'])
+
+    def test_total_count_invalid(self):
+        url = '/zones/%s/recordsets?total_count=junk' % self.domain['id']
+
+        self._assert_exception('bad_request', 400, self.client.get, url)
+
     # Secondary Zones specific tests
     def test_get_secondary_zone_recordset(self):
         fixture = self.get_domain_fixture('SECONDARY', 1)
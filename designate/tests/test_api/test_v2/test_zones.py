@@ -13,6 +13,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import functools
+
 from dns import zone as dnszone
 from mock import patch
 from oslo.config import cfg
@@ -20,6 +22,7 @@ from oslo import messaging
 from oslo_log import log as logging
 
 from designate import exceptions
+from designate import utils
 from designate.central import service as central_service
 from designate.tests.test_api.test_v2 import ApiV2TestCase
 
@@ -217,6 +220,31 @@ class ApiV2ZonesTest(ApiV2TestCase):
         self.assertEqual(zone['name'], response.json['name'])
         self.assertEqual(zone['email'], response.json['email'])
 
+    def test_get_zone_reads_from_replica(self):
+        zone = self.create_domain()
+
+        # Patched on the class, as the request may be served by the central
+        # service of any test
+        storage_cls = type(self.central_service.storage)
+
+        with patch.object(storage_cls, 'replica_reads', autospec=True,
+                          side_effect=storage_cls.replica_reads) \
+                as replica_reads:
+            self.client.get('/zones/%s' % zone['id'],
+                            headers=[('Accept', 'application/json')])
+
+        self.assertEqual(1, replica_reads.call_count)
+        self.assertTrue(replica_reads.call_args[0][1].stale_reads)
+
+        # Unless the API is configured to only read from the primary
+        self.config(stale_reads=False, group='service:api')
+
+        with patch.object(storage_cls, 'replica_reads') as replica_reads:
+            self.client.get('/zones/%s' % zone['id'],
+                            headers=[('Accept', 'application/json')])
+
+        self.assertFalse(replica_reads.called)
+
     def test_get_zone_invalid_id(self):
         self._assert_invalid_uuid(self.client.get, '/zones/%s')
 
@@ -499,17 +527,7 @@ class ApiV2ZonesTest(ApiV2TestCase):
         self._assert_exception('bad_request', 400, self.client.post, '/zones',
                                fixture, headers={'Content-type': 'text/dns'})
 
-    def test_import_export(self):
-        # Since v2 doesn't support getting records, import and export the
-        # fixture, making sure they're the same according to dnspython
-        post_response = self.client.post('/zones',
-                                         self.get_zonefile_fixture(),
-                                         headers={'Content-type': 'text/dns'})
-        get_response = self.client.get('/zones/%s' %
-                                       post_response.json['id'],
-                                       headers={'Accept': 'text/dns'})
-
-        exported_zonefile = get_response.body
+    def _assert_exported_fixture(self, exported_zonefile):
         imported = dnszone.from_text(self.get_zonefile_fixture())
         exported = dnszone.from_text(exported_zonefile)
         # Compare SOA emails, since zone comparison takes care of origin
@@ -528,6 +546,87 @@ class ApiV2ZonesTest(ApiV2TestCase):
         imported.delete_rdataset('delegation', 'NS')
         self.assertEqual(imported, exported)
 
+    def test_import_export(self):
+        # Since v2 doesn't support getting records, import and export the
+        # fixture, making sure they're the same according to dnspython
+        post_response = self.client.post('/zones',
+                                         self.get_zonefile_fixture(),
+                                         headers={'Content-type': 'text/dns'})
+        get_response = self.client.get('/zones/%s' %
+                                       post_response.json['id'],
+                                       headers={'Accept': 'text/dns'})
+
+        self._assert_exported_fixture(get_response.body)
+
+    def test_export_paged(self):
+        # Export a page of recordsets at a time, without fetching each
+        # recordset's records separately
+        self.config(zone_export_page_size=2, group='service:api')
+
+        post_response = self.client.post('/zones',
+                                         self.get_zonefile_fixture(),
+                                         headers={'Content-type': 'text/dns'})
+
+        find_recordsets = central_service.Service.find_recordsets
+
+        with patch.object(central_service.Service, 'find_records') as find:
+            with patch.object(central_service.Service, 'find_recordsets',
+                              autospec=True, side_effect=find_recordsets) \
+                    as find_recordsets:
+                get_response = self.client.get('/zones/%s' %
+                                               post_response.json['id'],
+                                               headers={'Accept': 'text/dns'})
+
+        self.assertFalse(find.called)
+
+        # The pages are read without counting the recordsets
+        self.assertTrue(find_recordsets.called)
+        for find_call in find_recordsets.call_args_list:
+            self.assertEqual('none', find_call[1]['criterion']['total_count'])
+        self.assertEqual('text/dns', get_response.content_type)
+
+        self._assert_exported_fixture(get_response.body)
+
+    def test_export_failure(self):
+        post_response = self.client.post('/zones',
+                                         self.get_zonefile_fixture(),
+                                         headers={'Content-type': 'text/dns'})
+        url = '/zones/%s' % post_response.json['id']
+
+        # Failing to read the first page is reported with the error status
+        with patch.object(central_service.Service, 'find_recordsets',
+                          side_effect=messaging.MessagingTimeout()):
+            self._assert_exception('timeout', 504, self.client.get, url,
+                                   headers={'Accept': 'text/dns'})
+
+    def test_export_failure_mid_stream(self):
+        self.config(zone_export_page_size=2, group='service:api')
+
+        post_response = self.client.post('/zones',
+                                         self.get_zonefile_fixture(),
+                                         headers={'Content-type': 'text/dns'})
+        url = '/zones/%s' % post_response.json['id']
+
+        first_page = self.central_service.find_recordsets(
+            self.admin_context, {'domain_id': post_response.json['id']},
+            limit=2, sort_key='id', sort_dir='asc')
+
+        # Render tiny chunks, so the response has started by the time the
+        # second page fails
+        render_template_chunks = functools.partial(
+            utils.render_template_chunks, chunk_size=1)
+
+        # Once the response has started, a failure aborts it rather than
+        # ending it as a complete zone file
+        with patch.object(utils, 'render_template_chunks',
+                          render_template_chunks):
+            with patch.object(central_service.Service, 'find_recordsets',
+                              side_effect=[first_page,
+                                           messaging.MessagingTimeout()]):
+                self.assertRaises(messaging.MessagingTimeout,
+                                  self.client.get, url,
+                                  headers={'Accept': 'text/dns'})
+
     # Metadata tests
     def test_metadata_exists(self):
         response = self.client.get('/zones/')
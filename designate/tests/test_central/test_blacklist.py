@@ -0,0 +1,81 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import mock
+
+from designate import objects
+from designate.central import blacklist
+from designate.tests import TestCase
+
+
+def make_blacklists(*patterns):
+    return [objects.Blacklist(id=str(i), pattern=pattern)
+            for i, pattern in enumerate(patterns)]
+
+
+class BlacklistMatcherTest(TestCase):
+    def test_match(self):
+        matcher = blacklist.BlacklistMatcher(chunk_size=2)
+        matcher.load(make_blacklists(
+            'example.org.', '^blacklisted.org.$', 'com.$', r'(a)\1\.net\.$',
+            '(?i)^UPPER.ORG.$', '(foo|bar)baz.org.'))
+
+        self.assertEqual(6, len(matcher))
+
+        self.assertIsNone(matcher.match('org.'))
+        self.assertEqual('example.org.', matcher.match('www.example.org.'))
+        self.assertEqual('^blacklisted.org.$',
+                         matcher.match('blacklisted.org.'))
+        self.assertEqual('com.$', matcher.match('example.com.'))
+        self.assertEqual(r'(a)\1\.net\.$', matcher.match('aa.net.'))
+        self.assertIsNone(matcher.match('ab.net.'))
+        self.assertEqual('(?i)^UPPER.ORG.$', matcher.match('upper.org.'))
+        self.assertEqual('(foo|bar)baz.org.', matcher.match('barbaz.org.'))
+
+    def test_match_many(self):
+        matcher = blacklist.BlacklistMatcher()
+        matcher.load(make_blacklists(
+            *[r'^(zone)%d\.example\.org\.$' % i for i in range(1000)]))
+
+        # The patterns are combined into far fewer regexes
+        self.assertTrue(len(matcher._chunks) < 100)
+
+        self.assertEqual(r'^(zone)999\.example\.org\.$',
+                         matcher.match('zone999.example.org.'))
+        self.assertIsNone(matcher.match('zone1000.example.org.'))
+
+    def test_match_conditional_group(self):
+        matcher = blacklist.BlacklistMatcher()
+        matcher.load(make_blacklists(
+            '(x)?y.org.', r'^(<)?example\.net\.(?(1)>)$'))
+
+        # The conditional refers to its own group 1, not the other pattern's
+        self.assertEqual(1, len(matcher._chunks[-1][1]))
+        self.assertEqual(r'^(<)?example\.net\.(?(1)>)$',
+                         matcher.match('<example.net.>'))
+        self.assertIsNone(matcher.match('<example.net.'))
+
+    def test_load_version(self):
+        matcher = blacklist.BlacklistMatcher()
+        matcher.load(make_blacklists('example.org.'), (1, 1, None))
+
+        self.assertEqual((1, 1, None), matcher.version)
+
+    @mock.patch.object(blacklist, 'LOG')
+    def test_load_invalid_pattern(self, log):
+        matcher = blacklist.BlacklistMatcher()
+        matcher.load(make_blacklists('(invalid', 'example.org.'))
+
+        self.assertEqual(1, len(matcher))
+        self.assertEqual('example.org.', matcher.match('example.org.'))
+        self.assertTrue(log.error.called)
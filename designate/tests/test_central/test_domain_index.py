@@ -0,0 +1,94 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from designate import objects
+from designate.central import domain_index
+from designate.tests import TestCase
+
+
+class DomainNameIndexTest(TestCase):
+    def setUp(self):
+        super(DomainNameIndexTest, self).setUp()
+
+        self.index = domain_index.DomainNameIndex()
+        self.index.load([
+            objects.Domain(id='1', pool_id='p1', name='example.org.'),
+            objects.Domain(id='2', pool_id='p1', name='a.b.example.org.'),
+            objects.Domain(id='3', pool_id='p1', name='c.a.b.example.org.'),
+            objects.Domain(id='4', pool_id='p2', name='sub.example.org.'),
+        ])
+
+    def test_find_parent(self):
+        self.assertEqual('1', self.index.find_parent('p1', 'www.example.org.'))
+        self.assertEqual('1', self.index.find_parent('p1', 'b.example.org.'))
+        self.assertEqual('2', self.index.find_parent(
+            'p1', 'c.a.b.example.org.'))
+        self.assertEqual('3', self.index.find_parent(
+            'p1', 'x.c.a.b.example.org.'))
+
+        self.assertIsNone(self.index.find_parent('p1', 'example.org.'))
+        self.assertIsNone(self.index.find_parent('p1', 'org.'))
+        self.assertIsNone(self.index.find_parent('p1', 'example.net.'))
+        self.assertIsNone(self.index.find_parent('p2', 'www.example.org.'))
+
+    def test_find_subdomains(self):
+        self.assertEqual(['1', '2', '3'],
+                         sorted(self.index.find_subdomains('p1', 'org.')))
+        self.assertEqual(['2', '3'], sorted(
+            self.index.find_subdomains('p1', 'example.org.')))
+        self.assertEqual([], self.index.find_subdomains(
+            'p1', 'c.a.b.example.org.'))
+        self.assertEqual([], self.index.find_subdomains('p1', 'net.'))
+
+    def test_find_child(self):
+        self.assertEqual('a.b.example.org.', self.index.find_child(
+            'p1', 'example.org.', 'www.c.a.b.example.org.'))
+        self.assertEqual('a.b.example.org.', self.index.find_child(
+            'p1', 'example.org.', 'a.b.example.org.'))
+        self.assertEqual('c.a.b.example.org.', self.index.find_child(
+            'p1', 'a.b.example.org.', 'www.c.a.b.example.org.'))
+
+        self.assertIsNone(self.index.find_child(
+            'p1', 'example.org.', 'www.example.org.'))
+        self.assertIsNone(self.index.find_child(
+            'p1', 'example.org.', 'xa.b.example.org.'))
+        self.assertIsNone(self.index.find_child(
+            'p1', 'example.org.', 'www.example.net.'))
+
+    def test_case_insensitive(self):
+        self.assertEqual('1', self.index.find_parent('p1', 'WWW.Example.ORG.'))
+
+    def test_remove(self):
+        self.index.remove('3')
+
+        self.assertEqual(3, len(self.index))
+        self.assertNotIn('3', self.index)
+        self.assertEqual('2', self.index.find_parent(
+            'p1', 'x.c.a.b.example.org.'))
+
+        self.index.remove('2')
+        self.index.remove('1')
+
+        # Empty branches are pruned
+        self.assertEqual({}, self.index._roots['p1'].children)
+
+        # Unknown ids are ignored
+        self.index.remove('1')
+
+    def test_remove_keeps_descendants(self):
+        self.index.remove('2')
+
+        self.assertEqual('1', self.index.find_parent(
+            'p1', 'c.a.b.example.org.'))
+        self.assertEqual(['3'], self.index.find_subdomains(
+            'p1', 'example.org.'))
@@ -27,6 +27,7 @@ from oslo_messaging.notify import notifier
 
 from designate import exceptions
 from designate import objects
+from designate.central import service as central_service
 from designate.tests.test_central import CentralTestCase
 
 LOG = logging.getLogger(__name__)
@@ -146,6 +147,28 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertTrue(result)
 
+    def test_is_blacklisted_domain_name_unchanged(self):
+        self.create_blacklist(pattern='example.org.')
+        context = self.get_context()
+
+        self.assertTrue(self.central_service._is_blacklisted_domain_name(
+            context, 'example.org.'))
+
+        # The blacklists are only read again once they have changed
+        with mock.patch.object(self.central_service.storage,
+                               'find_blacklists',
+                               wraps=self.central_service.storage.
+                               find_blacklists) as find_blacklists:
+            self.assertFalse(self.central_service._is_blacklisted_domain_name(
+                context, 'example.net.'))
+            self.assertFalse(find_blacklists.called)
+
+            self.create_blacklist(pattern='example.net.')
+
+            self.assertTrue(self.central_service._is_blacklisted_domain_name(
+                context, 'example.net.'))
+            self.assertTrue(find_blacklists.called)
+
     def test_is_subdomain(self):
         context = self.get_context()
 
@@ -189,6 +212,78 @@ class CentralServiceTest(CentralTestCase):
             context, 'www.example.org.', domain.pool_id)
         self.assertFalse(result)
 
+    def test_is_subdomain_stale_index(self):
+        context = self.get_context()
+
+        domain = self.create_domain(name='example.org.')
+
+        # Domains created by another central are found in storage, before
+        # the index is reloaded
+        self.central_service.domain_index.remove(domain.id)
+        result = self.central_service._is_subdomain(
+            context, 'www.example.org.', domain.pool_id)
+        self.assertEqual(domain.id, result.id)
+        self.assertIn(domain.id, self.central_service.domain_index)
+
+        self.central_service._load_domain_index()
+        result = self.central_service._is_subdomain(
+            context, 'www.example.org.', domain.pool_id)
+        self.assertEqual(domain.id, result.id)
+
+        # Domains deleted by another central are dropped from the index
+        self.central_service.storage.delete_domain(self.admin_context,
+                                                   domain.id)
+        result = self.central_service._is_subdomain(
+            context, 'www.example.org.', domain.pool_id)
+        self.assertFalse(result)
+        self.assertNotIn(domain.id, self.central_service.domain_index)
+
+    def test_is_superdomain_stale_index(self):
+        context = self.get_context()
+
+        domain = self.create_domain(name='example.org.')
+
+        self.central_service.storage.delete_domain(self.admin_context,
+                                                   domain.id)
+        result = self.central_service._is_superdomain(
+            context, 'org.', domain.pool_id)
+        self.assertFalse(result)
+        self.assertNotIn(domain.id, self.central_service.domain_index)
+
+    def test_is_superdomain_missing_from_index(self):
+        context = self.get_context()
+
+        domain = self.create_domain(name='www.example.org.')
+
+        # Subdomains created by another central are found in storage, before
+        # the index is reloaded
+        self.central_service.domain_index.remove(domain.id)
+        result = self.central_service._is_superdomain(
+            context, 'org.', domain.pool_id)
+        self.assertEqual([domain.id], [d.id for d in result])
+        self.assertIn(domain.id, self.central_service.domain_index)
+
+        # Names only matching as a LIKE pattern are not subdomains
+        result = self.central_service._is_superdomain(
+            context, 'e_ample.org.', domain.pool_id)
+        self.assertFalse(result)
+
+    def test_is_valid_recordset_placement_subdomain_missing_from_index(self):
+        context = self.get_context()
+
+        domain = self.create_domain(name='example.org.')
+        sub_domain = self.create_domain(name='sub.example.org.')
+
+        # Child zones created by another central are found in storage,
+        # before the index is reloaded
+        self.central_service.domain_index.remove(sub_domain.id)
+
+        with testtools.ExpectedException(exceptions.InvalidRecordSetLocation):
+            self.central_service._is_valid_recordset_placement_subdomain(
+                context, domain, 'record.sub.example.org.')
+
+        self.assertIn(sub_domain.id, self.central_service.domain_index)
+
     def test_is_valid_recordset_placement_subdomain(self):
         context = self.get_context()
 
@@ -383,6 +478,46 @@ class CentralServiceTest(CentralTestCase):
         with testtools.ExpectedException(exceptions.TsigKeyNotFound):
             self.central_service.get_tsigkey(self.admin_context, tsigkey['id'])
 
+    def test_update_tsigkey_invalidates_mdns(self):
+        tsigkey = self.create_tsigkey(name='test-key')
+        tsigkey.name = 'test-key-updated'
+
+        with mock.patch.object(self.central_service.mdns_api,
+                               'invalidate_tsigkey') as mock_invalidate:
+            self.central_service.update_tsigkey(self.admin_context, tsigkey)
+
+        self.assertEqual(1, mock_invalidate.call_count)
+        self.assertEqual(tsigkey.id, mock_invalidate.call_args[0][1].id)
+
+    def test_delete_tsigkey_invalidates_mdns(self):
+        tsigkey = self.create_tsigkey()
+
+        with mock.patch.object(self.central_service.mdns_api,
+                               'invalidate_tsigkey') as mock_invalidate:
+            self.central_service.delete_tsigkey(
+                self.admin_context, tsigkey.id)
+
+        self.assertEqual(1, mock_invalidate.call_count)
+        self.assertEqual(tsigkey.id, mock_invalidate.call_args[0][1].id)
+
+    def test_delete_tsigkey_invalidates_mdns_after_commit(self):
+        tsigkey = self.create_tsigkey()
+
+        calls = mock.Mock()
+        calls.commit.side_effect = self.central_service.storage.commit
+
+        with mock.patch.object(self.central_service.storage, 'commit',
+                               calls.commit):
+            with mock.patch.object(self.central_service.mdns_api,
+                                   'invalidate_tsigkey',
+                                   calls.invalidate_tsigkey):
+                self.central_service.delete_tsigkey(
+                    self.admin_context, tsigkey.id)
+
+        # mdns is only told once the deletion is visible to it
+        self.assertEqual(['commit', 'invalidate_tsigkey'],
+                         [c[0] for c in calls.mock_calls])
+
     # Tenant Tests
     def test_count_tenants(self):
         admin_context = self.get_admin_context()
@@ -770,6 +905,43 @@ class CentralServiceTest(CentralTestCase):
         self.assertEqual(domain['name'], expected_domain['name'])
         self.assertEqual(domain['email'], expected_domain['email'])
 
+    def test_get_lock_stats(self):
+        domain = self.create_domain()
+
+        domain.email = 'info@example.net'
+        self.central_service.update_domain(self.admin_context, domain)
+
+        stats = self.central_service.get_lock_stats(self.admin_context)
+
+        self.assertEqual(1, stats['domain-%s' % domain.id]['acquired'])
+        self.assertEqual(0, stats['domain-%s' % domain.id]['contended'])
+
+    def test_get_lock_stats_forbidden(self):
+        with testtools.ExpectedException(exceptions.Forbidden):
+            self.central_service.get_lock_stats(self.get_context())
+
+    def test_get_domain_reads_from_replica(self):
+        domain = self.create_domain()
+        storage = self.central_service.storage
+        context = self.admin_context.deepcopy()
+        context.stale_reads = True
+
+        with mock.patch.object(storage, 'replica_reads',
+                               wraps=storage.replica_reads) as replica_reads:
+            self.central_service.get_domain(context, domain.id)
+
+        replica_reads.assert_called_once_with(context)
+
+    def test_get_domain_reads_from_primary(self):
+        domain = self.create_domain()
+        storage = self.central_service.storage
+
+        # Only callers tolerating stale reads are served by replicas
+        with mock.patch.object(storage, 'replica_reads') as replica_reads:
+            self.central_service.get_domain(self.admin_context, domain.id)
+
+        self.assertFalse(replica_reads.called)
+
     def test_get_domain_servers(self):
         # Create a domain
         domain = self.create_domain()
@@ -904,6 +1076,82 @@ class CentralServiceTest(CentralTestCase):
         self.assertTrue(domain.serial > original_serial)
         self.assertEqual('info@example.net', domain.email)
 
+    def test_update_domain_lock_lost(self):
+        domain = self.create_domain(email='info@example.org')
+        domain.email = 'info@example.net'
+
+        # Changes made once the domain's lock was lost are rolled back
+        with mock.patch.object(self.central_service.locks, 'check',
+                               side_effect=exceptions.LockLost) as check:
+            with testtools.ExpectedException(exceptions.LockLost):
+                self.central_service.update_domain(self.admin_context, domain)
+
+        check.assert_called_with('domain-%s' % domain.id)
+
+        domain = self.central_service.get_domain(self.admin_context,
+                                                 domain.id)
+        self.assertEqual('info@example.org', domain.email)
+
+    def test_update_domain_deadlock_retry_restores_args(self):
+        domain = self.create_domain(name='example.org.')
+        domain.email = 'info@example.net'
+
+        attempts = []
+        stats = self.central_service.get_retry_stats(self.admin_context)
+        retried = stats.get('_update_domain_in_storage', {}).get('retried', 0)
+
+        def fail_once_then_pass(context, domain, *args, **kwargs):
+            attempts.append(domain.obj_get_changes())
+
+            if len(attempts) == 1:
+                # Change the domain as a failing attempt might
+                domain.ttl = 1
+                domain.obj_reset_changes()
+                raise db_exception.DBDeadlock()
+
+            return domain
+
+        with mock.patch.object(self.central_service.storage, 'update_domain',
+                               side_effect=fail_once_then_pass):
+            self.central_service.update_domain(self.admin_context, domain)
+
+        # The retry saw the domain as it was passed in
+        self.assertEqual(2, len(attempts))
+        self.assertEqual(attempts[0], attempts[1])
+        self.assertNotIn('ttl', attempts[1])
+
+        # The retry was recorded
+        stats = self.central_service.get_retry_stats(self.admin_context)
+
+        self.assertEqual(
+            retried + 1, stats['_update_domain_in_storage']['retried'])
+
+    def test_nested_retry_restores_args(self):
+        domain = objects.Domain(name='example.org.', email='info@example.org')
+        domain.obj_reset_changes()
+
+        class Caller(object):
+            @central_service.retry(cb=lambda exc: False)
+            def outer(self, domain):
+                try:
+                    self.inner(domain)
+                except exceptions.BadRequest:
+                    pass
+
+                return domain.obj_get_changes()
+
+            @central_service.retry(cb=lambda exc: False)
+            def inner(self, domain):
+                domain.ttl = 1
+                raise exceptions.BadRequest()
+
+        # The failed inner call's change to the domain was undone
+        self.assertEqual({}, Caller().outer(domain))
+
+    def test_get_retry_stats_forbidden(self):
+        with testtools.ExpectedException(exceptions.Forbidden):
+            self.central_service.get_retry_stats(self.get_context())
+
     @mock.patch.object(notifier.Notifier, "info")
     def test_delete_domain(self, mock_notifier):
         # Create a domain
@@ -1554,6 +1802,164 @@ class CentralServiceTest(CentralTestCase):
             self.central_service.delete_recordset(
                 self.admin_context, other_domain['id'], recordset['id'])
 
+    def _get_recordsets_fixture(self, domain, count):
+        return objects.RecordSetList(objects=[
+            objects.RecordSet(
+                name='www%d.%s' % (i, domain.name),
+                type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.%d' % (i + 1)),
+                ])
+            ) for i in range(count)])
+
+    @mock.patch.object(notifier.Notifier, "info")
+    def test_create_recordsets(self, mock_notifier):
+        domain = self.create_domain()
+        original_serial = domain.serial
+
+        recordsets = self._get_recordsets_fixture(domain, 3)
+
+        mock_notifier.reset_mock()
+
+        with mock.patch.object(self.central_service,
+                               '_update_domain_in_storage',
+                               wraps=self.central_service.
+                               _update_domain_in_storage) as update_domain:
+            with mock.patch.object(self.central_service.pool_manager_api,
+                                   'update_domain') as pm_update_domain:
+                with mock.patch.object(self.central_service.storage,
+                                       'create_recordset') as create_one:
+                    recordsets = self.central_service.create_recordsets(
+                        self.admin_context, domain.id, recordsets)
+
+                # The batch is a single change to the zone
+                self.assertEqual(1, update_domain.call_count)
+                self.assertEqual(1, pm_update_domain.call_count)
+
+                # The recordsets are stored through the batched path
+                self.assertFalse(create_one.called)
+
+        updated_domain = self.central_service.get_domain(
+            self.admin_context, domain.id)
+
+        self.assertEqual(3, len(recordsets))
+        self.assertThat(updated_domain.serial, GreaterThan(original_serial))
+
+        for recordset in recordsets:
+            self.assertIsNotNone(recordset.id)
+            self.assertEqual(updated_domain.serial,
+                             recordset.records[0].serial)
+
+        # One notification is emitted per recordset
+        self.assertEqual(3, mock_notifier.call_count)
+        self.assertEqual(
+            [recordset.id for recordset in recordsets],
+            [call[0][2].id for call in mock_notifier.call_args_list])
+
+    def test_create_recordsets_duplicate(self):
+        domain = self.create_domain()
+
+        recordsets = self._get_recordsets_fixture(domain, 2)
+        recordsets[1].name = recordsets[0].name
+
+        with testtools.ExpectedException(exceptions.DuplicateRecordSet):
+            self.central_service.create_recordsets(
+                self.admin_context, domain.id, recordsets)
+
+        # None of the recordsets were created
+        criterion = {'domain_id': domain.id, 'type': 'A'}
+        self.assertEqual(0, len(self.central_service.find_recordsets(
+            self.admin_context, criterion)))
+
+    def test_create_recordsets_cname_conflict(self):
+        domain = self.create_domain()
+
+        recordsets = self._get_recordsets_fixture(domain, 2)
+        recordsets[1].name = recordsets[0].name
+        recordsets[1].type = 'CNAME'
+        recordsets[1].records[0].data = 'example.org.'
+
+        with testtools.ExpectedException(
+                exceptions.InvalidRecordSetLocation):
+            self.central_service.create_recordsets(
+                self.admin_context, domain.id, recordsets)
+
+        # None of the recordsets were created
+        criterion = {'domain_id': domain.id, 'name': recordsets[0].name}
+        self.assertEqual(0, len(self.central_service.find_recordsets(
+            self.admin_context, criterion)))
+
+    def test_update_recordsets(self):
+        domain = self.create_domain()
+
+        recordsets = self.central_service.create_recordsets(
+            self.admin_context, domain.id,
+            self._get_recordsets_fixture(domain, 2))
+
+        domain = self.central_service.get_domain(
+            self.admin_context, domain.id)
+
+        for recordset in recordsets:
+            recordset.ttl = 1800
+
+        with mock.patch.object(self.central_service,
+                               '_update_domain_in_storage',
+                               wraps=self.central_service.
+                               _update_domain_in_storage) as update_domain:
+            self.central_service.update_recordsets(
+                self.admin_context, domain.id, recordsets)
+
+            self.assertEqual(1, update_domain.call_count)
+
+        updated_domain = self.central_service.get_domain(
+            self.admin_context, domain.id)
+
+        self.assertThat(updated_domain.serial, GreaterThan(domain.serial))
+
+        for recordset in recordsets:
+            recordset = self.central_service.get_recordset(
+                self.admin_context, domain.id, recordset.id)
+
+            self.assertEqual(1800, recordset.ttl)
+            self.assertEqual(updated_domain.serial,
+                             recordset.records[0].serial)
+
+    def test_update_recordsets_incorrect_domain_id(self):
+        domain = self.create_domain()
+        other_domain = self.create_domain(fixture=1)
+
+        recordset = self.create_recordset(domain)
+        recordset.ttl = 1800
+
+        with testtools.ExpectedException(exceptions.RecordSetNotFound):
+            self.central_service.update_recordsets(
+                self.admin_context, other_domain.id,
+                objects.RecordSetList(objects=[recordset]))
+
+    def test_delete_recordsets(self):
+        domain = self.create_domain()
+
+        recordsets = self.central_service.create_recordsets(
+            self.admin_context, domain.id,
+            self._get_recordsets_fixture(domain, 2))
+
+        domain = self.central_service.get_domain(
+            self.admin_context, domain.id)
+
+        self.central_service.delete_recordsets(
+            self.admin_context, domain.id,
+            [recordset.id for recordset in recordsets])
+
+        for recordset in recordsets:
+            with testtools.ExpectedException(exceptions.RecordSetNotFound):
+                self.central_service.get_recordset(
+                    self.admin_context, domain.id, recordset.id)
+
+        updated_domain = self.central_service.get_domain(
+            self.admin_context, domain.id)
+
+        self.assertThat(updated_domain.serial, GreaterThan(domain.serial))
+
     def test_count_recordsets(self):
         # in the beginning, there should be nothing
         recordsets = self.central_service.count_recordsets(self.admin_context)
@@ -2402,6 +2808,91 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertEqual(int(soa_record_values[2]), updated_zone['serial'])
 
+    # Zone change journal tests
+    def _find_zone_changes(self, domain, serial=None):
+        criterion = {'domain_id': domain.id}
+
+        if serial is not None:
+            criterion['serial'] = serial
+
+        return self.storage.find_zone_changes(self.admin_context, criterion)
+
+    def test_zone_journal(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+
+        # Create a record, the new serial holds the SOA change and the record
+        record = self.create_record(domain, recordset)
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        changes = self._find_zone_changes(domain, serial)
+        self.assertEqual(
+            sorted([('DELETE', 'SOA'), ('ADD', 'SOA'), ('ADD', 'A')]),
+            sorted((c.action, c.type) for c in changes))
+
+        soa_change = [c for c in changes
+                      if c.action == 'ADD' and c.type == 'SOA'][0]
+        self.assertEqual(serial, int(soa_change.data.split()[2]))
+
+        # Update the record
+        old_data = record.data
+        record.data = '192.0.2.200'
+        self.central_service.update_record(self.admin_context, record)
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        changes = [c for c in self._find_zone_changes(domain, serial)
+                   if c.type == 'A']
+        self.assertEqual(
+            sorted([('DELETE', old_data), ('ADD', '192.0.2.200')]),
+            sorted((c.action, c.data) for c in changes))
+        self.assertEqual(recordset.name, changes[0].name)
+
+        # Delete the record
+        self.central_service.delete_record(
+            self.admin_context, domain.id, recordset.id, record.id)
+        serial = self.central_service.get_domain(
+            self.admin_context, domain.id).serial
+
+        changes = [c for c in self._find_zone_changes(domain, serial)
+                   if c.type == 'A']
+        self.assertEqual([('DELETE', '192.0.2.200')],
+                         [(c.action, c.data) for c in changes])
+
+    def test_zone_journal_size(self):
+        self.config(zone_journal_size=2, group='service:central')
+
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        self.create_record(domain, recordset)
+
+        for i in range(2):
+            self.central_service.touch_domain(self.admin_context, domain.id)
+
+        serials = set(c.serial for c in self._find_zone_changes(domain))
+        self.assertEqual(2, len(serials))
+
+    def test_zone_journal_disabled(self):
+        self.config(zone_journal_size=0, group='service:central')
+
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        self.create_record(domain, recordset)
+
+        self.assertEqual(0, len(self._find_zone_changes(domain)))
+
+    def test_zone_journal_cleared_by_ttl_change(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        self.create_record(domain, recordset)
+
+        domain.ttl = domain.ttl + 100
+        self.central_service.update_domain(self.admin_context, domain)
+
+        # Every record's TTL changed, none of the journal can be used
+        self.assertEqual(0, len(self._find_zone_changes(domain)))
+
     # Pool Tests
     def test_create_pool(self):
         # Get the values
@@ -2671,6 +3162,62 @@ class CentralServiceTest(CentralTestCase):
 
         self.assertEqual(new_domain_serial, domain_serial)
 
+    def test_update_status_many_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain)
+        deleted_recordset = self.create_recordset(domain, fixture=1)
+
+        records = [self.create_record(domain, recordset, fixture=fixture)
+                   for fixture in range(2)]
+        deleted_record = self.create_record(domain, deleted_recordset)
+
+        self.central_service.delete_record(
+            self.admin_context, domain['id'], deleted_recordset['id'],
+            deleted_record['id'])
+
+        serial = self.central_service.get_domain(
+            self.admin_context, domain['id']).serial
+
+        # A change made after the serial pushed to the pool
+        later_record = self.create_record(
+            domain, recordset, data='192.0.2.100')
+
+        # Records are transitioned in bulk, rather than one by one
+        with mock.patch.object(self.central_service.storage,
+                               'update_record') as mock_update_record:
+            self.central_service.update_status(
+                self.admin_context, domain['id'], "SUCCESS", serial)
+
+        self.assertFalse(mock_update_record.called)
+
+        for record in records:
+            record = self.central_service.get_record(
+                self.admin_context, domain['id'], recordset['id'],
+                record['id'])
+
+            self.assertEqual('ACTIVE', record.status)
+            self.assertEqual('NONE', record.action)
+
+        # The later change is still pending
+        later_record = self.central_service.get_record(
+            self.admin_context, domain['id'], recordset['id'],
+            later_record['id'])
+        self.assertEqual('PENDING', later_record.status)
+
+        # The deleted record, and the recordset it emptied, are gone
+        with testtools.ExpectedException(exceptions.RecordSetNotFound):
+            self.central_service.get_recordset(
+                self.admin_context, domain['id'], deleted_recordset['id'])
+
+        # Errors mark all the pending records
+        self.central_service.update_status(
+            self.admin_context, domain['id'], "ERROR", 0)
+
+        later_record = self.central_service.get_record(
+            self.admin_context, domain['id'], recordset['id'],
+            later_record['id'])
+        self.assertEqual('ERROR', later_record.status)
+
     def test_create_zone_transfer_request(self):
         domain = self.create_domain()
         zone_transfer_request = self.create_zone_transfer_request(domain)
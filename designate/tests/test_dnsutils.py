@@ -13,9 +13,21 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+
+import dns.flags
+import dns.message
+import dns.name
+import dns.rcode
+import dns.rrset
+import dns.tsig
+import dns.tsigkeyring
+import mock
 from dns import zone as dnszone
 
 from designate import dnsutils
+from designate import exceptions
+from designate import objects
 from designate.tests import TestCase
 
 SAMPLES = {
@@ -95,3 +107,174 @@ class TestUtils(TestCase):
 
         self.assertEqual(len(SAMPLES), len(zone.recordsets))
         self.assertEqual('example.com.', zone.name)
+
+
+class TestSerializeStream(TestCase):
+    def _make_responses(self, count, keyring=None):
+        query = dns.message.make_query('example.com.', 'AXFR')
+
+        if keyring is not None:
+            query.use_tsig(keyring, keyname='test-key',
+                           algorithm=dns.tsig.HMAC_SHA256)
+
+        # Responses are built from the query as it was received
+        query = dns.message.from_wire(query.to_wire(), keyring=keyring)
+
+        responses = []
+
+        for i in range(count):
+            response = dns.message.make_response(query)
+            response.answer = [dns.rrset.from_text(
+                'r%d-%d.example.com.' % (i, j), 3600, 'IN', 'TXT',
+                '"%s"' % ('x' * 200)) for j in range(100)]
+            responses.append(response)
+
+        return query, responses
+
+    def test_serialize_stream(self):
+        query, responses = self._make_responses(10)
+
+        wires = list(dnsutils.serialize_stream(responses))
+
+        # 1000 ~250 byte RRsets don't fit in one message
+        self.assertTrue(len(wires) > 1)
+
+        messages = [dns.message.from_wire(w, xfr=True) for w in wires]
+
+        self.assertEqual(1, len(messages[0].question))
+        for message in messages[1:]:
+            self.assertEqual(0, len(message.question))
+
+        names = [rrset.name.to_text()
+                 for message in messages for rrset in message.answer]
+        expected = [rrset.name.to_text()
+                    for response in responses for rrset in response.answer]
+        self.assertEqual(expected, names)
+
+    def test_serialize_stream_tsig(self):
+        keyring = dns.tsigkeyring.from_text({'test-key': 'c2VjcmV0'})
+        query, responses = self._make_responses(10, keyring)
+
+        wires = list(dnsutils.serialize_stream(responses))
+        self.assertTrue(len(wires) > 1)
+
+        # Validate the messages the way a client would during an XFR
+        tsig_ctx = None
+        count = 0
+
+        for i, wire in enumerate(wires):
+            message = dns.message.from_wire(
+                wire, keyring=keyring, request_mac=query.mac, xfr=True,
+                tsig_ctx=tsig_ctx, multi=True, first=i == 0)
+
+            self.assertTrue(message.had_tsig)
+
+            tsig_ctx = message.tsig_ctx
+            count += len(message.answer)
+
+        self.assertEqual(1000, count)
+
+    def test_serialize_stream_empty(self):
+        self.assertEqual([], list(dnsutils.serialize_stream([])))
+
+
+class TestBuildRefusedWire(TestCase):
+    def test_build_refused_wire(self):
+        query = dns.message.make_query('example.com.', 'A')
+
+        wire = dnsutils.build_refused_wire(query.to_wire())
+        response = dns.message.from_wire(wire)
+
+        self.assertEqual(query.id, response.id)
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+        self.assertTrue(response.flags & dns.flags.QR)
+        self.assertTrue(response.flags & dns.flags.RD)
+        self.assertEqual(query.opcode(), response.opcode())
+
+    def test_build_refused_wire_short_payload(self):
+        self.assertIsNone(dnsutils.build_refused_wire('short'))
+
+
+class TestTsigKeyCache(TestCase):
+    def setUp(self):
+        super(TestTsigKeyCache, self).setUp()
+
+        self.tsigkey = objects.TsigKey(
+            id='1', name='test-key', algorithm='hmac-sha256',
+            secret=base64.encodestring('secret'))
+
+        self.storage = mock.Mock()
+        self.storage.find_tsigkey.return_value = self.tsigkey
+
+    def test_get(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+
+        self.assertEqual((self.tsigkey, 'secret'),
+                         tsigkey_cache.get('test-key'))
+        self.assertEqual((self.tsigkey, 'secret'),
+                         tsigkey_cache.get('test-key'))
+
+        self.assertEqual(1, self.storage.find_tsigkey.call_count)
+        self.assertEqual(1, tsigkey_cache.hits)
+        self.assertEqual(1, tsigkey_cache.misses)
+
+    def test_get_not_found(self):
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+
+        self.assertEqual((None, None), tsigkey_cache.get('test-key'))
+        self.assertEqual((None, None), tsigkey_cache.get('test-key'))
+
+        self.assertEqual(1, self.storage.find_tsigkey.call_count)
+
+    def test_get_expired(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+
+        with mock.patch('time.time', return_value=1000):
+            tsigkey_cache.get('test-key')
+
+        with mock.patch('time.time', return_value=1061):
+            tsigkey_cache.get('test-key')
+
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+
+    def test_get_disabled(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=0)
+
+        tsigkey_cache.get('test-key')
+        tsigkey_cache.get('test-key')
+
+        self.assertEqual(2, self.storage.find_tsigkey.call_count)
+        self.assertEqual(0, len(tsigkey_cache))
+
+    def test_invalidate_renamed(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+        tsigkey_cache.get('test-key')
+
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+        tsigkey_cache.get('test-key-renamed')
+        self.assertEqual(2, len(tsigkey_cache))
+
+        renamed = objects.TsigKey(id='1', name='test-key-renamed')
+        tsigkey_cache.invalidate(renamed)
+
+        self.assertEqual(0, len(tsigkey_cache))
+
+    def test_invalidate_all(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+        tsigkey_cache.get('test-key')
+
+        tsigkey_cache.invalidate()
+
+        self.assertEqual(0, len(tsigkey_cache))
+
+    def test_keyring(self):
+        tsigkey_cache = dnsutils.TsigKeyCache(self.storage, ttl=60)
+        keyring = dnsutils.TsigKeyring(tsigkey_cache)
+
+        self.assertEqual('secret', keyring.get(
+            dns.name.from_text('test-key')))
+
+        self.storage.find_tsigkey.side_effect = exceptions.TsigKeyNotFound
+        self.assertEqual('default', keyring.get(
+            dns.name.from_text('unknown-key'), 'default'))
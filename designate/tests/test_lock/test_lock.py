@@ -0,0 +1,225 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+from testscenarios import load_tests_apply_scenarios as load_tests  # noqa
+import eventlet
+import fixtures
+import mock
+import testtools
+from oslo.config import cfg
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+
+from designate import exceptions
+from designate import lock
+from designate import tests
+from designate.lock import base
+
+
+LOG = logging.getLogger(__name__)
+
+
+class LockTestCase(tests.TestCase):
+    scenarios = [
+        ('local', dict(lock_driver='local')),
+        ('file', dict(lock_driver='file')),
+        ('storage', dict(lock_driver='storage')),
+    ]
+
+    def setUp(self):
+        super(LockTestCase, self).setUp()
+
+        # Registers the [oslo_concurrency] options
+        lockutils.get_lock_path(cfg.CONF)
+
+        self.config(lock_path=self.useFixture(fixtures.TempDir()).path,
+                    group='oslo_concurrency')
+        self.config(lock_driver=self.lock_driver, group='service:central')
+
+        self.lock = lock.get_lock()
+
+    def test_lock(self):
+        with self.lock.lock('domain-1'):
+            # The lock can't be taken again until it's released
+            self.assertIsNone(self.lock._acquire('domain-1', blocking=False))
+
+            # Other locks are unaffected
+            handle = self.lock._acquire('domain-2', blocking=False)
+            self.assertIsNotNone(handle)
+            self.lock._release('domain-2', handle)
+
+        handle = self.lock._acquire('domain-1', blocking=False)
+        self.assertIsNotNone(handle)
+        self.lock._release('domain-1', handle)
+
+    def test_lock_released_on_error(self):
+        try:
+            with self.lock.lock('domain-1'):
+                raise ValueError()
+        except ValueError:
+            pass
+
+        handle = self.lock._acquire('domain-1', blocking=False)
+        self.assertIsNotNone(handle)
+        self.lock._release('domain-1', handle)
+
+    def test_get_stats(self):
+        with self.lock.lock('domain-1'):
+            pass
+
+        handle = self.lock._acquire('domain-1', blocking=True)
+
+        # The first attempt finds the lock held, so the second waits
+        with mock.patch.object(self.lock, '_acquire',
+                               side_effect=[None, handle]):
+            with self.lock.lock('domain-1'):
+                pass
+
+        stats = self.lock.get_stats()
+
+        self.assertEqual(['domain-1'], stats.keys())
+        self.assertEqual(2, stats['domain-1']['acquired'])
+        self.assertEqual(1, stats['domain-1']['contended'])
+        self.assertEqual(2, sum(stats['domain-1']['wait_time']))
+
+
+class LockStatsTest(tests.TestCase):
+    def test_record(self):
+        stats = base.LockStats()
+
+        stats.record('domain-1', 0.0005, False)
+        stats.record('domain-1', 0.5, True)
+        stats.record('domain-1', 60, True)
+
+        self.assertEqual({
+            'domain-1': {
+                'acquired': 3,
+                'contended': 2,
+                'max_wait_time': 60,
+                'wait_time': [1, 0, 0, 1, 0, 1],
+            }
+        }, stats.get())
+
+    def test_record_evicts_least_recently_used(self):
+        stats = base.LockStats(max_locks=2)
+
+        stats.record('domain-1', 0, False)
+        stats.record('domain-2', 0, False)
+        stats.record('domain-1', 0, False)
+        stats.record('domain-3', 0, False)
+
+        self.assertEqual(['domain-1', 'domain-3'], sorted(stats.get().keys()))
+
+
+class StorageLockTest(tests.TestCase):
+    def setUp(self):
+        super(StorageLockTest, self).setUp()
+
+        self.config(lock_driver='storage', group='service:central')
+
+        self.lock = lock.get_lock()
+        self.other_lock = lock.get_lock()
+
+    def test_lock_shared(self):
+        with self.lock.lock('domain-1'):
+            # Another central, with its own storage connection, can't take it
+            self.assertIsNone(
+                self.other_lock._acquire_shared('domain-1', blocking=False))
+
+        holder = self.other_lock._acquire_shared('domain-1', blocking=False)
+        self.assertIsNotNone(holder)
+
+    def test_lock_lease_expiry(self):
+        storage = self.lock.storage
+        context = self.get_admin_context()
+
+        self.assertTrue(storage.acquire_lock(context, 'domain-1', 'a', -1))
+
+        # The lease has run out, so the lock can be taken over
+        self.assertTrue(storage.acquire_lock(context, 'domain-1', 'b', 60))
+        self.assertFalse(storage.acquire_lock(context, 'domain-1', 'c', 60))
+
+        # A holder which lost its lease can't release the new holder's lock
+        storage.release_lock(context, 'domain-1', 'a')
+        self.assertFalse(storage.acquire_lock(context, 'domain-1', 'c', 60))
+
+        self.assertTrue(storage.release_lock(context, 'domain-1', 'b'))
+        self.assertTrue(storage.acquire_lock(context, 'domain-1', 'c', 60))
+
+    def test_lock_renew(self):
+        storage = self.lock.storage
+        context = self.get_admin_context()
+
+        self.assertTrue(storage.acquire_lock(context, 'domain-1', 'a', -1))
+        self.assertTrue(storage.renew_lock(context, 'domain-1', 'a', 60))
+
+        # The renewed lease is current again
+        self.assertFalse(storage.acquire_lock(context, 'domain-1', 'b', 60))
+
+        # Only the holder can renew its lease
+        self.assertFalse(storage.renew_lock(context, 'domain-1', 'b', 60))
+
+    def test_lock_heartbeat(self):
+        self.config(lock_lease_time=1, group='service:central')
+
+        with self.lock.lock('domain-1'):
+            # The lease is renewed while the lock is held for longer
+            eventlet.sleep(1.5)
+
+            self.assertIsNone(
+                self.other_lock._acquire_shared('domain-1', blocking=False))
+
+            self.lock.check('domain-1')
+
+        self.assertEqual({}, self.lock._leases)
+
+    def test_lock_lost(self):
+        self.config(lock_lease_time=1, group='service:central')
+
+        with mock.patch('designate.lock.impl_storage.LOG') as log:
+            with self.lock.lock('domain-1'):
+                # Another holder takes the lock over
+                self.lock.storage.release_lock(
+                    self.get_admin_context(), 'domain-1',
+                    self.lock._leases['domain-1']['holder'])
+                self.assertTrue(self.other_lock.storage.acquire_lock(
+                    self.get_admin_context(), 'domain-1', 'other', 60))
+
+                # The heartbeat finds the lease lost, so nothing more is to
+                # be committed under the lock
+                eventlet.sleep(0.5)
+
+                with testtools.ExpectedException(exceptions.LockLost):
+                    self.lock.check('domain-1')
+
+            # Releasing it only tells
+            self.assertTrue(log.error.called)
+
+    def test_lock_not_renewed(self):
+        with self.lock.lock('domain-1'):
+            self.lock.check('domain-1')
+
+            # The lease may have run out without its renewal noticing
+            renewed_at = self.lock._leases['domain-1']['renewed_at']
+
+            with mock.patch('time.time', return_value=renewed_at + 60):
+                with testtools.ExpectedException(exceptions.LockLost):
+                    self.lock.check('domain-1')
+
+    def test_lock_release_failure_in_flight(self):
+        # A failure to release doesn't hide the exception in flight
+        with mock.patch.object(self.lock.storage, 'release_lock',
+                               side_effect=Exception):
+            with testtools.ExpectedException(exceptions.BadRequest):
+                with self.lock.lock('domain-1'):
+                    raise exceptions.BadRequest()
@@ -0,0 +1,126 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import dns.rdatatype
+import dns.rrset
+
+from designate.tests import TestCase
+from designate.mdns import cache
+
+
+def make_snapshot(domain_id, name, serial, count=1):
+    soa = dns.rrset.from_text(
+        name, 3600, 'IN', 'SOA',
+        'ns1.%s root.%s %d 3600 1800 604800 3600' % (name, name, serial))
+
+    rrsets = [dns.rrset.from_text('r-%d.%s' % (i, name), 3600, 'IN', 'A',
+                                  '192.0.2.%d' % (i + 1))
+              for i in range(count)]
+
+    return cache.ZoneSnapshot(domain_id, name, serial, [soa], rrsets)
+
+
+class ZoneCacheTest(TestCase):
+    def test_axfr_rrsets(self):
+        snapshot = make_snapshot('1', 'example.com.', 1, count=2)
+
+        rrsets = snapshot.axfr_rrsets()
+
+        self.assertEqual(4, len(rrsets))
+        self.assertEqual(dns.rdatatype.SOA, rrsets[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, rrsets[-1].rdtype)
+
+    def test_find_rrset(self):
+        snapshot = make_snapshot('1', 'example.com.', 1)
+
+        self.assertIsNotNone(snapshot.find_rrset('example.com.', 'SOA'))
+        self.assertIsNotNone(
+            snapshot.find_rrset('R-0.Example.com.', dns.rdatatype.A))
+        self.assertIsNone(snapshot.find_rrset('r-0.example.com.', 'MX'))
+
+    def test_get_serial_mismatch(self):
+        zone_cache = cache.ZoneCache(max_zones=10, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'example.com.', 1))
+
+        self.assertIsNotNone(zone_cache.get('1', 1))
+        self.assertIsNone(zone_cache.get('1', 2))
+        self.assertIsNone(zone_cache.get('2', 1))
+
+        self.assertEqual(1, zone_cache.hits)
+        self.assertEqual(2, zone_cache.misses)
+
+    def test_put_replaces_older_serial(self):
+        zone_cache = cache.ZoneCache(max_zones=10, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'example.com.', 1))
+        zone_cache.put(make_snapshot('1', 'example.com.', 2))
+
+        self.assertEqual(1, len(zone_cache))
+        self.assertIsNone(zone_cache.get('1', 1))
+        self.assertIsNotNone(zone_cache.get('1', 2))
+
+    def test_invalidate(self):
+        zone_cache = cache.ZoneCache(max_zones=10, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'example.com.', 1))
+
+        # The current serial is kept
+        zone_cache.invalidate('1', 1)
+        self.assertIn('1', zone_cache)
+
+        zone_cache.invalidate('1', 2)
+        self.assertNotIn('1', zone_cache)
+        self.assertEqual([], zone_cache.find_domain_ids('example.com.'))
+
+    def test_lru_eviction_by_zones(self):
+        zone_cache = cache.ZoneCache(max_zones=2, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'one.com.', 1))
+        zone_cache.put(make_snapshot('2', 'two.com.', 1))
+
+        # Use the first zone, making the second the least recently used
+        zone_cache.get('1', 1)
+        zone_cache.put(make_snapshot('3', 'three.com.', 1))
+
+        self.assertIn('1', zone_cache)
+        self.assertNotIn('2', zone_cache)
+        self.assertIn('3', zone_cache)
+
+    def test_lru_eviction_by_rrsets(self):
+        zone_cache = cache.ZoneCache(max_zones=10, max_rrsets=10)
+        zone_cache.put(make_snapshot('1', 'one.com.', 1, count=4))
+        zone_cache.put(make_snapshot('2', 'two.com.', 1, count=4))
+
+        self.assertEqual(2, len(zone_cache))
+
+        zone_cache.put(make_snapshot('3', 'three.com.', 1, count=4))
+
+        self.assertEqual(2, len(zone_cache))
+        self.assertNotIn('1', zone_cache)
+
+        # Zones larger than the whole cache are never stored
+        zone_cache.put(make_snapshot('4', 'four.com.', 1, count=20))
+        self.assertNotIn('4', zone_cache)
+
+    def test_disabled(self):
+        zone_cache = cache.ZoneCache(max_zones=0, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'example.com.', 1))
+
+        self.assertEqual(0, len(zone_cache))
+
+    def test_find_domain_ids(self):
+        zone_cache = cache.ZoneCache(max_zones=10, max_rrsets=100)
+        zone_cache.put(make_snapshot('1', 'example.com.', 1))
+        zone_cache.put(make_snapshot('2', 'sub.example.com.', 1))
+
+        self.assertEqual(
+            ['2', '1'], zone_cache.find_domain_ids('www.sub.example.com.'))
+        self.assertEqual(['1'], zone_cache.find_domain_ids('Example.COM.'))
+        self.assertEqual([], zone_cache.find_domain_ids('example.org.'))
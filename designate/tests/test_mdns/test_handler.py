@@ -16,6 +16,9 @@
 import binascii
 
 import dns
+import dns.flags
+import dns.message
+import dns.rcode
 import dns.rdataclass
 import dns.rdatatype
 import dns.resolver
@@ -412,6 +415,24 @@ class MdnsRequestHandlerTest(MdnsTestCase):
 
         self.assertEqual(expected_response, binascii.b2a_hex(response))
 
+    def test_dispatch_opcode_query_replica_reads(self):
+        domain = self.create_domain()
+
+        with mock.patch.object(self.storage, 'replica_reads',
+                               wraps=self.storage.replica_reads) as reads:
+            # SOA queries stay on the primary, backends compare its serial
+            request = dns.message.make_query(domain.name, 'SOA')
+            request.environ = {'addr': self.addr, 'context': self.context}
+            self.handler(request)
+
+            self.assertFalse(reads.called)
+
+            request = dns.message.make_query(domain.name, 'NS')
+            request.environ = {'addr': self.addr, 'context': self.context}
+            self.handler(request)
+
+            reads.assert_called_once_with(self.context)
+
     def test_dispatch_opcode_query_MX(self):
         # query is for mail.example.com. IN MX
         payload = ("271701000001000000000000046d61696c076578616d706c6503636f6d"
@@ -621,3 +642,272 @@ class MdnsRequestHandlerTest(MdnsTestCase):
 
         response = self.handler(request).to_wire()
         self.assertEqual(expected_response, binascii.b2a_hex(response))
+
+    def _make_request(self, name, rdtype):
+        request = dns.message.make_query(name, rdtype)
+        request.environ = {'addr': self.addr, 'context': self.context}
+
+        return request
+
+    def test_dispatch_opcode_query_AXFR(self):
+        domain = self.create_domain(name='example.com.')
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        self.create_record(domain, recordset, data='192.0.2.5')
+
+        request = self._make_request('example.com.', 'AXFR')
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+
+        # The AXFR response must start and end with the SOA
+        self.assertEqual(dns.rdatatype.SOA, response.answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, response.answer[-1].rdtype)
+
+        rdtypes = [rrset.rdtype for rrset in response.answer[1:-1]]
+        self.assertEqual(
+            sorted([dns.rdatatype.NS, dns.rdatatype.A]), sorted(rdtypes))
+
+    def test_dispatch_opcode_query_AXFR_cached(self):
+        domain = self.create_domain(name='example.com.')
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        self.create_record(domain, recordset, data='192.0.2.5')
+
+        request = self._make_request('example.com.', 'AXFR')
+        first = self.handler(request).to_wire()
+
+        # A second AXFR at the same serial is served from the cache
+        with mock.patch.object(self.storage, 'find_recordsets',
+                               wraps=self.storage.find_recordsets) as find:
+            second = self.handler(request).to_wire()
+
+            self.assertFalse(find.called)
+
+        self.assertEqual(first, second)
+
+        # Changing the zone bumps the serial, and invalidates the cache
+        self.create_record(domain, recordset, data='192.0.2.6')
+
+        with mock.patch.object(self.storage, 'find_recordsets',
+                               wraps=self.storage.find_recordsets) as find:
+            response = self.handler(request)
+
+            self.assertTrue(find.called)
+
+        a_rrsets = [rrset for rrset in response.answer
+                    if rrset.rdtype == dns.rdatatype.A]
+        self.assertEqual(1, len(a_rrsets))
+        self.assertEqual(2, len(a_rrsets[0]))
+
+    def test_dispatch_opcode_query_A_cached(self):
+        domain = self.create_domain(name='example.com.')
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        self.create_record(domain, recordset, data='192.0.2.5')
+
+        # Prime the cache with an AXFR
+        self.handler(self._make_request('example.com.', 'AXFR'))
+
+        request = self._make_request('MAIL.example.com.', 'A')
+
+        with mock.patch.object(self.storage, 'find_recordset') as find:
+            response = self.handler(request)
+
+            self.assertFalse(find.called)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertTrue(response.flags & dns.flags.AA)
+        self.assertEqual(1, len(response.answer))
+        self.assertEqual('192.0.2.5', response.answer[0][0].to_text())
+
+    def test_dispatch_opcode_query_cached_zone_missing_name(self):
+        domain = self.create_domain(name='example.com.')
+
+        # Prime the cache with an AXFR
+        self.handler(self._make_request('example.com.', 'AXFR'))
+
+        # Names missing from the snapshot fall back to storage
+        request = self._make_request('mail.example.com.', 'A')
+
+        with mock.patch.object(self.storage, 'find_recordset',
+                               wraps=self.storage.find_recordset) as find:
+            response = self.handler(request)
+
+            self.assertTrue(find.called)
+
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+
+        # As do zones which have changed since they were cached
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        self.create_record(domain, recordset, data='192.0.2.5')
+
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertEqual('192.0.2.5', response.answer[0][0].to_text())
+
+    def _make_ixfr_request(self, name, serial):
+        request = self._make_request(name, 'IXFR')
+        request.authority.append(dns.rrset.from_text(
+            name, 3600, 'IN', 'SOA', 'ns1.example.com. root.example.com. '
+            '%d 3600 1800 604800 3600' % serial))
+
+        return request
+
+    def _summarize_answer(self, response):
+        summary = []
+
+        for rrset in response.answer:
+            if rrset.rdtype == dns.rdatatype.SOA:
+                summary.append(('SOA', rrset[0].serial))
+            else:
+                summary.append((dns.rdatatype.to_text(rrset.rdtype),
+                                sorted(rdata.to_text() for rdata in rrset)))
+
+        return summary
+
+    def test_dispatch_opcode_query_IXFR(self):
+        domain = self.create_domain(name='example.com.')
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        record = self.create_record(domain, recordset, data='192.0.2.5')
+        serial_1 = self.storage.get_domain(self.context, domain.id).serial
+
+        self.create_record(domain, recordset, data='192.0.2.6')
+        serial_2 = self.storage.get_domain(self.context, domain.id).serial
+
+        self.central_service.delete_record(
+            self.admin_context, domain.id, recordset.id, record.id)
+        serial_3 = self.storage.get_domain(self.context, domain.id).serial
+
+        request = self._make_ixfr_request('example.com.', serial_1)
+
+        with mock.patch.object(self.storage, 'find_recordsets') as find:
+            response = self.handler(request)
+
+            # The zone contents are never loaded
+            self.assertFalse(find.called)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertTrue(response.flags & dns.flags.AA)
+
+        expected = [
+            ('SOA', serial_3),
+            ('SOA', serial_1),
+            ('SOA', serial_2),
+            ('A', ['192.0.2.6']),
+            ('SOA', serial_2),
+            ('A', ['192.0.2.5']),
+            ('SOA', serial_3),
+            ('SOA', serial_3),
+        ]
+        self.assertEqual(expected, self._summarize_answer(response))
+
+    def test_dispatch_opcode_query_IXFR_current_serial(self):
+        domain = self.create_domain(name='example.com.')
+
+        request = self._make_ixfr_request('example.com.', domain.serial)
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+        self.assertEqual([('SOA', domain.serial)],
+                         self._summarize_answer(response))
+
+    def test_dispatch_opcode_query_IXFR_unjournalled_serial(self):
+        domain = self.create_domain(name='example.com.')
+        recordset = self.create_recordset(
+            domain, name='mail.example.com.', type='A')
+        self.create_record(domain, recordset, data='192.0.2.5')
+
+        # Serials missing from the journal are answered with an AXFR
+        request = self._make_ixfr_request('example.com.', domain.serial - 1)
+        response = self.handler(request)
+
+        self.assertEqual(dns.rcode.NOERROR, response.rcode())
+
+        rdtypes = [rrset.rdtype for rrset in response.answer[1:-1]]
+        self.assertEqual(
+            sorted([dns.rdatatype.NS, dns.rdatatype.A]), sorted(rdtypes))
+
+    def test_dispatch_opcode_query_IXFR_without_soa(self):
+        self.create_domain(name='example.com.')
+
+        request = self._make_request('example.com.', 'IXFR')
+
+        with mock.patch.object(self.handler, '_handle_axfr') as axfr:
+            self.handler(request)
+
+            axfr.assert_called_once_with(request)
+
+    def test_dispatch_opcode_query_AXFR_tcp(self):
+        self.config(axfr_page_size=2, group='service:mdns')
+
+        domain = self.create_domain(name='example.com.')
+        for i in range(3):
+            recordset = self.create_recordset(
+                domain, name='www%d.example.com.' % i, type='A')
+            self.create_record(domain, recordset, data='192.0.2.%d' % i)
+
+        request = self._make_request('example.com.', 'AXFR')
+        request.environ['protocol'] = 'tcp'
+
+        with mock.patch.object(self.storage, 'find_recordsets',
+                               wraps=self.storage.find_recordsets) as find:
+            responses = list(self.handler(request))
+
+        # The SOA, two pages of recordsets and the closing SOA
+        self.assertEqual(4, len(responses))
+
+        # The pages are read without counting the recordsets
+        self.assertTrue(find.called)
+        for find_call in find.call_args_list:
+            self.assertEqual('none', find_call[0][1]['total_count'])
+
+        answer = [rrset for response in responses
+                  for rrset in response.answer]
+        self.assertEqual(dns.rdatatype.SOA, answer[0].rdtype)
+        self.assertEqual(dns.rdatatype.SOA, answer[-1].rdtype)
+        self.assertEqual(
+            sorted([dns.rdatatype.NS] + [dns.rdatatype.A] * 3),
+            sorted(rrset.rdtype for rrset in answer[1:-1]))
+
+        # The streamed zone was cached, and the next AXFR is sent from it
+        self.assertIn(domain.id, self.handler.zone_cache)
+
+        with mock.patch.object(self.storage, 'find_recordsets') as find:
+            cached = list(self.handler(request))
+
+            self.assertFalse(find.called)
+
+        self.assertEqual(
+            [rrset.to_text() for rrset in answer],
+            [rrset.to_text() for response in cached
+             for rrset in response.answer])
+
+    def test_dispatch_opcode_query_AXFR_tcp_changed(self):
+        self.config(axfr_page_size=2, group='service:mdns')
+
+        domain = self.create_domain(name='example.com.')
+        for i in range(3):
+            recordset = self.create_recordset(
+                domain, name='www%d.example.com.' % i, type='A')
+            self.create_record(domain, recordset, data='192.0.2.%d' % i)
+
+        request = self._make_request('example.com.', 'AXFR')
+        request.environ['protocol'] = 'tcp'
+
+        responses = iter(self.handler(request))
+        first = next(responses)
+
+        # The domain changes once the stream has started
+        domain.serial += 1
+        self.storage.update_domain(self.admin_context, domain)
+
+        responses = [first] + list(responses)
+
+        self.assertEqual(4, len(responses))
+
+        # The pages may mix both serials, so the zone isn't cached
+        self.assertNotIn(domain.id, self.handler.zone_cache)
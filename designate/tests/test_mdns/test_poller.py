@@ -0,0 +1,188 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import socket
+
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+import eventlet
+import eventlet.queue
+import mock
+
+from designate import objects
+from designate.openstack.common import threadgroup
+from designate.mdns import notify
+from designate.mdns import poller
+from designate.tests.test_mdns import MdnsTestCase
+
+
+class FakeNameserver(object):
+    """Answers SOA queries over UDP with a configurable serial"""
+    def __init__(self, serial=None, rcode=dns.rcode.NOERROR):
+        self.serial = serial
+        self.rcode = rcode
+        self.queries = []
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.port = self.sock.getsockname()[1]
+
+        self.thread = eventlet.spawn(self._serve)
+
+    def stop(self):
+        self.thread.kill()
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            wire, addr = self.sock.recvfrom(65535)
+            query = dns.message.from_wire(wire)
+            self.queries.append(query)
+
+            if self.serial is None:
+                # Never answer
+                continue
+
+            response = dns.message.make_response(query)
+            response.flags |= dns.flags.AA
+            response.set_rcode(self.rcode)
+
+            if self.rcode == dns.rcode.NOERROR:
+                name = query.question[0].name.to_text()
+                response.answer.append(dns.rrset.from_text(
+                    name, 3600, 'IN', 'SOA', 'ns1.%s root.%s %d 3600 600 '
+                    '86400 3600' % (name, name, self.serial)))
+
+            self.sock.sendto(response.to_wire(), addr)
+
+
+class SerialPollerTest(MdnsTestCase):
+    def setUp(self):
+        super(SerialPollerTest, self).setUp()
+
+        self.tg = threadgroup.ThreadGroup()
+        self.poller = poller.SerialPoller()
+        self.poller.start(self.tg)
+
+        self.results = eventlet.queue.LightQueue()
+
+    def tearDown(self):
+        self.poller.stop()
+        self.tg.stop()
+
+        super(SerialPollerTest, self).tearDown()
+
+    def _start_nameserver(self, *args, **kwargs):
+        fake_nameserver = FakeNameserver(*args, **kwargs)
+        self.addCleanup(fake_nameserver.stop)
+
+        nameserver = objects.PoolNameserver(
+            id='f278782a-07dc-4502-9177-b5d85c5f7c7e', host='127.0.0.1',
+            port=fake_nameserver.port)
+
+        return fake_nameserver, nameserver
+
+    def _poll(self, nameserver, name='example.com.', serial=100, timeout=1,
+              retry_interval=0, max_retries=2, delay=0):
+        domain = objects.Domain(name=name, serial=serial)
+        message = dns.message.make_query(name, dns.rdatatype.SOA)
+
+        def _callback(*result):
+            self.results.put((name, ) + result)
+
+        return self.poller.poll(message, domain, nameserver, timeout,
+                                retry_interval, max_retries, delay, _callback)
+
+    def test_poll_success(self):
+        fake_nameserver, nameserver = self._start_nameserver(serial=100)
+
+        self._poll(nameserver)
+
+        self.assertEqual(('example.com.', 'SUCCESS', 100, 2),
+                         self.results.get(timeout=5))
+        self.assertEqual(1, len(fake_nameserver.queries))
+        self.assertEqual(0, len(self.poller))
+
+    def test_poll_lower_serial(self):
+        fake_nameserver, nameserver = self._start_nameserver(serial=99)
+
+        self._poll(nameserver, max_retries=3)
+
+        self.assertEqual(('example.com.', 'ERROR', 99, 0),
+                         self.results.get(timeout=5))
+        self.assertEqual(3, len(fake_nameserver.queries))
+
+    def test_poll_no_domain(self):
+        fake_nameserver, nameserver = self._start_nameserver(
+            serial=100, rcode=dns.rcode.REFUSED)
+
+        self._poll(nameserver)
+
+        self.assertEqual(('example.com.', 'NO_DOMAIN', None, 0),
+                         self.results.get(timeout=5))
+
+    def test_poll_timeout(self):
+        fake_nameserver, nameserver = self._start_nameserver()
+
+        self._poll(nameserver, timeout=0.05)
+
+        self.assertEqual(('example.com.', 'ERROR', None, 0),
+                         self.results.get(timeout=5))
+        self.assertEqual(2, len(fake_nameserver.queries))
+
+    def test_poll_many(self):
+        fake_nameserver, nameserver = self._start_nameserver(serial=100)
+
+        names = set('zone%d.example.com.' % i for i in range(200))
+
+        for name in names:
+            self._poll(nameserver, name=name)
+
+        results = [self.results.get(timeout=5) for name in names]
+
+        self.assertEqual(names, set(result[0] for result in results))
+        self.assertEqual(set(['SUCCESS']),
+                         set(result[1] for result in results))
+
+        # All the polls shared a single socket
+        self.assertEqual(1, len(self.poller._sockets))
+
+
+class NotifyEndpointSerialPollerTest(MdnsTestCase):
+    def test_poll_for_serial_number(self):
+        serial_poller = mock.Mock()
+        endpoint = notify.NotifyEndpoint(
+            mock.Mock(), serial_poller=serial_poller)
+
+        domain = objects.Domain(name='example.com.', serial=100)
+        nameserver = objects.PoolNameserver(host='127.0.0.1', port=53)
+
+        with mock.patch.object(endpoint, 'get_serial_number') as get_serial:
+            with mock.patch.object(
+                    notify.NotifyEndpoint, 'pool_manager_api') as pm_api:
+                endpoint.poll_for_serial_number(
+                    self.admin_context, domain, nameserver, 30, 2, 3, 1)
+
+                # The poll is handed to the poller, without blocking
+                self.assertFalse(get_serial.called)
+                self.assertEqual(1, serial_poller.poll.call_count)
+
+                # The poller reports back through the callback
+                callback = serial_poller.poll.call_args[0][-1]
+                callback('SUCCESS', 100, 3)
+
+                pm_api.update_status.assert_called_once_with(
+                    self.admin_context, domain, nameserver, 'SUCCESS', 100)
@@ -15,11 +15,14 @@
 # under the License.
 import binascii
 import socket
+import struct
 
 import dns
 import dns.message
+import dns.rcode
 import mock
 
+from designate import service
 from designate.tests.test_mdns import MdnsTestCase
 
 
@@ -63,3 +66,185 @@ class MdnsServiceTest(MdnsTestCase):
         self.service._dns_handle(self.addr, binascii.a2b_hex(payload))
         sendto_mock.assert_called_once_with(
             binascii.a2b_hex(expected_response), self.addr)
+
+    def test_handle_tcp_axfr(self):
+        self.create_domain(name='example.com.')
+
+        payload = dns.message.make_query('example.com.', 'AXFR').to_wire()
+        client = mock.Mock()
+
+        self.service._dns_handle(self.addr, payload, client=client)
+
+        # Each message is sent prefixed by its length
+        self.assertTrue(client.sendall.called)
+        for call in client.sendall.call_args_list:
+            data = call[0][0]
+            (length, ) = struct.unpack('!H', data[:2])
+            self.assertEqual(length, len(data) - 2)
+
+        response = dns.message.from_wire(
+            client.sendall.call_args_list[0][0][0][2:], xfr=True)
+        self.assertEqual(dns.rdatatype.SOA, response.answer[0].rdtype)
+
+        # The connection is left open for further queries
+        self.assertFalse(client.close.called)
+
+    def test_handle_tcp_failure_mid_stream(self):
+        def response():
+            yield 'message'
+            raise Exception('Storage went away')
+
+        client = mock.Mock()
+
+        with mock.patch.object(type(self.service), '_dns_application',
+                               new_callable=mock.PropertyMock) as application:
+            application.return_value = mock.Mock(return_value=response())
+
+            self.service._dns_handle(self.addr, 'query', client=client)
+
+        # The first message was sent, then the connection was shut down
+        # rather than left open with a partial response
+        client.sendall.assert_called_once_with(
+            struct.pack('!H', 7) + 'message')
+        client.shutdown.assert_called_once_with(socket.SHUT_RDWR)
+
+    def _tcp_send(self, sock, name, rdtype):
+        query = dns.message.make_query(name, rdtype)
+        payload = query.to_wire()
+        sock.sendall(struct.pack('!H', len(payload)) + payload)
+
+        return query
+
+    def _tcp_recv(self, sock):
+        (length, ) = struct.unpack('!H', self.service._dns_recv(sock, 2))
+        return dns.message.from_wire(self.service._dns_recv(sock, length))
+
+    def test_handle_tcp_persistent_connection(self):
+        self.create_domain(name='example.com.')
+
+        sock = socket.create_connection(
+            self.service._dns_sock_tcp.getsockname())
+        sock.settimeout(5)
+
+        try:
+            # Pipeline two queries before reading either response
+            queries = [self._tcp_send(sock, 'example.com.', 'SOA'),
+                       self._tcp_send(sock, 'example.com.', 'NS')]
+
+            responses = [self._tcp_recv(sock), self._tcp_recv(sock)]
+
+            self.assertEqual(sorted(q.id for q in queries),
+                             sorted(r.id for r in responses))
+
+            # The connection is still usable afterwards
+            query = self._tcp_send(sock, 'example.com.', 'SOA')
+            self.assertEqual(query.id, self._tcp_recv(sock).id)
+        finally:
+            sock.close()
+
+    def test_handle_tcp_idle_timeout(self):
+        self.config(tcp_idle_timeout=0.1, group='service:mdns')
+
+        sock = socket.create_connection(
+            self.service._dns_sock_tcp.getsockname())
+        sock.settimeout(5)
+
+        try:
+            # The server closes the connection once it has been idle
+            self.assertEqual('', sock.recv(2))
+        finally:
+            sock.close()
+
+    def test_handle_tcp_max_connections(self):
+        self.config(tcp_max_connections=1, group='service:mdns')
+
+        idle = socket.create_connection(
+            self.service._dns_sock_tcp.getsockname())
+        idle.settimeout(5)
+
+        try:
+            # Wait for the first connection to be handled, and idle
+            query = self._tcp_send(idle, 'example.com.', 'SOA')
+            self.assertEqual(query.id, self._tcp_recv(idle).id)
+
+            sock = socket.create_connection(
+                self.service._dns_sock_tcp.getsockname())
+            sock.settimeout(5)
+
+            try:
+                # The idle connection is closed to make room for the new one
+                self.assertEqual('', idle.recv(2))
+
+                query = self._tcp_send(sock, 'example.com.', 'SOA')
+                self.assertEqual(query.id, self._tcp_recv(sock).id)
+            finally:
+                sock.close()
+        finally:
+            idle.close()
+
+    def test_handle_tcp_failure(self):
+        query = dns.message.make_query('example.com.', 'SOA')
+        client = mock.Mock()
+
+        with mock.patch.object(type(self.service), '_dns_application',
+                               new_callable=mock.PropertyMock) as application:
+            application.return_value = mock.Mock(side_effect=Exception)
+
+            self.service._dns_handle(self.addr, query.to_wire(),
+                                     client=client)
+
+        # The query is answered with a SERVFAIL
+        data = client.sendall.call_args[0][0]
+        response = dns.message.from_wire(data[2:])
+
+        self.assertEqual(query.id, response.id)
+        self.assertEqual(dns.rcode.SERVFAIL, response.rcode())
+        self.assertFalse(client.shutdown.called)
+
+    def test_request_queue(self):
+        handler = mock.Mock()
+        queue = service.DNSRequestQueue('test', handler, 2, 1)
+
+        # Nothing consumes the queue until it has been started
+        self.assertTrue(queue.put(self.addr, 'a'))
+        self.assertTrue(queue.put(self.addr, 'b'))
+        self.assertFalse(queue.put(self.addr, 'c'))
+
+        self.assertEqual({'depth': 2, 'handled': 0, 'dropped': 1},
+                         queue.stats())
+
+        tg = mock.Mock()
+        queue.start(tg)
+        tg.add_thread.assert_called_once_with(queue._worker)
+
+    def test_handle_tcp_queue_full(self):
+        # A queue without workers, which can't hold any request
+        self.service._dns_queue_tcp = service.DNSRequestQueue(
+            'tcp', self.service._dns_handle, 0, 0)
+
+        sock = socket.create_connection(
+            self.service._dns_sock_tcp.getsockname())
+        sock.settimeout(5)
+
+        try:
+            query = self._tcp_send(sock, 'example.com.', 'SOA')
+            response = self._tcp_recv(sock)
+        finally:
+            sock.close()
+
+        self.assertEqual(query.id, response.id)
+        self.assertEqual(dns.rcode.REFUSED, response.rcode())
+        stats = self.service.get_dns_stats()
+        interface = '%s:%d' % self.service._dns_sock_udp.getsockname()[:2]
+
+        self.assertEqual([interface], list(stats.keys()))
+        self.assertEqual(1, stats[interface]['tcp']['dropped'])
+
+    @mock.patch.object(service.LOG, 'info')
+    def test_log_dns_stats(self, log_info):
+        self.service._dns_log_stats()
+
+        interface = '%s:%d' % self.service._dns_sock_udp.getsockname()[:2]
+
+        self.assertEqual(1, log_info.call_count)
+        self.assertIn(interface, log_info.call_args[0][0])
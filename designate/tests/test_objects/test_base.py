@@ -69,6 +69,11 @@ class TestValidatableObject(objects.DesignateObject):
     }
 
 
+class TestValidatableObjectList(objects.ListObjectMixin,
+                                objects.DesignateObject):
+    LIST_ITEM_TYPE = TestValidatableObject
+
+
 class DesignateObjectTest(tests.TestCase):
     def test_obj_cls_from_name(self):
         cls = objects.DesignateObject.obj_cls_from_name('TestObject')
@@ -219,6 +224,18 @@ class DesignateObjectTest(tests.TestCase):
         with testtools.ExpectedException(AttributeError):
             obj.badthing = 'demons'
 
+    def test_no_instance_dict(self):
+        obj = TestObjectDict(id='MyID')
+
+        self.assertFalse(hasattr(obj, '__dict__'))
+
+    def test_obj_reset_changes_unknown_field(self):
+        obj = TestObject(id='MyID')
+
+        obj.obj_reset_changes(['unknown'])
+
+        self.assertEqual(set(['id']), obj.obj_what_changed())
+
     def test_to_primitive(self):
         obj = TestObject(id='MyID')
 
@@ -388,6 +405,54 @@ class DesignateObjectTest(tests.TestCase):
         obj.nested.id = 'ffded5c4-e4f6-4e02-a175-48e13c5c12a0'
         obj.validate()
 
+    def test_validator_cached(self):
+        obj = TestValidatableObject(id='ffded5c4-e4f6-4e02-a175-48e13c5c12a0')
+        other = TestValidatableObject(id='MyID')
+
+        # Objects of the same structure share a validator
+        self.assertIs(objects.base.make_class_validator(obj),
+                      objects.base.make_class_validator(other))
+
+        # The schema of a class matches that of an object without relations
+        self.assertIs(objects.base.make_class_validator(obj),
+                      objects.base.make_class_validator(TestValidatableObject))
+
+        # Setting a relation changes the schema, and so the validator
+        other.nested = TestValidatableObject(id='MyID')
+
+        self.assertIsNot(objects.base.make_class_validator(obj),
+                         objects.base.make_class_validator(other))
+        self.assertIn(
+            'nested',
+            objects.base.make_class_validator(other).schema['properties'])
+
+        self.assertTrue(obj.is_valid)
+        self.assertFalse(other.is_valid)
+
+    def test_validate_list(self):
+        obj = TestValidatableObjectList(objects=[
+            TestValidatableObject(id='MyID'),
+            TestValidatableObject(id='ffded5c4-e4f6-4e02-a175-48e13c5c12a0'),
+            TestValidatableObject(
+                id='ffded5c4-e4f6-4e02-a175-48e13c5c12a0',
+                nested=TestValidatableObject(id='MyID')),
+        ])
+
+        self.assertFalse(obj.is_valid)
+
+        e = self.assertRaises(exceptions.InvalidObject, obj.validate)
+
+        # Every invalid item is reported, prefixed by its index
+        self.assertEqual(2, len(e.errors))
+        self.assertEqual([0, 'id'], e.errors[0].path)
+        self.assertEqual([2, 'nested', 'id'], e.errors[1].path)
+
+        obj[0].id = 'ffded5c4-e4f6-4e02-a175-48e13c5c12a0'
+        obj[2].nested.id = 'ffded5c4-e4f6-4e02-a175-48e13c5c12a0'
+
+        self.assertTrue(obj.is_valid)
+        obj.validate()
+
     def test_obj_attr_is_set(self):
         obj = TestObject()
 
@@ -491,6 +556,53 @@ class DesignateObjectTest(tests.TestCase):
         self.assertEqual(o_obj.obj_get_changes(), c_obj.obj_get_changes())
         self.assertEqual(o_obj.to_primitive(), c_obj.to_primitive())
 
+    def test_snapshot_restore(self):
+        nested = TestObject(id="Nested ID")
+        o_obj = TestObject(id="My ID", nested_list=TestObjectList(
+            objects=[nested]))
+        o_obj.obj_reset_changes()
+
+        snapshot = objects.base.Snapshot(o_obj, {'obj': o_obj})
+
+        # Change the object, the objects it holds and their list
+        o_obj.id = "Other ID"
+        o_obj.name = "Other Name"
+        nested.id = "Other Nested ID"
+        o_obj.nested_list.append(TestObject(id="New ID"))
+
+        snapshot.restore()
+
+        self.assertEqual("My ID", o_obj.id)
+        self.assertFalse(o_obj.obj_attr_is_set('name'))
+        self.assertEqual(set(), o_obj.obj_what_changed())
+        self.assertEqual([nested], o_obj.nested_list.objects)
+        self.assertEqual("Nested ID", nested.id)
+
+        # The snapshot can be restored again
+        o_obj.id = "Other ID"
+        snapshot.restore()
+
+        self.assertEqual("My ID", o_obj.id)
+        self.assertEqual(set(), o_obj.obj_what_changed())
+
+    def test_snapshot_restore_containers(self):
+        values = {'ids': set(["My ID"]), 'names': ["My Name"]}
+        untracked = object()
+        values['untracked'] = untracked
+
+        snapshot = objects.base.Snapshot(values)
+
+        values['ids'].add("Other ID")
+        values['names'].append("Other Name")
+        values['other'] = "Other"
+
+        snapshot.restore()
+
+        self.assertEqual(set(["My ID"]), values['ids'])
+        self.assertEqual(["My Name"], values['names'])
+        self.assertNotIn('other', values)
+        self.assertIs(untracked, values['untracked'])
+
     def test_eq(self):
         # Create two equal objects
         obj_one = TestObject(id="My ID", name="My Name")
@@ -51,3 +51,11 @@ class PoolManagerCacheTestCase(object):
             self.cache.retrieve(
                 self.admin_context, expected.nameserver_id, expected.domain_id,
                 expected.action)
+
+    def test_retrieve_many(self):
+        expected = self.create_pool_manager_status()
+        actual = self.cache.retrieve_many(
+            self.admin_context, [expected.nameserver_id], expected.domain_id,
+            expected.action)
+
+        self.assertEqual(0, len(actual))
@@ -45,6 +45,32 @@ class MemcachePoolManagerCacheTest(PoolManagerCacheTestCase, TestCase):
         self.assertEqual(expected.serial_number, actual.serial_number)
         self.assertEqual(expected.action, actual.action)
 
+    def test_store_and_retrieve_many(self):
+        expected = self.create_pool_manager_status()
+        self.cache.store(self.admin_context, expected)
+
+        other = self.create_pool_manager_status()
+        other.nameserver_id = 'c5d64303-4cba-425a-9f3c-5d708584dde4'
+        other.status = None
+        other.serial_number = 2
+        self.cache.store(self.admin_context, other)
+
+        # The third nameserver has no status, and is left out
+        actual = self.cache.retrieve_many(
+            self.admin_context,
+            [expected.nameserver_id, other.nameserver_id,
+             'c67cdc95-9a9e-4d2a-98ed-dc78cbd85234'],
+            expected.domain_id, expected.action)
+
+        actual = dict((status.nameserver_id, status) for status in actual)
+
+        self.assertEqual(
+            set([expected.nameserver_id, other.nameserver_id]), set(actual))
+        self.assertEqual('SUCCESS', actual[expected.nameserver_id].status)
+        self.assertEqual(1, actual[expected.nameserver_id].serial_number)
+        self.assertEqual(None, actual[other.nameserver_id].status)
+        self.assertEqual(2, actual[other.nameserver_id].serial_number)
+
     def test_serial_number_key_is_a_string(self):
         """Memcache requires keys be strings.
 
@@ -0,0 +1,220 @@
+# Copyright 2015 Infoblox
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import datetime
+import time
+
+import testtools
+from mock import patch
+from oslo_utils import timeutils
+
+from designate import exceptions
+from designate.pool_manager import cache
+from designate.tests import TestCase
+from designate.tests.test_pool_manager.cache import PoolManagerCacheTestCase
+
+
+class MemoryPoolManagerCacheTest(PoolManagerCacheTestCase, TestCase):
+    def setUp(self):
+        super(MemoryPoolManagerCacheTest, self).setUp()
+
+        self.cache = cache.get_pool_manager_cache('memory')
+
+    def _retrieve(self, cache_, expected):
+        return cache_.retrieve(
+            self.admin_context, expected.nameserver_id, expected.domain_id,
+            expected.action)
+
+    def test_store_and_retrieve(self):
+        expected = self.create_pool_manager_status()
+        self.cache.store(self.admin_context, expected)
+
+        actual = self._retrieve(self.cache, expected)
+
+        self.assertEqual(expected.nameserver_id, actual.nameserver_id)
+        self.assertEqual(expected.domain_id, actual.domain_id)
+        self.assertEqual(expected.status, actual.status)
+        self.assertEqual(expected.serial_number, actual.serial_number)
+        self.assertEqual(expected.action, actual.action)
+
+        # Changes only reach the cache once stored
+        actual.serial_number = 2
+        self.assertEqual(1, self._retrieve(self.cache, expected).serial_number)
+
+    def test_store_and_retrieve_many(self):
+        expected = self.create_pool_manager_status()
+        self.cache.store(self.admin_context, expected)
+
+        actual = self.cache.retrieve_many(
+            self.admin_context,
+            [expected.nameserver_id, 'c5d64303-4cba-425a-9f3c-5d708584dde4'],
+            expected.domain_id, expected.action)
+
+        self.assertEqual(1, len(actual))
+        self.assertEqual(expected.nameserver_id, actual[0].nameserver_id)
+
+    def test_expiration(self):
+        self.cache.expiration = 10
+
+        expected = self.create_pool_manager_status()
+        self.cache.store(self.admin_context, expected)
+
+        with patch.object(time, 'time', return_value=time.time() + 11):
+            with testtools.ExpectedException(
+                    exceptions.PoolManagerStatusNotFound):
+                self._retrieve(self.cache, expected)
+
+    def test_max_entries(self):
+        self.cache.max_entries = 2
+
+        statuses = []
+        for serial_number in range(3):
+            status = self.create_pool_manager_status()
+            status.serial_number = serial_number
+            status.domain_id = '75ea1626-eea7-46b5-acb7-41e5897c2d4%d' % (
+                serial_number)
+            self.cache.store(self.admin_context, status)
+            statuses.append(status)
+
+        # The least recently stored status was dropped
+        with testtools.ExpectedException(exceptions.PoolManagerStatusNotFound):
+            self._retrieve(self.cache, statuses[0])
+
+        self._retrieve(self.cache, statuses[1])
+        self._retrieve(self.cache, statuses[2])
+
+    def test_persist(self):
+        self.config(persist=True, group='pool_manager_cache:memory')
+        self.cache = cache.get_pool_manager_cache('memory')
+
+        expected = self.create_pool_manager_status()
+        other = self.create_pool_manager_status()
+        other.action = 'UPDATE'
+
+        self.cache.store(self.admin_context, expected)
+        self.cache.store(self.admin_context, other)
+
+        # Nothing is written until the cache is flushed
+        with testtools.ExpectedException(exceptions.PoolManagerStatusNotFound):
+            self._retrieve(self.cache.persistent, expected)
+
+        self.cache.flush()
+
+        self.assertEqual(
+            1, self._retrieve(self.cache.persistent, expected).serial_number)
+
+        expected.serial_number = 2
+        self.cache.store(self.admin_context, expected)
+        self.cache.clear(self.admin_context, other)
+        self.cache.flush()
+
+        self.assertEqual(
+            2, self._retrieve(self.cache.persistent, expected).serial_number)
+
+        with testtools.ExpectedException(exceptions.PoolManagerStatusNotFound):
+            self._retrieve(self.cache.persistent, other)
+
+        # A new cache recovers the persisted statuses
+        recovered = cache.get_pool_manager_cache('memory')
+
+        actual = self._retrieve(recovered, expected)
+        self.assertEqual('SUCCESS', actual.status)
+        self.assertEqual(2, actual.serial_number)
+
+    def test_persist_failure(self):
+        self.config(persist=True, group='pool_manager_cache:memory')
+        self.cache = cache.get_pool_manager_cache('memory')
+
+        expected = self.create_pool_manager_status()
+        self.cache.store(self.admin_context, expected)
+
+        with patch.object(self.cache.persistent, 'store',
+                          side_effect=exceptions.DuplicatePoolManagerStatus):
+            self.cache.flush()
+
+        # The status is written by the next flush
+        self.cache.flush()
+
+        self.assertEqual(
+            1, self._retrieve(self.cache.persistent, expected).serial_number)
+
+    def test_persist_expired_and_dropped(self):
+        self.config(persist=True, group='pool_manager_cache:memory')
+        self.cache = cache.get_pool_manager_cache('memory')
+
+        expired = self.create_pool_manager_status()
+        dropped = self.create_pool_manager_status()
+        dropped.action = 'UPDATE'
+
+        self.cache.store(self.admin_context, expired)
+        self.cache.store(self.admin_context, dropped)
+        self.cache.flush()
+
+        # Expire one status, and drop the other by storing a third
+        with patch.object(time, 'time',
+                          return_value=time.time() + self.cache.expiration):
+            with testtools.ExpectedException(
+                    exceptions.PoolManagerStatusNotFound):
+                self._retrieve(self.cache, expired)
+
+        self.cache.max_entries = 1
+
+        kept = self.create_pool_manager_status()
+        kept.action = 'DELETE'
+        self.cache.store(self.admin_context, kept)
+        self.cache.flush()
+
+        # Their rows were cleared, so a restart doesn't bring them back
+        for status in (expired, dropped):
+            with testtools.ExpectedException(
+                    exceptions.PoolManagerStatusNotFound):
+                self._retrieve(self.cache.persistent, status)
+
+        self._retrieve(self.cache.persistent, kept)
+
+    def test_persist_load_unexpired_newest(self):
+        self.config(persist=True, group='pool_manager_cache:memory')
+        self.config(expiration=100, max_entries=2,
+                    group='pool_manager_cache:memory')
+        persistent = cache.get_pool_manager_cache('sqlalchemy')
+
+        now = timeutils.utcnow()
+        statuses = []
+        for age in (10, 150, 20, 30):
+            status = self.create_pool_manager_status()
+            status.domain_id = '75ea1626-eea7-46b5-acb7-41e5897c2%03d' % age
+
+            with patch.object(timeutils, 'utcnow', return_value=(
+                    now - datetime.timedelta(seconds=age))):
+                persistent.store(self.admin_context, status)
+
+            statuses.append(status)
+
+        recovered = cache.get_pool_manager_cache('memory')
+
+        # The two most recently stored of the unexpired statuses are loaded
+        self._retrieve(recovered, statuses[0])
+        self._retrieve(recovered, statuses[2])
+
+        for status in (statuses[1], statuses[3]):
+            with testtools.ExpectedException(
+                    exceptions.PoolManagerStatusNotFound):
+                self._retrieve(recovered, status)
+
+        # They expire when they would have, had there been no restart
+        with patch.object(time, 'time', return_value=time.time() + 85):
+            self._retrieve(recovered, statuses[0])
+
+            with testtools.ExpectedException(
+                    exceptions.PoolManagerStatusNotFound):
+                self._retrieve(recovered, statuses[2])
@@ -13,6 +13,9 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import time
+
+import eventlet
 from oslo import messaging
 from oslo.config import cfg
 from mock import call
@@ -23,6 +26,7 @@ from designate import objects
 from designate.backend import impl_fake
 from designate.central import rpcapi as central_rpcapi
 from designate.mdns import rpcapi as mdns_rpcapi
+from designate.pool_manager.service import TokenBucket
 from designate.tests.test_pool_manager import PoolManagerTestCase
 
 
@@ -205,6 +209,12 @@ class PoolManagerServiceNoopTest(PoolManagerTestCase):
         # central's update_status.
         self.assertEqual(True, mock_update_status.called)
 
+    def test_stop_flushes_cache(self):
+        with patch.object(self.service.cache, 'flush') as mock_flush:
+            self.service.stop()
+
+        self.assertTrue(mock_flush.called)
+
     @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
                   side_effect=messaging.MessagingException)
     @patch.object(impl_fake.FakeBackend, 'create_domain')
@@ -250,6 +260,119 @@ class PoolManagerServiceNoopTest(PoolManagerTestCase):
 
         self.assertEqual(False, mock_update_status.called)
 
+    @staticmethod
+    def _slow_second_call(delay):
+        calls = []
+
+        def _call(context, domain):
+            calls.append(domain)
+            if len(calls) == 2:
+                eventlet.sleep(delay)
+
+        return _call
+
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
+                  side_effect=messaging.MessagingException)
+    @patch.object(impl_fake.FakeBackend, 'create_domain')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'poll_for_serial_number')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'notify_zone_changed')
+    @patch.object(central_rpcapi.CentralAPI, 'update_status')
+    def test_create_domain_slow_target_consensus(
+            self, mock_update_status, mock_notify_zone_changed,
+            mock_poll_for_serial_number, mock_create_domain, _):
+
+        self.service.stop()
+        self.config(
+            threshold_percentage=50,
+            group='service:pool_manager')
+        self.service = self.start_service('pool_manager')
+
+        domain = self._build_domain('example.org.', 'CREATE', 'PENDING')
+
+        mock_create_domain.side_effect = self._slow_second_call(10)
+
+        start = time.time()
+        self.service.create_domain(self.admin_context, domain)
+
+        # Consensus is reached without waiting for the slow target
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(2, mock_create_domain.call_count)
+        self.assertEqual(2, mock_notify_zone_changed.call_count)
+        self.assertEqual(False, mock_update_status.called)
+
+    @patch.object(impl_fake.FakeBackend, 'create_domain')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'poll_for_serial_number')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'notify_zone_changed')
+    @patch.object(central_rpcapi.CentralAPI, 'update_status')
+    def test_create_domain_target_timeout(
+            self, mock_update_status, mock_notify_zone_changed,
+            mock_poll_for_serial_number, mock_create_domain):
+
+        self.service.stop()
+        self.config(
+            target_timeout=1,
+            group='service:pool_manager')
+        self.service = self.start_service('pool_manager')
+
+        domain = self._build_domain('example.org.', 'CREATE', 'PENDING')
+
+        mock_create_domain.side_effect = self._slow_second_call(10)
+
+        start = time.time()
+        self.service.create_domain(self.admin_context, domain)
+
+        # The slow target counts as failed once the timeout expires
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(False, mock_notify_zone_changed.called)
+        mock_update_status.assert_called_once_with(
+            self.admin_context, domain.id, 'ERROR', domain.serial)
+
+    def test_update_domain_coalesced(self):
+        self.service.coalesce_window = 0.1
+
+        domains = []
+        for serial in (1422062497, 1422062499, 1422062498):
+            domain = self._build_domain('example.org.', 'UPDATE', 'PENDING')
+            domain.serial = serial
+            domains.append(domain)
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            for domain in domains:
+                self.service.update_domain(self.admin_context, domain)
+
+            self.assertFalse(mock_update.called)
+
+            eventlet.sleep(0.3)
+
+        # Only the update with the latest serial is pushed
+        mock_update.assert_called_once_with(self.admin_context, domains[1])
+
+    @patch.object(central_rpcapi.CentralAPI, 'update_status')
+    def test_update_domain_coalesced_delete(self, _):
+        self.service.coalesce_window = 0.1
+
+        domain = self._build_domain('example.org.', 'UPDATE', 'PENDING')
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            self.service.update_domain(self.admin_context, domain)
+
+            domain.action = 'DELETE'
+            self.service.delete_domain(self.admin_context, domain)
+
+            eventlet.sleep(0.3)
+
+        self.assertFalse(mock_update.called)
+
+    def test_update_domain_not_coalesced(self):
+        self.service.coalesce_window = 0
+
+        domain = self._build_domain('example.org.', 'UPDATE', 'PENDING')
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            self.service.update_domain(self.admin_context, domain)
+
+        mock_update.assert_called_once_with(self.admin_context, domain)
+
     @patch.object(impl_fake.FakeBackend, 'delete_domain',
                   side_effect=exceptions.Backend)
     @patch.object(central_rpcapi.CentralAPI, 'update_status')
@@ -434,3 +557,181 @@ class PoolManagerServiceNoopTest(PoolManagerTestCase):
 
         mock_update_status.assert_called_once_with(
             self.admin_context, domain.id, 'ERROR', 0)
+
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
+                  side_effect=messaging.MessagingException)
+    @patch.object(central_rpcapi.CentralAPI, 'update_status')
+    def test_update_status_single_cache_read(self, mock_update_status, _):
+        domain = self._build_domain('example.org.', 'UPDATE', 'PENDING')
+
+        status = self.service._build_status_object(
+            self.service.pool.nameservers[0], domain, 'UPDATE')
+
+        with patch.object(self.cache, 'retrieve_many',
+                          return_value=objects.PoolManagerStatusList(
+                              objects=[status])) as mock_retrieve_many, \
+                patch.object(self.cache, 'retrieve') as mock_retrieve:
+            self.service.update_status(self.admin_context, domain,
+                                       self.service.pool.nameservers[0],
+                                       'SUCCESS', domain.serial)
+
+        # The statuses of all the nameservers were read from the cache once
+        self.assertEqual(1, mock_retrieve_many.call_count)
+        self.assertFalse(mock_retrieve.called)
+
+        self.assertEqual('SUCCESS', status.status)
+        self.assertEqual(domain.serial, status.serial_number)
+
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
+                  side_effect=messaging.MessagingException)
+    @patch.object(central_rpcapi.CentralAPI, 'update_status')
+    def test_update_status_new_status_single_cache_read(self, *_):
+        domain = self._build_domain('example.org.', 'UPDATE', 'PENDING')
+
+        # A nameserver without a cached status yet, with a cache which keeps
+        # the statuses stored
+        with patch.object(self.cache, 'keeps_statuses', True), \
+                patch.object(self.cache, 'retrieve_many',
+                             return_value=objects.PoolManagerStatusList()) \
+                as mock_retrieve_many, \
+                patch.object(self.cache, 'store') as mock_store, \
+                patch.object(self.cache, 'retrieve') as mock_retrieve:
+            self.service.update_status(self.admin_context, domain,
+                                       self.service.pool.nameservers[0],
+                                       'SUCCESS', domain.serial)
+
+        # The new status was stored, and counted without reading it back
+        self.assertEqual(1, mock_retrieve_many.call_count)
+        self.assertTrue(mock_store.called)
+        self.assertFalse(mock_retrieve.called)
+
+    def test_get_consensus_serials(self):
+        def _statuses(*serials):
+            return [objects.PoolManagerStatus(serial_number=serial)
+                    for serial in serials]
+
+        # Both nameservers must agree, with a threshold of 100
+        self.assertEqual(
+            (0, 0), self.service._get_consensus_serials(_statuses()))
+        self.assertEqual(
+            (3, 0), self.service._get_consensus_serials(_statuses(3, 3)))
+        self.assertEqual(
+            (2, 3), self.service._get_consensus_serials(_statuses(3, 2)))
+        self.assertEqual(
+            (0, 3), self.service._get_consensus_serials(_statuses(0, 3)))
+
+        self.service.threshold = 50
+
+        self.assertEqual(
+            (3, 0), self.service._get_consensus_serials(_statuses(3, 2)))
+
+    @patch.object(TokenBucket, 'consume')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number')
+    def test_periodic_sync(self, mock_get_serial_number, mock_consume):
+        self.config(periodic_sync_batch_size=2, group='service:pool_manager')
+        self.central_service = self.start_service('central')
+
+        domains = [self.create_domain(fixture=fixture)
+                   for fixture in range(3)]
+        in_sync_ids = set([domains[1].id])
+
+        def _get_serial_number(context, domain, *args):
+            if domain.id in in_sync_ids:
+                return ('SUCCESS', domain.serial, 0)
+            return ('ERROR', domain.serial - 1, 0)
+
+        mock_get_serial_number.side_effect = _get_serial_number
+
+        find_domains = self.service.central_api.find_domains
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            with patch.object(self.service.central_api, 'find_domains',
+                              wraps=find_domains) as mock_find:
+                self.service.periodic_sync()
+
+        # Every zone was paced, but only the zones behind on the nameservers
+        # were updated, over two batches
+        self.assertEqual(3, mock_consume.call_count)
+        self.assertEqual(2, mock_find.call_count)
+
+        # The batches are read without counting the zones
+        for find_call in mock_find.call_args_list:
+            self.assertEqual('none', find_call[0][1]['total_count'])
+        self.assertEqual(
+            sorted([domains[0].id, domains[2].id]),
+            sorted(c[0][1].id for c in mock_update.call_args_list))
+        self.assertIsNone(self.service._sync_marker)
+
+        # The next sync checks every zone again, catching the zone in sync
+        # last time having been lost by a nameserver
+        in_sync_ids.clear()
+        mock_get_serial_number.reset_mock()
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            self.service.periodic_sync()
+
+        self.assertEqual(3, mock_get_serial_number.call_count)
+        self.assertEqual(3, mock_update.call_count)
+
+    @patch.object(TokenBucket, 'consume')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
+                  return_value=('ERROR', None, 0))
+    def test_periodic_sync_skips_synced(self, mock_get_serial_number, _):
+        self.central_service = self.start_service('central')
+
+        domain = self.create_domain()
+
+        # An update made during the sync already got the zone in sync
+        self.service._synced_serials[domain.id] = domain.serial
+        self.service._sync_marker = '00000000-0000-0000-0000-000000000000'
+
+        with patch.object(self.service, '_update_domain') as mock_update:
+            self.service.periodic_sync()
+
+        self.assertFalse(mock_get_serial_number.called)
+        self.assertFalse(mock_update.called)
+
+    @patch.object(TokenBucket, 'consume')
+    @patch.object(mdns_rpcapi.MdnsAPI, 'get_serial_number',
+                  return_value=('ERROR', None, 0))
+    def test_periodic_sync_resumes(self, *_):
+        self.config(periodic_sync_batch_size=2, group='service:pool_manager')
+        self.central_service = self.start_service('central')
+
+        domains = sorted([self.create_domain(fixture=fixture)
+                          for fixture in range(3)], key=lambda d: d.id)
+
+        first_batch = self.service.central_api.find_domains(
+            self.admin_context, {'pool_id': domains[0].pool_id}, limit=2,
+            sort_key='id', sort_dir='asc')
+
+        # Fail while fetching the second batch
+        with patch.object(central_rpcapi.CentralAPI, 'find_domains',
+                          side_effect=[first_batch,
+                                       messaging.MessagingTimeout]):
+            with patch.object(self.service, '_update_domain') as mock_update:
+                self.service.periodic_sync()
+
+        self.assertEqual(2, mock_update.call_count)
+        self.assertEqual(domains[1].id, self.service._sync_marker)
+
+        # The next sync carries on from the last zone reached
+        with patch.object(self.service, '_update_domain') as mock_update:
+            self.service.periodic_sync()
+
+        self.assertEqual([domains[2].id],
+                         [c[0][1].id for c in mock_update.call_args_list])
+        self.assertIsNone(self.service._sync_marker)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(10)
+
+        with patch.object(time, 'sleep') as mock_sleep:
+            bucket.consume()
+            self.assertFalse(mock_sleep.called)
+
+            # The bucket is empty, so the next token is 1/10th of a second
+            # away
+            bucket.consume()
+            self.assertEqual(1, mock_sleep.call_count)
+            self.assertAlmostEqual(0.1, mock_sleep.call_args[0][0], places=2)
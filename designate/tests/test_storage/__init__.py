@@ -540,6 +540,19 @@ class StorageTestCase(object):
         self.assertEqual(domain['name'], actual[0]['name'])
         self.assertEqual(domain['email'], actual[0]['email'])
 
+    def test_find_domain_names(self):
+        domain = self.create_domain()
+
+        actual = self.storage.find_domain_names(self.admin_context)
+        self.assertEqual(1, len(actual))
+
+        self.assertEqual(domain.id, actual[0].id)
+        self.assertEqual(domain.name, actual[0].name)
+        self.assertEqual(domain.pool_id, actual[0].pool_id)
+
+        # The other fields aren't loaded
+        self.assertFalse(actual[0].obj_attr_is_set('email'))
+
     def test_find_domains_paging(self):
         # Create 10 Domains
         created = [self.create_domain(name='example-%d.org.' % i)
@@ -797,6 +810,36 @@ class StorageTestCase(object):
         self.assertEqual(result['name'], values['name'])
         self.assertEqual(result['type'], values['type'])
 
+    def test_create_recordsets(self):
+        domain = self.create_domain()
+
+        recordsets = [objects.RecordSet(
+            name='www%d.%s' % (i, domain['name']),
+            type='A',
+            records=objects.RecordList(objects=[
+                objects.Record(data='192.0.2.%d' % (i + 1)),
+            ])
+        ) for i in range(2)]
+
+        with mock.patch.object(self.storage, '_find_domains',
+                               wraps=self.storage._find_domains) as find:
+            result = self.storage.create_recordsets(
+                self.admin_context, domain['id'], recordsets)
+
+        # The domain is fetched once for the whole batch
+        self.assertEqual(1, find.call_count)
+
+        self.assertIsInstance(result, objects.RecordSetList)
+        self.assertEqual(2, len(result))
+
+        for i, recordset in enumerate(result):
+            self.assertIsNotNone(recordset['id'])
+            self.assertEqual(domain['id'], recordset['domain_id'])
+            self.assertEqual('www%d.%s' % (i, domain['name']),
+                             recordset['name'])
+            self.assertEqual(1, len(recordset.records))
+            self.assertIsNotNone(recordset.records[0]['id'])
+
     def test_create_recordset_duplicate(self):
         domain = self.create_domain()
 
@@ -1485,6 +1528,88 @@ class StorageTestCase(object):
             records = self.storage.count_records(self.admin_context)
             self.assertEqual(records, 0)
 
+    def _create_records_with_status(self, domain, recordset, *values):
+        return [self.storage.create_record(
+            self.admin_context, domain.id, recordset.id,
+            objects.Record(data='192.0.2.%d' % i, status=status,
+                           action=action, serial=serial))
+            for i, (status, action, serial) in enumerate(values, 1)]
+
+    def test_update_records_status(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, records=[])
+
+        records = self._create_records_with_status(
+            domain, recordset,
+            ('PENDING', 'CREATE', 10),
+            ('ERROR', 'UPDATE', 11),
+            ('PENDING', 'CREATE', 12),
+            ('ACTIVE', 'NONE', 9))
+
+        criterion = {
+            'domain_id': domain.id,
+            'status': ['PENDING', 'ERROR'],
+            'serial': '<=11',
+        }
+
+        count = self.storage.update_records_status(
+            self.admin_context, criterion,
+            {'action': 'NONE', 'status': 'ACTIVE'})
+
+        self.assertEqual(2, count)
+
+        results = [self.storage.get_record(self.admin_context, record.id)
+                   for record in records]
+
+        self.assertEqual(['ACTIVE', 'ACTIVE', 'PENDING', 'ACTIVE'],
+                         [r.status for r in results])
+        self.assertEqual(['NONE', 'NONE', 'CREATE', 'NONE'],
+                         [r.action for r in results])
+
+        # The version of the updated records was incremented
+        self.assertEqual([2, 2, 1, 1], [r.version for r in results])
+
+    def test_purge_records(self):
+        domain = self.create_domain()
+        recordset = self.create_recordset(domain, records=[])
+        other_recordset = self.create_recordset(
+            domain, fixture=1, records=[])
+        empty_recordset = self.create_recordset(
+            domain, type='MX', records=[])
+
+        self._create_records_with_status(
+            domain, recordset,
+            ('PENDING', 'DELETE', 10),
+            ('PENDING', 'DELETE', 11))
+        kept = self._create_records_with_status(
+            domain, other_recordset,
+            ('PENDING', 'DELETE', 12),
+            ('ACTIVE', 'NONE', 9))
+
+        criterion = {
+            'domain_id': domain.id,
+            'action': 'DELETE',
+            'serial': '<=12',
+        }
+
+        self.assertEqual(
+            3, self.storage.purge_records(self.admin_context, criterion))
+
+        # The recordset left without records was deleted
+        with testtools.ExpectedException(exceptions.RecordSetNotFound):
+            self.storage.get_recordset(self.admin_context, recordset.id)
+
+        other_recordset = self.storage.get_recordset(
+            self.admin_context, other_recordset.id)
+        self.assertEqual([kept[1].id], [r.id for r in other_recordset.records])
+
+        # Recordsets which were empty to begin with are left alone
+        self.storage.get_recordset(self.admin_context, empty_recordset.id)
+
+        # Nothing left to purge
+        self.assertEqual(
+            0, self.storage.purge_records(self.admin_context, criterion))
+
     def test_ping(self):
         pong = self.storage.ping(self.admin_context)
 
@@ -1755,6 +1880,22 @@ class StorageTestCase(object):
         with testtools.ExpectedException(exceptions.BlacklistNotFound):
             self.storage.find_blacklist(self.admin_context, criterion)
 
+    def test_get_blacklists_version(self):
+        empty = self.storage.get_blacklists_version(self.admin_context)
+
+        blacklist = self.create_blacklist()
+        created = self.storage.get_blacklists_version(self.admin_context)
+        self.assertNotEqual(empty, created)
+
+        blacklist.description = 'updated'
+        self.storage.update_blacklist(self.admin_context, blacklist)
+        updated = self.storage.get_blacklists_version(self.admin_context)
+        self.assertNotEqual(created, updated)
+
+        self.storage.delete_blacklist(self.admin_context, blacklist.id)
+        self.assertEqual(
+            empty, self.storage.get_blacklists_version(self.admin_context))
+
     def test_update_blacklist(self):
         blacklist = self.create_blacklist(pattern='^example.uk.')
 
@@ -2175,6 +2316,75 @@ class StorageTestCase(object):
         self.assertEqual(result.id, zt_accept.id)
         self.assertEqual(result.domain_id, zt_accept.domain_id)
 
+    # Zone Change tests
+    def _create_zone_change(self, domain, serial, action='ADD', data=None):
+        zone_change = objects.ZoneChange(
+            serial=serial, action=action, name='www.%s' % domain.name,
+            type='A', ttl=3600, data=data or '192.0.2.1')
+
+        return self.storage.create_zone_change(
+            self.admin_context, domain.id, zone_change)
+
+    def test_create_zone_change(self):
+        domain = self.create_domain()
+
+        result = self._create_zone_change(domain, 10)
+
+        self.assertIsNotNone(result.id)
+        self.assertEqual(domain.id, result.domain_id)
+        self.assertEqual(10, result.serial)
+        self.assertEqual('ADD', result.action)
+        self.assertEqual('192.0.2.1', result.data)
+
+    def test_find_zone_changes(self):
+        domain = self.create_domain()
+
+        self._create_zone_change(domain, 10)
+        self._create_zone_change(domain, 11, 'DELETE')
+        self._create_zone_change(domain, 12, data='192.0.2.2')
+
+        criterion = {'domain_id': domain.id, 'serial': '>10'}
+        results = self.storage.find_zone_changes(
+            self.admin_context, criterion, sort_key='serial')
+
+        self.assertEqual([11, 12], [r.serial for r in results])
+
+    def test_delete_zone_changes(self):
+        domain = self.create_domain()
+        other_domain = self.create_domain(fixture=1)
+
+        for serial in (10, 11, 11, 12):
+            self._create_zone_change(domain, serial, data='192.0.2.%d' %
+                                     serial)
+        self._create_zone_change(other_domain, 10)
+
+        # Keep the changes of the two most recent serials
+        self.storage.delete_zone_changes(
+            self.admin_context, domain.id, keep=2)
+
+        results = self.storage.find_zone_changes(
+            self.admin_context, {'domain_id': domain.id})
+        self.assertEqual([11, 11, 12], sorted(r.serial for r in results))
+
+        # Keeping more serials than there are is a no-op
+        self.storage.delete_zone_changes(
+            self.admin_context, domain.id, keep=5)
+
+        results = self.storage.find_zone_changes(
+            self.admin_context, {'domain_id': domain.id})
+        self.assertEqual(3, len(results))
+
+        # Drop the rest, leaving the other domain untouched
+        self.storage.delete_zone_changes(self.admin_context, domain.id)
+
+        results = self.storage.find_zone_changes(
+            self.admin_context, {'domain_id': domain.id})
+        self.assertEqual(0, len(results))
+
+        results = self.storage.find_zone_changes(
+            self.admin_context, {'domain_id': other_domain.id})
+        self.assertEqual(1, len(results))
+
     # PoolAttribute tests
     def test_create_pool_attribute(self):
         values = {
@@ -13,10 +13,16 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+from oslo.config import cfg
 from oslo_log import log as logging
 import mock
 
+from designate import objects
 from designate import storage
+from designate.sqlalchemy import base as sqlalchemy_base
+from designate.sqlalchemy import replicas
+from designate.storage import impl_sqlalchemy
+from designate.storage.impl_sqlalchemy import tables
 from designate.tests import TestCase
 from designate.tests.test_storage import StorageTestCase
 
@@ -36,3 +42,305 @@ class SqlalchemyStorageTest(StorageTestCase, TestCase):
 
             self.assertEqual(pong['status'], False)
             self.assertIsNotNone(pong['rtt'])
+
+    def _count_finds(self, table, method, *args, **kwargs):
+        with mock.patch.object(self.storage, '_find',
+                               wraps=self.storage._find) as find:
+            result = method(*args, **kwargs)
+
+        return result, len([c for c in find.call_args_list
+                            if c[0][1] is table])
+
+    def test_find_recordsets_loads_records_in_batch(self):
+        domain = self.create_domain()
+        recordset_one = self.create_recordset(domain, fixture=0)
+        recordset_two = self.create_recordset(domain, fixture=1)
+
+        self.create_record(domain, recordset_one)
+        self.create_record(domain, recordset_one, fixture=1)
+        self.create_record(domain, recordset_two)
+
+        results, count = self._count_finds(
+            tables.records, self.storage.find_recordsets,
+            self.admin_context, {'domain_id': domain.id})
+
+        # SOA, NS and our two RecordSets should share a single records query
+        self.assertEqual(4, len(results))
+        self.assertEqual(1, count)
+
+        records = dict((r.id, r.records) for r in results)
+
+        self.assertEqual(2, len(records[recordset_one.id]))
+        self.assertEqual(1, len(records[recordset_two.id]))
+
+        for recordset in results:
+            self.assertIsInstance(recordset.records, objects.RecordList)
+            self.assertNotIn('records', recordset.obj_what_changed())
+
+            for record in recordset.records:
+                self.assertEqual(recordset.id, record.recordset_id)
+
+    def test_find_recordsets_batches_large_pages(self):
+        domain = self.create_domain()
+
+        # Enough RecordSets to need two IN (...) batches
+        for i in xrange(3):
+            self.create_recordset(domain, name='r-%d.%s' % (i, domain.name))
+
+        with mock.patch.object(sqlalchemy_base, 'RELATION_BATCH_SIZE', 3):
+            results, count = self._count_finds(
+                tables.records, self.storage.find_recordsets,
+                self.admin_context, {'domain_id': domain.id})
+
+        self.assertEqual(5, len(results))
+        self.assertEqual(2, count)
+
+        for recordset in results:
+            self.assertIsInstance(recordset.records, objects.RecordList)
+
+    def test_find_domains_loads_attributes_in_batch(self):
+        for fixture in (0, 1):
+            values = self.get_domain_fixture('SECONDARY', fixture)
+            values['email'] = \
+                cfg.CONF['service:central'].managed_resource_email
+            values['attributes'] = [{'key': 'master', 'value': '10.0.0.10'}]
+
+            self.create_domain(**values)
+
+        self.create_domain(fixture=2)
+
+        results, count = self._count_finds(
+            tables.domain_attributes, self.storage.find_domains,
+            self.admin_context)
+
+        self.assertEqual(3, len(results))
+        self.assertEqual(1, count)
+
+        for domain in results:
+            if domain.type == 'SECONDARY':
+                self.assertIsInstance(
+                    domain.attributes, objects.DomainAttributeList)
+                self.assertEqual(1, len(domain.attributes))
+                self.assertEqual('master', domain.attributes[0].key)
+            else:
+                self.assertFalse(domain.obj_attr_is_set('attributes'))
+
+    def _count_statements(self, method, *args, **kwargs):
+        session = self.storage.session
+
+        with mock.patch.object(session, 'execute',
+                               wraps=session.execute) as execute:
+            result = method(*args, **kwargs)
+
+        return result, execute.call_count
+
+    def _assert_matches_storage(self, recordset):
+        """Ensure the values returned are the same as reading them back"""
+        def _primitive(obj):
+            return obj.to_primitive()['designate_object.data']
+
+        def _records(recordset):
+            return sorted((_primitive(r) for r in recordset.records),
+                          key=lambda r: r['id'])
+
+        stored = self.storage.get_recordset(self.admin_context, recordset.id)
+
+        self.assertEqual(_records(stored), _records(recordset))
+
+        stored.records = recordset.records
+        self.assertEqual(_primitive(stored), _primitive(recordset))
+
+    def test_create_recordset_with_many_records(self):
+        domain = self.create_domain()
+
+        recordset = objects.RecordSet(
+            name='www.%s' % domain.name, type='A',
+            records=objects.RecordList(objects=[
+                objects.Record(data='192.0.2.%d' % i) for i in range(100)]))
+
+        recordset, count = self._count_statements(
+            self.storage.create_recordset, self.admin_context, domain.id,
+            recordset)
+
+        # The domain, one INSERT of the recordset and one of the records,
+        # plus one read of the records' server side serial default
+        self.assertEqual(4, count)
+        self.assertEqual(100, len(recordset.records))
+        self._assert_matches_storage(recordset)
+
+    def test_update_recordset_with_many_records(self):
+        domain = self.create_domain()
+
+        recordset = self.storage.create_recordset(
+            self.admin_context, domain.id, objects.RecordSet(
+                name='www.%s' % domain.name, type='A',
+                records=objects.RecordList(objects=[
+                    objects.Record(data='192.0.2.%d' % i, serial=1)
+                    for i in range(100)])))
+
+        recordset.ttl = 3600
+        recordset.records[:] = list(recordset.records[50:]) + [
+            objects.Record(data='198.51.100.%d' % i, serial=2)
+            for i in range(50)]
+
+        for record in recordset.records[:50]:
+            record.serial = 2
+
+        recordset, count = self._count_statements(
+            self.storage.update_recordset, self.admin_context, recordset)
+
+        # The UPDATE of the recordset, the existing records, one DELETE, one
+        # UPDATE and one INSERT of records
+        self.assertEqual(5, count)
+        self.assertEqual(100, len(recordset.records))
+        self._assert_matches_storage(recordset)
+
+    def test_find_domains_total_count(self):
+        for fixture in range(3):
+            self.create_domain(fixture=fixture)
+
+        with mock.patch.object(self.storage, '_count_domains',
+                               wraps=self.storage._count_domains) as count:
+            # A first page holding every match is counted as it's read
+            domains = self.storage.find_domains(self.admin_context, limit=5)
+
+            self.assertEqual(3, domains.total_count)
+            self.assertFalse(count.called)
+
+            # Further pages need a separate count
+            domains = self.storage.find_domains(
+                self.admin_context, limit=1, marker=domains[0].id)
+
+            self.assertEqual(3, domains.total_count)
+            self.assertEqual(1, count.call_count)
+
+    def test_find_domains_total_count_none(self):
+        for fixture in range(3):
+            self.create_domain(fixture=fixture)
+
+        with mock.patch.object(self.storage, '_count_domains') as count:
+            domains = self.storage.find_domains(
+                self.admin_context, {'total_count': 'none'}, limit=1)
+
+            self.assertIsNone(domains.total_count)
+            self.assertFalse(count.called)
+
+    def test_find_recordsets_total_count_estimate(self):
+        domain = self.create_domain()
+
+        for i in xrange(3):
+            self.create_recordset(domain, name='r-%d.%s' % (i, domain.name))
+
+        criterion = {'domain_id': domain.id, 'total_count': 'estimate'}
+
+        recordsets = self.storage.find_recordsets(
+            self.admin_context, criterion, limit=1)
+        self.assertEqual(5, recordsets.total_count)
+        self.assertFalse(recordsets.total_count_capped)
+
+        with mock.patch.object(impl_sqlalchemy, 'COUNT_ESTIMATE_LIMIT', 5):
+            recordsets = self.storage.find_recordsets(
+                self.admin_context, criterion, limit=1)
+            self.assertEqual(5, recordsets.total_count)
+            self.assertFalse(recordsets.total_count_capped)
+
+        with mock.patch.object(impl_sqlalchemy, 'COUNT_ESTIMATE_LIMIT', 2):
+            recordsets = self.storage.find_recordsets(
+                self.admin_context, criterion, limit=1)
+            self.assertEqual(2, recordsets.total_count)
+            self.assertTrue(recordsets.total_count_capped)
+
+    def test_find_recordsets_paging_by_non_unique_key(self):
+        domain = self.create_domain()
+
+        for i in xrange(6):
+            self.create_recordset(domain, name='r-%d.%s' % (i, domain.name))
+
+        for sort_dir in ('asc', 'desc'):
+            expected = self.storage.find_recordsets(
+                self.admin_context, {'domain_id': domain.id},
+                sort_key='type', sort_dir=sort_dir)
+
+            seen = []
+            marker = None
+
+            while True:
+                page = self.storage.find_recordsets(
+                    self.admin_context, {'domain_id': domain.id}, limit=2,
+                    marker=marker, sort_key='type', sort_dir=sort_dir)
+
+                if not len(page):
+                    break
+
+                seen.extend(r.id for r in page)
+                marker = page[-1].id
+
+            self.assertEqual([r.id for r in expected], seen)
+
+    def _use_replica(self):
+        # The replica is the primary's own engine, watched by a mock
+        replica = mock.Mock(wraps=self.storage.engine)
+
+        self.storage.replicas = replicas.ReplicaSet(
+            [replicas.Replica('replica-0', replica)], 10, 5)
+
+        return replica
+
+    def test_replica_reads(self):
+        domain = self.create_domain()
+        replica = self._use_replica()
+
+        # Outside of a replica_reads block, the primary is used
+        self.storage.find_domains(self.admin_context)
+        self.assertFalse(replica.execute.called)
+
+        with self.storage.replica_reads(self.admin_context):
+            replica.reset_mock()
+
+            domains = self.storage.find_domains(self.admin_context)
+            self.assertEqual([domain.id], [d.id for d in domains])
+
+            self.assertEqual(
+                1, self.storage.count_domains(self.admin_context))
+
+        self.assertEqual(2, replica.execute.call_count)
+
+    def test_replica_reads_in_transaction(self):
+        self.create_domain()
+        replica = self._use_replica()
+
+        with self.storage.replica_reads(self.admin_context):
+            replica.reset_mock()
+
+            self.storage.begin()
+            try:
+                self.storage.find_domains(self.admin_context)
+            finally:
+                self.storage.rollback()
+
+        self.assertFalse(replica.execute.called)
+
+    def test_replica_reads_unhealthy_replica(self):
+        self.create_domain()
+        replica = self._use_replica()
+        replica.execute.side_effect = Exception('Connection refused')
+
+        with self.storage.replica_reads(self.admin_context):
+            domains = self.storage.find_domains(self.admin_context)
+
+        self.assertEqual(1, len(domains))
+        self.assertFalse(self.storage.replicas.replicas[0].healthy)
+
+        # The failed check isn't repeated within the check interval
+        self.assertEqual(1, replica.execute.call_count)
+
+    def test_replica_reads_lagging_replica(self):
+        self.create_domain()
+        replica = self._use_replica()
+
+        with mock.patch.object(replicas.ReplicaSet, '_get_lag',
+                               return_value=30):
+            with self.storage.replica_reads(self.admin_context):
+                self.storage.find_domains(self.admin_context)
+
+        self.assertFalse(replica.execute.called)
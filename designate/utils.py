@@ -145,6 +145,33 @@ def render_template(template, **template_context):
     return template.render(**template_context)
 
 
+def render_template_chunks(template, chunk_size=65536, **template_context):
+    """
+    Render a template as it's consumed, yielding UTF-8 encoded chunks of
+    around chunk_size bytes, rather than building it all in memory.
+    """
+    if not isinstance(template, Template):
+        template = load_template(template)
+
+    chunk = []
+    size = 0
+
+    for piece in template.generate(**template_context):
+        piece = piece.encode('utf-8')
+
+        chunk.append(piece)
+        size += len(piece)
+
+        if size >= chunk_size:
+            yield ''.join(chunk)
+
+            chunk = []
+            size = 0
+
+    if chunk:
+        yield ''.join(chunk)
+
+
 def render_template_to_file(template_name, output_path, makedirs=True,
                             **template_context):
     output_folder = os.path.dirname(output_path)